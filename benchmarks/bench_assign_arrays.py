@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmark of the attribution of the attC arrays to the integrases in :func:`integron_finder.integron.find_integron`
+(:class:`integron_finder.integron._AttcArrayAssigner`) when the replicon carries hundreds of integrase-like hits
+(for instance with --union-integrases), compared to the previous implementation
+(distances to all remaining arrays computed for each integrase).
+
+usage::
+
+    python benchmarks/bench_assign_arrays.py [--sizes 100 500 1000 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from integron_finder.integron import _AttcArrayAssigner
+
+
+def legacy_assign(attc_left, attc_right, integrases, replicon_size, circular, dist_threshold):
+    """The attribution loop of find_integron before the sorted index, used as reference."""
+    remaining = list(range(len(attc_left)))
+    attributed = []
+    for int_beg, int_end in integrases:
+        if not remaining:
+            attributed.append(None)
+            continue
+        left = attc_left[remaining]
+        right = attc_right[remaining]
+        if circular:
+            distances = np.array([(left - int_end), (int_beg - right)]) % replicon_size
+        else:
+            distances = np.array([abs(left - int_end), abs(int_beg - right)])
+        side, idx_attc = np.where(distances == distances.min())
+        side, idx_attc = side[0], idx_attc[0]
+        if distances[side, idx_attc] < dist_threshold:
+            attributed.append(remaining.pop(idx_attc))
+        else:
+            attributed.append(None)
+    return attributed, remaining
+
+
+def assign(attc_left, attc_right, integrases, replicon_size, circular, dist_threshold):
+    """The attribution as done now in find_integron."""
+    assigner = _AttcArrayAssigner(attc_left, attc_right, replicon_size, circular)
+    attributed = []
+    for int_beg, int_end in integrases:
+        if not assigner:
+            attributed.append(None)
+            continue
+        distance, array_idx = assigner.closest(int_beg, int_end)
+        if distance < dist_threshold:
+            assigner.remove(array_idx)
+            attributed.append(array_idx)
+        else:
+            attributed.append(None)
+    return attributed, assigner.remaining()
+
+
+def make_replicon(hits_nb, replicon_size, seed=0):
+    """
+    :return: the beginning and end of hits_nb attC arrays and hits_nb integrases spread on the replicon
+    """
+    rand = np.random.default_rng(seed)
+    attc_left = np.sort(rand.integers(1, replicon_size, hits_nb))
+    attc_right = attc_left + rand.integers(100, 3000, hits_nb)
+    int_beg = np.sort(rand.integers(1, replicon_size, hits_nb))
+    integrases = [(int(beg), int(beg) + 1000) for beg in int_beg]
+    return attc_left, attc_right, integrases
+
+
+def bench(func, *args, repeat=3):
+    """
+    :return: the best wall time of repeat calls and the result of the last call
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000, 5000],
+                        help='the numbers of integrases and arrays on the replicon')
+    parser.add_argument('--replicon-size', type=int, default=10000000)
+    parser.add_argument('--repeat', type=int, default=3, help='the number of runs of each implementation')
+    args = parser.parse_args(args)
+
+    print("{:>8} {:>9} {:>12} {:>12} {:>8}".format('hits', 'topology', 'previous (s)', 'current (s)', 'speedup'))
+    for hits_nb in args.sizes:
+        attc_left, attc_right, integrases = make_replicon(hits_nb, args.replicon_size)
+        for circular in (True, False):
+            params = (attc_left, attc_right, integrases, args.replicon_size, circular, 4000)
+            old_time, old_res = bench(legacy_assign, *params, repeat=args.repeat)
+            new_time, new_res = bench(assign, *params, repeat=args.repeat)
+            assert old_res == new_res, "the attributions differ"
+            print("{:>8} {:>9} {:>12.3f} {:>12.3f} {:>7.1f}x".format(hits_nb, 'circ' if circular else 'lin',
+                                                                     old_time, new_time, old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
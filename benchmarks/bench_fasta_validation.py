@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+"""
+Benchmark of the check of the replicons letters in :class:`integron_finder.utils.FastaIterator`
+on a large synthetic multi fasta file, compared to the previous implementation (set(str(seq).upper())).
+The throughput and the peak of memory allocated by the check (tracemalloc) are reported.
+
+usage::
+
+    python benchmarks/bench_fasta_validation.py [--replicons 10] [--length 5000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from integron_finder.utils import FastaIterator
+
+
+def legacy_check_seq_alphabet_compliance(seq):
+    """The implementation of FastaIterator._check_seq_alphabet_compliance before the check on bytes."""
+    seq_letters = set(str(seq).upper())
+    alphabet = set('GATCRYWSMKHBVDN')
+    return seq_letters.issubset(alphabet)
+
+
+def write_fasta(path, replicons_nb, length, seed=0):
+    """
+    Write a multi fasta file with replicons_nb replicons of length bp, in lower and upper case,
+    the last replicon contains an invalid letter at its end.
+    """
+    rand = random.Random(seed)
+    block = ''.join(rand.choice('ACGTacgtN') for _ in range(100000))
+    with open(path, 'w') as fasta:
+        for rep_no in range(replicons_nb):
+            seq = (block * (length // len(block) + 1))[:length]
+            if rep_no == replicons_nb - 1:
+                seq = seq[:-1] + 'X'
+            fasta.write(">replicon_{}\n".format(rep_no))
+            for start in range(0, length, 80):
+                fasta.write(seq[start:start + 80])
+                fasta.write('\n')
+
+
+def bench(check, sequences):
+    """
+    :return: the wall time, the peak of memory allocated during the checks (in bytes) and the results
+    """
+    start = time.perf_counter()
+    res = [check(seq) for seq in sequences]
+    elapsed = time.perf_counter() - start
+    # tracemalloc slows down the allocations, the memory is measured on a second run
+    tracemalloc.start()
+    for seq in sequences:
+        check(seq)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, res
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replicons', type=int, default=10, help='the number of replicons (default: 10)')
+    parser.add_argument('--length', type=int, default=5000000, help='the length of replicons (default: 5000000)')
+    args = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fasta = os.path.join(tmp_dir, 'replicons.fst')
+        write_fasta(fasta, args.replicons, args.length)
+        with FastaIterator(fasta) as sequences_db:
+            sequences = [sequences_db.seq_index[seq_id].seq for seq_id in sequences_db.seq_index]
+            new_time, new_peak, new_res = bench(sequences_db._check_seq_alphabet_compliance, sequences)
+            old_time, old_peak, old_res = bench(legacy_check_seq_alphabet_compliance, sequences)
+            # the raw records are read from the file at each check
+            raw_time, raw_peak, raw_res = bench(sequences_db.checked_seq_len, list(sequences_db.seq_index))
+    assert new_res == old_res
+    assert [seq_len is not None for seq_len in raw_res] == old_res
+    mb = args.replicons * args.length / 1e6
+    print("check of {} replicons of {} bp".format(args.replicons, args.length))
+    for name, elapsed, peak in (("previous implementation", old_time, old_peak),
+                                ("current implementation", new_time, new_peak),
+                                ("read + check raw record", raw_time, raw_peak)):
+        print("{:<24} {:8.3f} s {:8.1f} Mb/s  peak memory {:8.1f} Mb".format(name, elapsed, mb / elapsed,
+                                                                             peak / 1e6))
+    print("speedup: {:.1f}x".format(old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmark of the start up time of integron_finder, based on ``python -X importtime``.
+It reports the time to import the integron_finder script and the slowest modules it imports,
+and exits with status 1 if the import of the script is over the budget.
+
+usage::
+
+    python benchmarks/bench_import.py [--runs 5] [--top 15] [--budget 500]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from tests.test_import_time import import_times
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help="the number of interpreters started by scenario")
+    parser.add_argument('--top', type=int, default=15, help="the number of slowest modules to report")
+    # without the heavy modules (pandas, numpy, Bio, matplotlib) the import takes about 100 ms,
+    # with them more than 1 s
+    parser.add_argument('--budget', type=float, default=500.,
+                        help="the budget in ms to import the integron_finder script (default 500)")
+    args = parser.parse_args(args)
+
+    scenarios = [('import finder', "import integron_finder.scripts.finder"),
+                 ('parse_args', "from integron_finder.scripts.finder import parse_args; parse_args(['replicon'])"),
+                 ('pipeline modules', "import integron_finder.scripts.finder; import integron_finder.integron; "
+                                      "import integron_finder.annotation; import integron_finder.results"),
+                 ]
+    for name, code in scenarios:
+        runs = [import_times(code) for _ in range(args.runs)]
+        best = min(runs, key=lambda t: sum(self_t for self_t, _ in t.values()))
+        total = sum(self_t for self_t, _ in best.values())
+        print("{:<20} {:>8.1f} ms  ({} modules)".format(name, total / 1000, len(best)))
+
+    print("\nslowest modules for 'import finder' (self time):")
+    best = import_times(scenarios[0][1])
+    for mod, (self_t, cumul) in sorted(best.items(), key=lambda i: i[1][0], reverse=True)[:args.top]:
+        print("  {:<50} {:>8.1f} ms  (cumulative {:.1f} ms)".format(mod, self_t / 1000, cumul / 1000))
+
+    # take the best run to not depend on the load of the machine
+    finder_time = min(import_times(scenarios[0][1])['integron_finder.scripts.finder'][1]
+                      for _ in range(args.runs)) / 1000
+    status = 'over' if finder_time > args.budget else 'within'
+    print("\nimport of integron_finder.scripts.finder: {:.1f} ms, {} the budget of {:.1f} ms".format(
+          finder_time, status, args.budget))
+    return 1 if finder_time > args.budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmark of :func:`integron_finder.infernal.read_infernal` on a large synthetic cmsearch tabulated output,
+compared to the previous implementation (python engine of pandas and apply on each row).
+
+usage::
+
+    python benchmarks/bench_read_infernal.py [--hits 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pandas.testing as pdt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from integron_finder.infernal import read_infernal
+
+
+def legacy_read_infernal(infile, replicon_id, len_model_attc,
+                         evalue=1, size_max_attc=200, size_min_attc=40):
+    """The implementation of read_infernal before the vectorized rewrite, used as reference."""
+    dtype = {"Accession_number": "str",
+             "cm_attC": "str",
+             "cm_debut": "int",
+             "cm_fin": "int",
+             "pos_beg": "int",
+             "pos_end": "int",
+             "evalue": "float",
+           }
+    try:
+        _ = pd.read_csv(infile, comment="#", sep="\t")
+    except Exception:
+        df = pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
+                                   "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+        return df.astype(dtype)
+
+    df = pd.read_csv(infile, sep=r"\s+", engine="python", header=None,
+                     skipfooter=10, skiprows=2, usecols=[2, 5, 6, 7, 8, 9, 15])
+    df.columns = ["cm_attC", "cm_debut", "cm_fin", "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"]
+    df["Accession_number"] = replicon_id
+    df = df[df.evalue < evalue]
+    df = df[(abs(df.pos_end_tmp - df.pos_beg_tmp) < size_max_attc) &
+            (size_min_attc < abs(df.pos_end_tmp - df.pos_beg_tmp))]
+    if not df.empty:
+        df.sort_values(['pos_end_tmp', 'evalue'], inplace=True)
+        df.index = list(range(0, len(df)))
+        idx = (df.pos_beg_tmp > df.pos_end_tmp)
+        df.loc[idx, "pos_beg"] = df.loc[idx].apply(lambda x: x["pos_end_tmp"] - (len_model_attc - x["cm_fin"]), axis=1)
+        df.loc[idx, "pos_end"] = df.loc[idx].apply(lambda x: x["pos_beg_tmp"] + (x["cm_debut"] - 1), axis=1)
+        df.loc[~idx, "pos_end"] = df.loc[~idx].apply(lambda x: x["pos_end_tmp"] + (len_model_attc - x["cm_fin"]), axis=1)
+        df.loc[~idx, "pos_beg"] = df.loc[~idx].apply(lambda x: x["pos_beg_tmp"] - (x["cm_debut"] - 1), axis=1)
+        df = df[["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]]
+    else:
+        df = pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
+                                   "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+    return df.astype(dtype)
+
+
+def write_tblout(path, hits_nb, len_model=47, seed=0):
+    """
+    Write a cmsearch tabulated output with hits_nb hits spread on a 10 Mb contig,
+    on both strands with partial model matches and E-values between 1e-10 and 10.
+    """
+    rand = random.Random(seed)
+    with open(path, 'w') as tblout:
+        tblout.write("#target name         accession query name           accession mdl mdl from   mdl to "
+                     "seq from   seq to strand trunc pass   gc  bias  score   E-value inc description of target\n")
+        tblout.write("#------------------- --------- -------------------- --------- --- -------- -------- "
+                     "-------- -------- ------ ----- ---- ---- ----- ------ --------- --- ---------------------\n")
+        for _ in range(hits_nb):
+            mdl_from = rand.randint(1, 5)
+            mdl_to = rand.randint(len_model - 5, len_model)
+            beg = rand.randint(1, 10000000)
+            end = beg + rand.randint(20, 250)
+            strand = rand.choice('+-')
+            if strand == '-':
+                beg, end = end, beg
+            evalue = 10 ** rand.uniform(-10, 1)
+            description = ' '.join(['word'] * rand.randint(0, 6)) or '-'
+            tblout.write("contig_1             -         attC_4               -          cm {:>8} {:>8} {:>8} {:>8}"
+                         "      {}    no    1 0.55   0.0   16.7 {:>9.2g} ?   {}\n".format(mdl_from, mdl_to,
+                                                                                      beg, end, strand,
+                                                                                      evalue, description))
+        tblout.write("#\n")
+        for line in ("Program:         cmsearch", "Version:         1.1.2 (July 2016)",
+                     "Pipeline mode:   SEARCH", "Query file:      attc_4.cm", "Target file:     contig_1.fst",
+                     "Option settings: cmsearch -E 10 attc_4.cm contig_1.fst", "Current dir:     .",
+                     "Date:            Mon Mar  5 14:38:01 2018", "[ok]"):
+            tblout.write("# {}\n".format(line))
+
+
+def bench(func, *args, repeat=3, **kwargs):
+    """
+    :return: the best wall time of repeat calls and the result of the last call
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hits', type=int, default=50000, help='the number of hits in the tblout (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of runs of each implementation')
+    args = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tblout = os.path.join(tmp_dir, 'contig_1_attc_table.res')
+        write_tblout(tblout, args.hits)
+        new_time, new_df = bench(read_infernal, tblout, 'contig_1', 47, evalue=10, repeat=args.repeat)
+        old_time, old_df = bench(legacy_read_infernal, tblout, 'contig_1', 47, evalue=10, repeat=args.repeat)
+    pdt.assert_frame_equal(old_df, new_df)
+    print("read_infernal on {} hits ({} kept)".format(args.hits, len(new_df)))
+    print("previous implementation: {:.3f} s".format(old_time))
+    print("current implementation:  {:.3f} s".format(new_time))
+    print("speedup: {:.1f}x".format(old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Run the micro benchmarks of benchmarks/suite in the current environment, without asv,
+on the integron_finder of this source tree.
+The setup of a benchmark is run before each timed call and the best time of the repeated calls is reported.
+The times can be saved and compared to the times saved before a change to spot the regressions,
+the ratio is the saved time divided by the current one (above 1 the current code is faster).
+
+usage::
+
+    python benchmarks/run_suite.py [--scales 1 10 100 1000] [--bench find_integron] [--repeat 3]
+                                   [--save before.json] [--compare before.json]
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+import suite
+
+
+def benchmarks(pattern=None):
+    """
+    :param str pattern: keep only the benchmarks with pattern in their name
+    :return: the benchmark classes of the suite and the names of their timed methods
+    :rtype: generator of tuple (str benchmark class name, class, list of str method names)
+    """
+    for module_info in pkgutil.iter_modules(suite.__path__):
+        module = importlib.import_module('suite.' + module_info.name)
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            methods = [name for name, _ in inspect.getmembers(cls, inspect.isfunction)
+                       if name.startswith('time_')]
+            name = '{}.{}'.format(module_info.name, cls_name)
+            if pattern:
+                methods = [meth for meth in methods if pattern in '{}.{}'.format(name, meth)]
+            if methods:
+                yield name, cls, methods
+
+
+def bench(cls, method, params, repeat=3):
+    """
+    :return: the best wall time of repeat calls, the setup is run before each call
+    :rtype: float
+    """
+    best = None
+    for _ in range(repeat):
+        instance = cls()
+        if hasattr(instance, 'setup'):
+            instance.setup(*params)
+        start = time.perf_counter()
+        getattr(instance, method)(*params)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+',
+                        help='the scales of the synthetic inputs to run (default: the scales of the suite)')
+    parser.add_argument('--bench', help='run only the benchmarks with this string in their name')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of runs of each benchmark')
+    parser.add_argument('--save', help='save the times in this json file')
+    parser.add_argument('--compare', help='compare the times to the ones saved in this json file')
+    args = parser.parse_args(args)
+    # the deprecation warnings of the dependencies are not what is measured here
+    warnings.simplefilter('ignore', FutureWarning)
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as saved:
+            previous = json.load(saved)
+    times = {}
+    print("{:<55} {:>6} {:>10} {:>10} {:>8}".format('benchmark', 'scale', 'time (s)', 'saved (s)', 'ratio'))
+    for name, cls, methods in benchmarks(args.bench):
+        scales = getattr(cls, 'params', None)
+        if scales is None:
+            runs = [((), '-')]
+        else:
+            runs = [((scale,), scale) for scale in scales if args.scales is None or scale in args.scales]
+        for method in methods:
+            for params, scale in runs:
+                key = '{}.{}({})'.format(name, method, scale)
+                times[key] = bench(cls, method, params, repeat=args.repeat)
+                if key in previous:
+                    saved = "{:>10.4f} {:>7.2f}x".format(previous[key], previous[key] / times[key])
+                else:
+                    saved = "{:>10} {:>8}".format('-', '-')
+                print("{:<55} {:>6} {:>10.4f} {}".format('{}.{}'.format(name, method), scale, times[key], saved),
+                      flush=True)
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump(times, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
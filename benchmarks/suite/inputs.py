@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+The inputs of the benchmarks: the outputs of prodigal, cmsearch and hmmsearch recorded for the replicon
+ACBA.007.P01_13 in tests/data, and synthetic inputs built by tiling them ``scale`` times
+so the python layer can be measured on larger replicons without infernal nor hmmer installed.
+"""
+
+import argparse
+import atexit
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+from Bio import SeqIO
+
+from integron_finder.config import Config
+from integron_finder.hmm import _text_hits, domtblout_path
+from integron_finder.integron import find_integron
+from integron_finder.prot_db import ProdigalDB
+from integron_finder.topology import Topology
+from integron_finder.utils import FastaIterator
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'tests', 'data'))
+
+REPLICON_ID = 'ACBA.007.P01_13'
+REPLICON_PATH = os.path.join(DATA_DIR, 'Replicons', 'acba.007.p01.13.fst')
+RESULTS_DIR = os.path.join(DATA_DIR, 'Results_Integron_Finder_acba.007.p01.13', 'tmp_{}'.format(REPLICON_ID))
+PROT_PATH = os.path.join(RESULTS_DIR, '{}.prt'.format(REPLICON_ID))
+ATTC_TABLE_PATH = os.path.join(RESULTS_DIR, '{}_attc_table.res'.format(REPLICON_ID))
+INTI_PATH = os.path.join(RESULTS_DIR, '{}_intI.res'.format(REPLICON_ID))
+PHAGE_INT_PATH = os.path.join(RESULTS_DIR, '{}_phage_int.res'.format(REPLICON_ID))
+
+"""The scales of the synthetic inputs (the number of copies of the recorded replicon)"""
+SCALES = [1, 10, 100, 1000]
+
+"""The paths of the inputs of one replicon"""
+Inputs = namedtuple('Inputs', ('replicon', 'prot', 'attc_table', 'intI', 'phage_int'))
+
+"""The inputs recorded in tests/data, the hmmsearch outputs are in text format"""
+RECORDED = Inputs(REPLICON_PATH, PROT_PATH, ATTC_TABLE_PATH, INTI_PATH, PHAGE_INT_PATH)
+
+_work_dir = None
+_inputs = {}
+_analyses = {}
+
+
+def work_dir():
+    """
+    :return: the directory where the synthetic inputs are written,
+             it is created at the first call and removed at exit.
+    :rtype: str
+    """
+    global _work_dir
+    if _work_dir is None:
+        _work_dir = tempfile.mkdtemp(prefix='integron_finder_bench_')
+        atexit.register(shutil.rmtree, _work_dir, True)
+    return _work_dir
+
+
+def config(**opts):
+    """
+    :param opts: the options which differ from the default values of integron_finder
+    :return: a configuration to analyse the recorded replicon (or its synthetic copies)
+             with the default search options
+    :rtype: :class:`integron_finder.config.Config` object
+    """
+    args = argparse.Namespace()
+    args.keep_palindromes = False
+    args.distance_threshold = 4000
+    args.attc_model = 'attc_4.cm'
+    args.evalue_attc = 1.0
+    args.max_attc_size = 200
+    args.min_attc_size = 40
+    args.calin_threshold = 2
+    args.local_max = False
+    args.no_proteins = False
+    args.union_integrases = False
+    for opt, value in opts.items():
+        setattr(args, opt, value)
+    return Config(args)
+
+
+def _tile_replicon(scale, path):
+    record = SeqIO.read(REPLICON_PATH, 'fasta')
+    record.seq = record.seq * scale
+    with open(path, 'w') as out:
+        SeqIO.write(record, out, 'fasta')
+    return len(record.seq) // scale
+
+
+def _tile_proteins(scale, replicon_len, path):
+    """
+    Write the prodigal proteins of each copy of the replicon.
+    The proteins of the copy i are numbered after those of the copy i - 1.
+
+    :return: the new ids of the proteins of each copy and the length of the proteins
+    :rtype: tuple (list of dict {str old id: str new id}, dict {str old id: int length})
+    """
+    proteins = list(SeqIO.parse(PROT_PATH, 'fasta'))
+    prot_len = {prot.id: len(prot.seq) for prot in proteins}
+    new_ids = []
+    with open(path, 'w') as out:
+        for copy in range(scale):
+            offset = copy * replicon_len
+            copy_ids = {}
+            for num, prot in enumerate(proteins, copy * len(proteins) + 1):
+                new_id = '{}_{}'.format(REPLICON_ID, num)
+                copy_ids[prot.id] = new_id
+                # the prodigal description: id # start # end # strand # infos
+                _, start, end, strand, infos = prot.description.split(' # ')
+                out.write('>{} # {} # {} # {} # {}\n{}\n'.format(new_id, int(start) + offset, int(end) + offset,
+                                                                 strand, infos, prot.seq))
+            new_ids.append(copy_ids)
+    return new_ids, prot_len
+
+
+def _tile_attc_table(scale, replicon_len, path):
+    with open(ATTC_TABLE_PATH) as recorded:
+        hits = [line.split(None, 16) for line in recorded if not line.startswith('#')]
+    with open(path, 'w') as out:
+        for copy in range(scale):
+            offset = copy * replicon_len
+            for fields in hits:
+                fields = list(fields)
+                # seq from and seq to
+                fields[7] = str(int(fields[7]) + offset)
+                fields[8] = str(int(fields[8]) + offset)
+                out.write(' '.join(fields))
+
+
+def _tile_hmm(recorded, new_ids, prot_len, path):
+    """
+    Write the hits of the recorded hmmsearch output on each copy of the replicon
+    in the domain tabulated format (see :func:`integron_finder.hmm.domtblout_path`).
+    """
+    hits = list(_text_hits(recorded))
+    with open(domtblout_path(path), 'w') as out:
+        for copy_ids in new_ids:
+            for query, id_query, len_profile, id_prot, domains in hits:
+                for dom_nb, (evalue, hmmfrom, hmmto, alifrom, alito) in enumerate(domains, 1):
+                    out.write(' '.join(str(f) for f in (copy_ids[id_prot], '-', prot_len[id_prot],
+                                                        query, id_query, len_profile,
+                                                        evalue, 0., 0., dom_nb, len(domains), evalue, evalue, 0., 0.,
+                                                        hmmfrom, hmmto, alifrom, alito, alifrom, alito, 1., '-')))
+                    out.write('\n')
+
+
+def replicon_inputs(scale):
+    """
+    :param int scale: the number of copies of the recorded replicon
+    :return: the paths of the synthetic inputs of a replicon made of scale copies of the recorded one.
+             The synthetic hmmsearch outputs are in the domain tabulated format,
+             so the inputs at scale 1 are not exactly :data:`RECORDED`.
+    :rtype: :class:`Inputs` object
+    """
+    if scale not in _inputs:
+        out_dir = os.path.join(work_dir(), 'x{}'.format(scale))
+        os.makedirs(out_dir)
+        inputs = Inputs(*[os.path.join(out_dir, REPLICON_ID + suffix) for suffix in
+                          ('.fst', '.prt', '_attc_table.res', '_intI.res', '_phage_int.res')])
+        replicon_len = _tile_replicon(scale, inputs.replicon)
+        new_ids, prot_len = _tile_proteins(scale, replicon_len, inputs.prot)
+        _tile_attc_table(scale, replicon_len, inputs.attc_table)
+        _tile_hmm(INTI_PATH, new_ids, prot_len, inputs.intI)
+        _tile_hmm(PHAGE_INT_PATH, new_ids, prot_len, inputs.phage_int)
+        _inputs[scale] = inputs
+    return _inputs[scale]
+
+
+def multi_fasta(replicons_nb):
+    """
+    :param int replicons_nb: the number of replicons
+    :return: the path of a fasta file with replicons_nb copies of the recorded replicon, each with its own id
+    :rtype: str
+    """
+    path = os.path.join(work_dir(), 'replicons_{}.fst'.format(replicons_nb))
+    if not os.path.exists(path):
+        record = SeqIO.read(REPLICON_PATH, 'fasta')
+        with open(path, 'w') as out:
+            for num in range(replicons_nb):
+                record.id = '{}_{}'.format(REPLICON_ID, num)
+                SeqIO.write(record, out, 'fasta')
+    return path
+
+
+def load_replicon(inputs, cfg):
+    """
+    :param inputs: the inputs of the replicon
+    :type inputs: :class:`Inputs` object
+    :param cfg: the configuration
+    :type cfg: :class:`integron_finder.config.Config` object
+    :return: the replicon, considered as linear, and its protein database
+    :rtype: tuple (:class:`Bio.SeqRecord` object, :class:`integron_finder.prot_db.ProdigalDB` object)
+    """
+    with FastaIterator(inputs.replicon) as sequences_db:
+        sequences_db.topologies = Topology('lin')
+        replicon = next(sequences_db)
+    return replicon, ProdigalDB(replicon, cfg, prot_file=inputs.prot)
+
+
+def analysed_replicon(scale):
+    """
+    Search the integrons on the synthetic replicon as integron_finder does with the default options,
+    the proteins are added to the complete integrons and CALIN elements.
+
+    :param int scale: the number of copies of the recorded replicon
+    :return: the replicon, its protein database and the integrons found on it
+    :rtype: tuple (:class:`Bio.SeqRecord` object, :class:`integron_finder.prot_db.ProdigalDB` object,
+            list of :class:`integron_finder.integron.Integron` objects)
+    """
+    if scale not in _analyses:
+        cfg = config()
+        inputs = replicon_inputs(scale)
+        replicon, prot_db = load_replicon(inputs, cfg)
+        integrons = find_integron(replicon, prot_db, inputs.attc_table, inputs.intI, inputs.phage_int, cfg)
+        for integron in integrons:
+            if integron.type() != 'In0':
+                integron.add_proteins(prot_db)
+        _analyses[scale] = replicon, prot_db, integrons
+    return _analyses[scale]
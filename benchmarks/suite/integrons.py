@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmarks of the search of the integrons and of the building of the :class:`integron_finder.integron.Integron`.
+"""
+
+from integron_finder.attc import search_attc
+from integron_finder.infernal import read_infernal
+from integron_finder.integron import Integron, find_integron
+
+from .inputs import SCALES, config, load_replicon, replicon_inputs, analysed_replicon
+
+
+class SearchAttc:
+    """:func:`integron_finder.attc.search_attc` on the attC sites of the replicon"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.cfg = config()
+        inputs = replicon_inputs(scale)
+        self.replicon, _ = load_replicon(inputs, self.cfg)
+        self.attc = read_infernal(inputs.attc_table, self.replicon.id, self.cfg.model_len)
+
+    def time_search_attc(self, scale):
+        search_attc(self.attc, self.cfg.keep_palindromes, self.cfg.distance_threshold, len(self.replicon))
+
+
+class FindIntegron:
+    """:func:`integron_finder.integron.find_integron`, parsing of the cmsearch and hmmsearch outputs included"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.cfg = config()
+        self.inputs = replicon_inputs(scale)
+        self.replicon, self.prot_db = load_replicon(self.inputs, self.cfg)
+
+    def time_find_integron(self, scale):
+        find_integron(self.replicon, self.prot_db, self.inputs.attc_table, self.inputs.intI, self.inputs.phage_int,
+                      self.cfg)
+
+
+class IntegronElements:
+    """
+    The methods of :class:`integron_finder.integron.Integron` called on all the integrons of the replicon,
+    or with all the attC sites of the replicon for :meth:`add_attC`.
+    """
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.replicon, self.prot_db, self.integrons = analysed_replicon(scale)
+        self.cfg = self.integrons[0].cfg
+        self.attc = read_infernal(replicon_inputs(scale).attc_table, self.replicon.id, self.cfg.model_len)
+
+    def time_add_attC(self, scale):
+        integron = Integron(self.replicon, self.cfg)
+        for attc in self.attc.itertuples():
+            integron.add_attC(attc.pos_beg, attc.pos_end, 1 if attc.sens == '+' else -1,
+                              attc.evalue, self.cfg.model_attc_name)
+
+    def time_add_proteins(self, scale):
+        for integron in self.integrons:
+            if integron.type() != 'In0':
+                integron.add_proteins(self.prot_db)
+
+    def time_describe(self, scale):
+        for integron in self.integrons:
+            integron.describe()
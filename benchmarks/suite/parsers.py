@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmarks of the parsing of the replicons and of the outputs of cmsearch and hmmsearch.
+"""
+
+from integron_finder.hmm import read_hmm
+from integron_finder.infernal import read_infernal
+from integron_finder.utils import FastaIterator
+
+from .inputs import SCALES, RECORDED, REPLICON_ID, config, load_replicon, replicon_inputs, multi_fasta
+
+
+class ReadInfernal:
+    """:func:`integron_finder.infernal.read_infernal` on the cmsearch tabulated output"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.attc_table = replicon_inputs(scale).attc_table
+        self.model_len = config().model_len
+
+    def time_read_infernal(self, scale):
+        read_infernal(self.attc_table, REPLICON_ID, self.model_len)
+
+
+class ReadHmm:
+    """:func:`integron_finder.hmm.read_hmm` on the hmmsearch domain tabulated outputs"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.cfg = config()
+        self.inputs = replicon_inputs(scale)
+        self.replicon, self.prot_db = load_replicon(self.inputs, self.cfg)
+
+    def time_read_hmm_intI(self, scale):
+        read_hmm(self.replicon.id, self.prot_db, self.inputs.intI, self.cfg)
+
+    def time_read_hmm_phage_int(self, scale):
+        read_hmm(self.replicon.id, self.prot_db, self.inputs.phage_int, self.cfg)
+
+
+class ReadHmmText:
+    """:func:`integron_finder.hmm.read_hmm` on the hmmsearch text outputs recorded in tests/data"""
+
+    def setup(self):
+        self.cfg = config()
+        self.replicon, self.prot_db = load_replicon(RECORDED, self.cfg)
+
+    def time_read_hmm_intI(self):
+        read_hmm(self.replicon.id, self.prot_db, RECORDED.intI, self.cfg)
+
+    def time_read_hmm_phage_int(self):
+        read_hmm(self.replicon.id, self.prot_db, RECORDED.phage_int, self.cfg)
+
+
+class ReadReplicons:
+    """
+    :class:`integron_finder.utils.FastaIterator` on a file with scale replicons
+    and on one replicon scale times longer than the recorded one
+    """
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.multi_fasta = multi_fasta(scale)
+        self.long_replicon = replicon_inputs(scale).replicon
+
+    def time_fasta_iterator_replicons(self, scale):
+        with FastaIterator(self.multi_fasta) as sequences_db:
+            for _ in sequences_db:
+                pass
+
+    def time_fasta_iterator_long_replicon(self, scale):
+        with FastaIterator(self.long_replicon) as sequences_db:
+            for _ in sequences_db:
+                pass
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Benchmarks of the building of the reports and of the annotations of the replicons.
+"""
+
+import os
+
+from integron_finder.annotation import add_feature
+from integron_finder.results import integrons_report, merge_results, summary
+
+from .inputs import SCALES, analysed_replicon, work_dir
+
+
+class IntegronsReport:
+    """:func:`integron_finder.results.integrons_report` of all the integrons of the replicon"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        _, _, self.integrons = analysed_replicon(scale)
+
+    def time_integrons_report(self, scale):
+        integrons_report(self.integrons)
+
+
+class MergeResults:
+    """:func:`integron_finder.results.merge_results` of the results of scale replicons"""
+
+    params = SCALES
+    param_names = ['scale']
+
+    def setup(self, scale):
+        _, _, integrons = analysed_replicon(1)
+        report = integrons_report(integrons)
+        out_dir = os.path.join(work_dir(), 'merge_{}'.format(scale))
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+            for num in range(scale):
+                report['ID_replicon'] = 'replicon_{}'.format(num)
+                report.to_csv(os.path.join(out_dir, 'replicon_{}.integrons'.format(num)), sep='\t', index=False)
+                summary(report).to_csv(os.path.join(out_dir, 'replicon_{}.summary'.format(num)), sep='\t')
+        self.integrons_files = [os.path.join(out_dir, 'replicon_{}.integrons'.format(num)) for num in range(scale)]
+        self.summary_files = [os.path.join(out_dir, 'replicon_{}.summary'.format(num)) for num in range(scale)]
+
+    def time_merge_integrons(self, scale):
+        merge_results(*self.integrons_files)
+
+    def time_merge_summaries(self, scale):
+        merge_results(*self.summary_files)
+
+
+class AddFeature:
+    """:func:`integron_finder.annotation.add_feature` of all the integrons of the replicon"""
+
+    params = SCALES
+    param_names = ['scale']
+    # add_feature adds the features to the replicon, the setup must be run before each call
+    number = 1
+
+    def setup(self, scale):
+        self.replicon, self.prot_db, integrons = analysed_replicon(scale)
+        self.replicon.features = []
+        self.report = integrons_report(integrons)
+        self.dist_threshold = integrons[0].cfg.distance_threshold
+
+    def time_add_feature(self, scale):
+        add_feature(self.replicon, self.report, self.prot_db, self.dist_threshold)
@@ -36,7 +36,8 @@ from Bio import SeqFeature
 from Bio import SeqIO
 
 from .utils import get_name_from_path
-from .hmm import read_hmm
+from .hmm import HmmBank, read_hmm, reported_hits, domtblout_path
+from . import timing
 
 _log = colorlog.getLogger(__name__)
 
@@ -46,14 +47,23 @@ def func_annot(integrons, replicon, prot_db, hmm_files, cfg, out_dir='.', evalue
     | Call hmmmer to annotate CDS associated with the integron.
     | Use Resfams per default (Gibson et al, ISME J.,  2014)
 
+    The proteins of all integrons of the replicon are searched together, with one hmmsearch per hmm file,
+    and the hits are dispatched to the integrons afterwards.
+    To get the same results as a search restricted to the proteins of each integron,
+    the hmmsearch is run with *-Z* set to the size of the protein database and with *--domZ 1*.
+    Then the i-evalue of the domains are rescaled, for each integron, by the number of proteins of this integron
+    reported for the profile (the default domZ of hmmsearch).
+    The banks with a lot of profiles compared to the proteins to annotate are searched with hmmscan instead,
+    with the same options (see :meth:`integron_finder.hmm.HmmBank.program`).
+
     :param integrons: integrons list to annotate
     :type integrons: list of :class:`integron_finder.integron.Integron` objects.
     :param replicon: replicon where the integrons were found (genomic fasta file)
     :type replicon: :class:`Bio.Seq.SeqRecord` object
     :param prot_db: the protein database corresponding to the replicon translation
     :type prot_db: :class:`integron.prot_db.ProteinDB` object.
-    :param hmm_files: List of path of hmm profiles to use to scan the prot_file
-    :type hmm_files: List[str]
+    :param hmm_files: List of path of hmm profiles, or of banks, to use to scan the prot_file
+    :type hmm_files: List[str] or List[:class:`integron_finder.hmm.HmmBank`]
     :param cfg: the configuration for this analyse
     :type cfg: :class:`integron_finder.config.Config`
     :param str out_dir: the path of the directory where to store the results
@@ -63,59 +73,106 @@ def func_annot(integrons, replicon, prot_db, hmm_files, cfg, out_dir='.', evalue
 
              But several files per hmm file are produced.
 
-             * subseqprot.tmp: fasta file containing a subset of protfile (the proteins belonging to the integron)
+             * subseqprot.tmp: fasta file containing a subset of protfile (the proteins belonging to the integrons)
              * <hmm>_fa.res: an output of the hmm search.
              * <hmm>_fa_table.res: an output of the hmm search in tabulated format.
 
     """
 
     prot_tmp = os.path.join(out_dir, replicon.id + "_subseqprot.tmp")
+    if os.path.isfile(prot_tmp):
+        os.remove(prot_tmp)
+
+    integrons = [integron for integron in integrons if integron.type() != "In0" and not integron.proteins.empty]
+    if not integrons:
+        return
 
+    prot_ids = set()
     for integron in integrons:
-        if os.path.isfile(prot_tmp):
-            os.remove(prot_tmp)
-
-        if integron.type() != "In0" and not integron.proteins.empty:
-
-            func_annotate_res = pd.DataFrame(columns=["Accession_number",
-                                                      "query_name", "ID_query",
-                                                      "ID_prot", "strand",
-                                                      "pos_beg", "pos_end", "evalue"])
-
-            prot_to_annotate = []
-            for prot_nb, prot_id in enumerate(prot_db, 1):
-                if prot_id in integron.proteins.index:
-                    prot_to_annotate.append(prot_db[prot_id])
-
-            SeqIO.write(prot_to_annotate, prot_tmp, "fasta")
-            for hmm in hmm_files:
-                name_wo_ext = "{}_{}".format(replicon.id, get_name_from_path(hmm))
-                hmm_out = os.path.join(out_dir, "{}_fa.res".format(name_wo_ext))
-                hmm_tableout = os.path.join(out_dir, "{}_fa_table.res".format(name_wo_ext))
-                hmm_cmd = [cfg.hmmsearch,
-                           "-Z", str(prot_nb),
-                           "--cpu", str(cfg.cpu),
-                           "--tblout", hmm_tableout,
-                           "-o", hmm_out,
-                           hmm,
-                           prot_tmp]
-
-                try:
-                    _log.debug("run hmmsearch: {}".format(' '.join(hmm_cmd)))
-                    returncode = call(hmm_cmd)
-                except Exception as err:
-                    raise RuntimeError("{0} failed : {1}".format(' '.join(hmm_cmd), err))
-                if returncode != 0:
-                    raise RuntimeError("{0} failed return code = {1}".format(' '.join(hmm_cmd), returncode))
-                hmm_in = read_hmm(replicon.id, prot_db, hmm_out, cfg, evalue=evalue, coverage=coverage
-                                  ).sort_values("evalue").drop_duplicates(subset="ID_prot")
-                func_annotate_res = pd.concat([func_annotate_res, hmm_in])
-            func_annotate_res = func_annotate_res.sort_values("evalue").drop_duplicates(subset="ID_prot")
-
-            integron.proteins.loc[func_annotate_res.ID_prot, "evalue"] = func_annotate_res.evalue.values
-            integron.proteins.loc[func_annotate_res.ID_prot, "annotation"] = func_annotate_res.query_name.values
-            integron.proteins.loc[func_annotate_res.ID_prot, "model"] = func_annotate_res.ID_query.values
-            integron.proteins = integron.proteins.astype(dtype=integron.dtype)
+        prot_ids.update(integron.proteins.index)
+    prot_to_annotate = []
+    for prot_nb, prot_id in enumerate(prot_db, 1):
+        if prot_id in prot_ids:
+            prot_to_annotate.append(prot_db[prot_id])
+    SeqIO.write(prot_to_annotate, prot_tmp, "fasta")
+
+    hmm_results = []
+    for bank in hmm_files:
+        if not isinstance(bank, HmmBank):
+            bank = HmmBank(bank)
+        program = bank.program(len(prot_to_annotate), cfg)
+        name_wo_ext = "{}_{}".format(replicon.id, get_name_from_path(bank.path))
+        hmm_out = os.path.join(out_dir, "{}_fa.res".format(name_wo_ext))
+        hmm_tableout = os.path.join(out_dir, "{}_fa_table.res".format(name_wo_ext))
+        # with hmmscan -Z is the number of profiles by default,
+        # it is set to the number of proteins to get the same evalues as with hmmsearch
+        hmm_cmd = [cfg.hmmscan if program == 'hmmscan' else cfg.hmmsearch,
+                   "-Z", str(prot_nb),
+                   "--domZ", "1",
+                   "--cpu", str(cfg.cpu),
+                   "--tblout", hmm_tableout,
+                   "--domtblout", domtblout_path(hmm_out),
+                   "-o", hmm_out,
+                   bank.path,
+                   prot_tmp]
+
+        try:
+            _log.debug("run {}: {}".format(program, ' '.join(hmm_cmd)))
+            with timing.stage('{}_func_annot'.format(program)):
+                returncode = call(hmm_cmd)
+        except Exception as err:
+            raise RuntimeError("{0} failed : {1}".format(' '.join(hmm_cmd), err))
+        if returncode != 0:
+            raise RuntimeError("{0} failed return code = {1}".format(' '.join(hmm_cmd), returncode))
+        scan = program == 'hmmscan'
+        # the evalue and the domain reporting threshold depend on the integron, they are applied below
+        hmm_in = read_hmm(replicon.id, prot_db, hmm_out, cfg, evalue=np.inf, coverage=coverage, scan=scan)
+        hmm_results.append((hmm_in, reported_hits(hmm_tableout, scan=scan)))
+
+    for integron in integrons:
+        func_annotate_res = pd.DataFrame(columns=["Accession_number",
+                                                  "query_name", "ID_query",
+                                                  "ID_prot", "strand",
+                                                  "pos_beg", "pos_end", "evalue"])
+        for hmm_in, reported in hmm_results:
+            hmm_in = _integron_hits(integron, hmm_in, reported, evalue)
+            hmm_in = hmm_in.sort_values("evalue").drop_duplicates(subset="ID_prot")
+            func_annotate_res = pd.concat([func_annotate_res, hmm_in])
+        func_annotate_res = func_annotate_res.sort_values("evalue").drop_duplicates(subset="ID_prot")
+
+        integron.proteins.loc[func_annotate_res.ID_prot, "evalue"] = func_annotate_res.evalue.values
+        integron.proteins.loc[func_annotate_res.ID_prot, "annotation"] = func_annotate_res.query_name.values
+        integron.proteins.loc[func_annotate_res.ID_prot, "model"] = func_annotate_res.ID_query.values
+        integron.proteins = integron.proteins.astype(dtype=integron.dtype)
+
+
+def _integron_hits(integron, hmm_in, reported, evalue, dom_evalue=10):
+    """
+    Select the hits of a pooled hmmsearch (run with *--domZ 1*) on the proteins of one integron
+    and compute their i-evalue as if the search was restricted to these proteins.
+
+    :param integron: the integron
+    :type integron: :class:`integron_finder.integron.Integron` object.
+    :param hmm_in: the hits of the pooled search as returned by :func:`integron_finder.hmm.read_hmm`
+    :type hmm_in: :class:`pandas.DataFrame`
+    :param reported: the sequences reported by the pooled search as returned by
+                     :func:`integron_finder.hmm.reported_hits`
+    :type reported: :class:`pandas.DataFrame`
+    :param float evalue: filter out hits with evalue greater than evalue.
+    :param float dom_evalue: the domain reporting threshold of hmmsearch (--domE)
+    :return: the hits on the integron proteins
+    :rtype: :class:`pandas.DataFrame`
+    """
+    # hmmsearch domZ is the number of sequences reported for the profile
+    in_integron = reported.ID_prot.isin(integron.proteins.index)
+    dom_z = reported[in_integron].groupby("query_name").size()
+    hmm_in = hmm_in[hmm_in.ID_prot.isin(integron.proteins.index)]
+    dom_z = hmm_in.query_name.map(dom_z).fillna(1).values
+    i_evalue = hmm_in.evalue.values * dom_z
+    # hmmer writes evalues with 2 significant digits
+    i_evalue = np.where(dom_z > 1, [float('{:.2g}'.format(e)) for e in i_evalue], hmm_in.evalue.values)
+    hmm_in = hmm_in.assign(evalue=i_evalue)
+    return hmm_in[(hmm_in.evalue <= dom_evalue) & (hmm_in.evalue < evalue)]
 
 
 def add_feature(replicon, integron_desc, prot_db, dist_threshold):
@@ -130,95 +187,52 @@ def add_feature(replicon, integron_desc, prot_db, dist_threshold):
     :type prot_db: a :class:`integron_finder.prot_db.ProteinDB` object.
     :param int dist_threshold: Two elements are aggregated if they are distant of dist_threshold or less.
     """
-    integron_desc = integron_desc.set_index("ID_integron").copy()
-    for i in integron_desc.index.unique():
-
-        if isinstance(integron_desc.loc[i], pd.Series):
-            type_integron = integron_desc.loc[i].type
-            start_integron = integron_desc.loc[i].pos_beg
-            end_integron = integron_desc.loc[i].pos_end
-            tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(int(start_integron) - 1, int(end_integron)),
-                                        strand=0,
-                                        type="integron",
-                                        qualifiers={"integron_id": i, "integron_type": type_integron}
-                                        )
-            replicon.features.append(tmp)
-            if integron_desc.loc[i].type_elt == "protein":
-
-                tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(int(integron_desc.loc[i].pos_beg) - 1,
-                                                                                int(integron_desc.loc[i].pos_end)),
-                                            strand=integron_desc.loc[i].strand,
-                                            type="CDS" if integron_desc.loc[i].annotation != "intI" else "integrase",
-                                            qualifiers={"protein_id": integron_desc.loc[i].element,
-                                                        "gene": integron_desc.loc[i].annotation,
-                                                        "model": integron_desc.loc[i].model}
-                                            )
-                tmp.qualifiers["translation"] = [prot_db[prt_id] for prt_id in prot_db
-                                                 if prt_id == integron_desc.loc[i].element][0].seq
-                replicon.features.append(tmp)
-
-            else:
-                tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(int(integron_desc.loc[i].pos_beg) - 1,
-                                                                                int(integron_desc.loc[i].pos_end)),
-                                            strand=integron_desc.loc[i].strand,
-                                            type=integron_desc.loc[i].type_elt,
-                                            qualifiers={integron_desc.loc[i].type_elt: integron_desc.loc[i].element,
-                                                        "model": integron_desc.loc[i].model}
-                                            )
-
-                replicon.features.append(tmp)
-
+    # the integrons in the order of their first element
+    for id_integron, elements in integron_desc.groupby("ID_integron", sort=False):
+        type_integron = elements.type.values[0]
+        pos_beg = elements.pos_beg.values
+        pos_end = elements.pos_end.values
+        # Should only be true if integron over edge of replicon:
+        over_edge = np.flatnonzero(np.diff(pos_beg) > dist_threshold)
+
+        if over_edge.size:
+            pos = over_edge[0] + 1
+            start_integron_1 = int(pos_beg[pos])
+            end_integron_1 = len(replicon)
+            start_integron_2 = 1
+            end_integron_2 = int(pos_end[pos-1])
+
+            f1 = SeqFeature.FeatureLocation(start_integron_1 - 1, end_integron_1)
+            f2 = SeqFeature.FeatureLocation(start_integron_2 - 1, end_integron_2)
+            location = f1 + f2
         else:
-            type_integron = integron_desc.loc[i].type.values[0]
-            # Should only be true if integron over edge of replicon:
-            diff = integron_desc.loc[i].pos_beg.diff() > dist_threshold
-
-            if diff.any():
-                pos = np.where(diff)[0][0]
-                start_integron_1 = int(integron_desc.loc[i].pos_beg.values[pos])
-                end_integron_1 = len(replicon)
-                start_integron_2 = 1
-                end_integron_2 = int(integron_desc.loc[i].pos_end.values[pos-1])
-
-                f1 = SeqFeature.FeatureLocation(start_integron_1 - 1, end_integron_1)
-                f2 = SeqFeature.FeatureLocation(start_integron_2 - 1, end_integron_2)
-                tmp = SeqFeature.SeqFeature(location=f1 + f2,
-                                            strand=0,
-                                            type="integron",
-                                            qualifiers={"integron_id": i, "integron_type": type_integron}
+            location = SeqFeature.FeatureLocation(int(pos_beg[0]) - 1, int(pos_end[-1]))
+        tmp = SeqFeature.SeqFeature(location=location,
+                                    strand=0,
+                                    type="integron",
+                                    qualifiers={"integron_id": id_integron, "integron_type": type_integron}
+                                    )
+        replicon.features.append(tmp)
+
+        for elt in elements.itertuples(index=False):
+            location = SeqFeature.FeatureLocation(int(elt.pos_beg) - 1, int(elt.pos_end))
+            if elt.type_elt == "protein":
+                tmp = SeqFeature.SeqFeature(location=location,
+                                            strand=elt.strand,
+                                            type="CDS" if elt.annotation != "intI" else "integrase",
+                                            qualifiers={"protein_id": elt.element,
+                                                        "gene": elt.annotation,
+                                                        "model": elt.model}
                                             )
+                # direct access, the proteome is not scanned for each protein
+                tmp.qualifiers["translation"] = prot_db[elt.element].seq
             else:
-                start_integron = int(integron_desc.loc[i].pos_beg.values[0])
-                end_integron = int(integron_desc.loc[i].pos_end.values[-1])
-
-                tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(start_integron - 1, end_integron),
-                                            strand=0,
-                                            type="integron",
-                                            qualifiers={"integron_id": i, "integron_type": type_integron}
+                tmp = SeqFeature.SeqFeature(location=location,
+                                            strand=elt.strand,
+                                            type=elt.type_elt,
+                                            qualifiers={elt.type_elt: elt.element, "model": elt.model}
                                             )
             replicon.features.append(tmp)
-            for r in integron_desc.loc[i].iterrows():
-                if r[1].type_elt == "protein":
-                    tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(int(r[1].pos_beg) - 1,
-                                                                                    int(r[1].pos_end)),
-                                                strand=r[1].strand,
-                                                type="CDS" if r[1].annotation != "intI" else "integrase",
-                                                qualifiers={"protein_id": r[1].element,
-                                                            "gene": r[1].annotation,
-                                                            "model": r[1].model}
-                                                )
-                    tmp.qualifiers["translation"] = [prot_db[prt_id] for prt_id in prot_db
-                                                     if prt_id == r[1].element][0].seq
-                    replicon.features.append(tmp)
-                else:
-                    tmp = SeqFeature.SeqFeature(location=SeqFeature.FeatureLocation(int(r[1].pos_beg) - 1,
-                                                                                    int(r[1].pos_end)),
-                                                strand=r[1].strand,
-                                                type=r[1].type_elt,
-                                                qualifiers={r[1].type_elt: r[1].element, "model": r[1].model}
-                                                )
-
-                    replicon.features.append(tmp)
 
     # We get a ValueError otherwise, eg:
     # ValueError: Locus identifier 'gi|00000000|gb|XX123456.2|' is too long
@@ -30,11 +30,110 @@ import colorlog
 import numpy as np
 import pandas as pd
 
-from .infernal import local_max, expand
+from .infernal import local_max, local_max_batch, expand_windows, run_window_search
 
 _log = colorlog.getLogger(__name__)
 
 
+def _attc_array_bounds(pos_beg, dist_threshold, replicon_size):
+    """
+    Cluster the attC hits of one strand in arrays.
+    A new array begins when the distance with the previous hit is greater than dist_threshold.
+    If the first and the last arrays are close across the origin of the replicon they are merged.
+
+    :param pos_beg: the beginning of the hits of one strand, in the order of the hit table
+    :type pos_beg: :class:`numpy.ndarray` of int
+    :param int dist_threshold: the maximal distance between 2 elements to aggregate them
+    :param int replicon_size: the replicon number of base pair
+    :return: the order of the hits such as the hits of each array are contiguous,
+             and the index (in this order) of the first hit of each array
+    :rtype: tuple of 2 :class:`numpy.ndarray` of int
+    """
+    hits_nb = len(pos_beg)
+    order = np.arange(hits_nb)
+    if not hits_nb:
+        return order, order.copy()
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(pos_beg) > dist_threshold) + 1))
+    if len(starts) > 1 and (pos_beg[0] - pos_beg[-1]) % replicon_size < dist_threshold:
+        # the last array continues across the origin in the first one
+        last = starts[-1]
+        order = np.concatenate((order[last:], order[:last]))
+        starts = np.concatenate(([0], starts[1:-1] + (hits_nb - last)))
+    return order, starts
+
+
+class AttcArrays:
+    """
+    The attC arrays of a replicon.
+    All the hits are stored in one table where the hits of each array are contiguous,
+    so an array is a range of rows of this table.
+    The DataFrame of an array is built only if it is asked.
+    """
+
+    def __init__(self, hits, starts):
+        """
+        :param hits: the attC hits, the hits of each array are contiguous
+        :type hits: :class:`pandas.DataFrame`
+        :param starts: the index of the first row of each array
+        :type starts: :class:`numpy.ndarray` of int
+        """
+        self.hits = hits
+        self.starts = starts
+        self.ends = np.append(starts[1:], len(hits)).astype(int)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def frame(self, idx):
+        """
+        :param int idx: the index of the array
+        :return: the hits of the array
+        :rtype: :class:`pandas.DataFrame`
+        """
+        return self.hits.iloc[self.starts[idx]:self.ends[idx]].reset_index(drop=True)
+
+    def frames(self):
+        """
+        :return: the hits of each array
+        :rtype: list of :class:`pandas.DataFrame` objects
+        """
+        return [self.frame(idx) for idx in range(len(self))]
+
+
+def attc_arrays(attc_df, keep_palindromes, dist_threshold, replicon_size):
+    """
+    Cluster the attc data set (sorted along start site) of the given replicon in arrays.
+    One array is composed of attC sites on the same strand and separated by a distance less than dist_threshold.
+    The arrays of the strand '+' come first, then the arrays of the strand '-'.
+
+    :param attc_df:
+    :type attc_df: :class:`pandas.DataFrame`
+    :param bool keep_palindromes: True if the palindromes must be kept in attc result, False otherwise
+    :param int dist_threshold: the maximal distance between 2 elements to aggregate them
+    :param int replicon_size: the replicon number of base pair
+    :return: the attC arrays found on replicon
+    :rtype: :class:`AttcArrays` object
+    """
+    if not keep_palindromes:
+        attc_df = attc_df.sort_values(["pos_beg", "evalue"]).drop_duplicates(subset=["pos_beg"])
+
+    sens = attc_df.sens.values
+    pos_beg = attc_df.pos_beg.values.astype(int)
+    order = []
+    starts = []
+    for rows in np.flatnonzero(sens == "+"), np.flatnonzero(sens == "-"):
+        strand_order, strand_starts = _attc_array_bounds(pos_beg[rows], dist_threshold, replicon_size)
+        starts.append(strand_starts + sum(len(o) for o in order))
+        order.append(rows[strand_order])
+    order = np.concatenate(order)
+
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
+    hits = attc_df[columns].iloc[order]
+    # convert positions to int, and evalue to float
+    hits = hits.astype({"cm_debut": int, "cm_fin": int, "pos_beg": int, "pos_end": int, "evalue": float})
+    return AttcArrays(hits, np.concatenate(starts))
+
+
 def search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
     """
     Parse the attc data set (sorted along start site) for the given replicon and return list of arrays.
@@ -48,76 +147,15 @@ def search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
     :return: a list attC sites found on replicon
     :rtype: list of :class:`pandas.DataFrame` objects
     """
-    ok = False
-
-    position_bkp_minus = []
-    position_bkp_plus = []
-
-    attc_plus = attc_df[attc_df.sens == "+"].copy()
-    attc_minus = attc_df[attc_df.sens == "-"].copy()
-
-    if not keep_palindromes:
-        attc_df = attc_df.sort_values(["pos_beg", "evalue"]).drop_duplicates(subset=["pos_beg"]).copy()
-        attc_plus = attc_df[attc_df.sens == "+"].copy()
-        attc_minus = attc_df[attc_df.sens == "-"].copy()
-
-    # can be reordered
-    if (attc_plus.pos_beg.diff() > dist_threshold).any() or (attc_minus.pos_beg.diff() > dist_threshold).any():
-        if not attc_plus.empty:
-            bkp_plus = attc_plus[attc_plus.pos_beg.diff() > dist_threshold].index
-            position_bkp_plus = [attc_plus.index.get_loc(i) for i in bkp_plus]
-        if not attc_minus.empty:
-            bkp_minus = attc_minus[(attc_minus.pos_beg.diff() > dist_threshold)].index
-            position_bkp_minus = [attc_minus.index.get_loc(i) for i in bkp_minus]
-        ok = True
-    if not attc_plus.empty and not attc_minus.empty:
-        ok = True
-
-    if not ok:
-        if attc_df.empty:
-            attc_array = []
-        else:
-            attc_array = [attc_df]
-    else:
-        if attc_plus.empty:
-            array_plus = []
-        else:
-            array_plus = np.split(attc_plus.values, position_bkp_plus)
-            # array_plus is a list of np.array
-            first_pos_beg = array_plus[0][0][4]
-            last_pos_beg = array_plus[-1][-1][4]
-            if len(array_plus) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
-                array_plus[0] = np.concatenate((array_plus[-1], array_plus[0]))
-                del array_plus[-1]
-
-        if attc_minus.empty:
-            array_minus = []
-        else:
-            array_minus = np.split(attc_minus.values, position_bkp_minus)
-            # array_minus is a list of np.array
-            first_pos_beg = array_minus[0][0][4]
-            last_pos_beg = array_minus[-1][-1][4]
-            if len(array_minus) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
-                array_minus[0] = np.concatenate((array_minus[-1], array_minus[0]))
-                del array_minus[-1]
-
-        tmp = array_plus + array_minus
-
-        attc_array = [pd.DataFrame(i, columns=["Accession_number", "cm_attC", "cm_debut",
-                                               "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]) for i in tmp]
-        # convert positions to int, and evalue to float
-        intcols = ["cm_debut", "cm_fin", "pos_beg", "pos_end"]
-        for a in attc_array:
-            a[intcols] = a[intcols].astype(int)
-            a["evalue"] = a["evalue"].astype(float)
-    return attc_array
+    return attc_arrays(attc_df, keep_palindromes, dist_threshold, replicon_size).frames()
 
 
 def find_attc_max(integrons, replicon, distance_threshold,
                   model_attc_path,
                   max_attc_size, min_attc_size,
                   evalue_attc=1.,
-                  circular=True, out_dir='.', cpu=1):
+                  circular=True, out_dir='.', cpu=1,
+                  cmsearch_bin='cmsearch', batch=False):
     """
     Look for attC site with cmsearch --max option which remove all heuristic filters.
     As this option make the algorithm way slower, we only run it in the region around a
@@ -153,11 +191,14 @@ def find_attc_max(integrons, replicon, distance_threshold,
     :param str out_dir: The directory where to write results
                         used indirectly by some called functions as :func:`infernal.local_max` or `infernal.expand`.
     :param int cpu: call local_max with the right number of cpu
+    :param str cmsearch_bin: The path to cmsearch
+    :param bool batch: if True, the windows of all integrons which can be searched at the same time
+                       are searched with one cmsearch (see :func:`infernal.local_max_batch`),
+                       otherwise one cmsearch is run by window.
     :return:
     :rtype: :class:`pd.DataFrame` object
 
     """
-    size_replicon = len(replicon)
     columns = ['Accession_number', 'cm_attC', 'cm_debut', 'cm_fin', 'pos_beg', 'pos_end', 'sens', 'evalue']
     data_type = {'Accession_number': 'str', 'cm_attC': 'str',
                  'cm_debut': 'int', 'cm_fin': 'int',
@@ -165,132 +206,220 @@ def find_attc_max(integrons, replicon, distance_threshold,
                  'sens': 'str', 'evalue': 'float'
                  }
     max_final = pd.DataFrame(columns=columns)
-
-    for i in integrons:
-        max_elt = pd.DataFrame(columns=columns)
-        max_elt = max_elt.astype(dtype=data_type)
-        full_element = i.describe()  # dataframe
-
-        if all(full_element.type == "complete"):
-            # Where is the integrase compared to the attc sites (no matter the strand) :
-            integrase_is_left = ((full_element[full_element.type_elt == "attC"].pos_beg.values[0] -
-                                  full_element[full_element.annotation == "intI"].pos_end.values[0]) % size_replicon <
-                                 (full_element[full_element.annotation == "intI"].pos_beg.values[0] -
-                                  full_element[full_element.type_elt == "attC"].pos_end.values[-1]) % size_replicon)
-
-            if integrase_is_left:
-                window_beg = full_element[full_element.annotation == "intI"].pos_end.values[0]
-                distance_threshold_left = 0
-                window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                distance_threshold_right = distance_threshold
-
-            else:  # is right
-                window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
-                distance_threshold_left = distance_threshold
-                window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
-                distance_threshold_right = 0
-
-            if circular:
-                window_beg = (window_beg - distance_threshold_left) % size_replicon
-                window_end = (window_end + distance_threshold_right) % size_replicon
-            else:
-                window_beg = max(0, window_beg - distance_threshold_left)
-                window_end = min(size_replicon, window_end + distance_threshold_right)
-
-            strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
-            df_max = local_max(replicon, window_beg, window_end, model_attc_path,
-                               strand_search=strand, out_dir=out_dir,
-                               cpu_nb=cpu,
-                               evalue_attc=evalue_attc,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,)
-            max_elt = pd.concat([max_elt, df_max])
-
-            # If we find new attC after the last found with default algo and if the integrase is on the left
-            # (We don't expand over the integrase) :
-            # pos_beg - pos_end so it's the same, the distance will always be > distance_threshold
-
-            go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
-                       ) % size_replicon < distance_threshold and not integrase_is_left
-            go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                        ) % size_replicon < distance_threshold and integrase_is_left
-            max_elt = expand(replicon,
-                             window_beg, window_end, max_elt, df_max,
-                             circular, distance_threshold,
-                             model_attc_path,
-                             max_attc_size=max_attc_size,
-                             min_attc_size=min_attc_size,
-                             evalue_attc=evalue_attc,
-                             search_left=go_left, search_right=go_right,
-                             out_dir=out_dir, cpu=cpu)
-
-        elif all(full_element.type == "CALIN"):
-            if full_element[full_element.pos_beg.isin(max_final.pos_beg)].empty:
-                # if cluster don't overlap already max-searched region
-                window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
-                window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                if circular:
-                    window_beg = (window_beg - distance_threshold) % size_replicon
-                    window_end = (window_end + distance_threshold) % size_replicon
-                else:
-                    window_beg = max(0, window_beg - distance_threshold)
-                    window_end = min(size_replicon, window_end + distance_threshold)
-                strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
-                df_max = local_max(replicon, window_beg, window_end,
-                                   model_attc_path,
-                                   strand_search=strand,
-                                   out_dir=out_dir, cpu_nb=cpu,
-                                   evalue_attc=evalue_attc,
-                                   max_attc_size=max_attc_size,
-                                   min_attc_size=min_attc_size,)
-                max_elt = pd.concat([max_elt, df_max])
-
-                if not df_max.empty:  # Max can sometimes find bigger attC than permitted
-                    go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
-                               ) % size_replicon < distance_threshold
-                    go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                                ) % size_replicon < distance_threshold
-                    max_elt = expand(replicon,
-                                     window_beg, window_end, max_elt, df_max,
-                                     circular, distance_threshold,
-                                     model_attc_path,
-                                     max_attc_size=max_attc_size,
-                                     min_attc_size=min_attc_size,
-                                     evalue_attc=evalue_attc,
-                                     search_left=go_left, search_right=go_right,
-                                     out_dir=out_dir, cpu=cpu)
-
-        elif all(full_element.type == "In0"):
-            if all(full_element.model != "Phage_integrase"):
-                window_beg = full_element[full_element.annotation == "intI"].pos_beg.values[0]
-                window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
-                if circular:
-                    window_beg = (window_beg - distance_threshold) % size_replicon
-                    window_end = (window_end + distance_threshold) % size_replicon
-                else:
-                    window_beg = max(0, window_beg - distance_threshold)
-                    window_end = min(size_replicon, window_end + distance_threshold)
-                df_max = local_max(replicon,
-                                   window_beg, window_end,
-                                   model_attc_path,
-                                   out_dir=out_dir, cpu_nb=cpu,
-                                   evalue_attc=evalue_attc,
-                                   max_attc_size=max_attc_size,
-                                   min_attc_size=min_attc_size)
-                max_elt = pd.concat([max_elt, df_max])
-                if not max_elt.empty:
-                    max_elt = expand(replicon,
-                                     window_beg, window_end, max_elt, df_max,
-                                     circular, distance_threshold,
-                                     model_attc_path,
-                                     max_attc_size=max_attc_size,
-                                     min_attc_size=min_attc_size,
-                                     evalue_attc=evalue_attc,
-                                     search_left=True, search_right=True,
-                                     out_dir=out_dir, cpu=cpu)
+    full_elements = [i.describe() for i in integrons]
+    searches = [_integron_max_windows(full_element, len(replicon), distance_threshold, circular, max_attc_size,
+                                      columns, data_type)
+                for full_element in full_elements]
+    local_max_opts = dict(evalue_attc=evalue_attc,
+                          max_attc_size=max_attc_size,
+                          min_attc_size=min_attc_size,
+                          cmsearch_bin=cmsearch_bin,
+                          out_dir=out_dir)
+    if batch:
+        calin = [all(full_element.type == "CALIN") for full_element in full_elements]
+
+        def overlapped(idx, max_elts):
+            """
+            :return: True if the CALIN *idx* overlaps the hits of the integrons before it which are surely kept,
+                     so it will be skipped below like in the serial search.
+                     The hits of a previous CALIN are not known to be kept as long as a search before it
+                     is not done, so the CALIN *idx* may still search windows whose hits are discarded below.
+            """
+            if not calin[idx]:
+                return False
+            hits = set()
+            # True as long as all the previous searches are done and we know if they are kept or not
+            decided = True
+            for prev_idx in range(idx):
+                if prev_idx not in max_elts:
+                    decided = False
+                elif max_elts[prev_idx] is None:
+                    # stopped, so skipped
+                    continue
+                elif not calin[prev_idx]:
+                    hits.update(max_elts[prev_idx].pos_beg)
+                elif decided and not full_elements[prev_idx].pos_beg.isin(hits).any():
+                    hits.update(max_elts[prev_idx].pos_beg)
+            return full_elements[idx].pos_beg.isin(hits).any()
+
+        # the searches around the complete integrons and the In0 are always kept, they are run first.
+        # Then the searches around the CALIN are stopped as soon as they are known to be skipped,
+        # some windows may be searched before that and their hits are discarded below.
+        max_elts = _run_batched_window_searches({idx: search for idx, search in enumerate(searches) if not calin[idx]},
+                                                replicon, model_attc_path, cpu_nb=cpu, **local_max_opts)
+        _run_batched_window_searches({idx: search for idx, search in enumerate(searches) if calin[idx]},
+                                     replicon, model_attc_path, results=max_elts, stop=overlapped,
+                                     cpu_nb=cpu, **local_max_opts)
+
+    for idx, full_element in enumerate(full_elements):
+        if all(full_element.type == "CALIN") and not full_element[full_element.pos_beg.isin(max_final.pos_beg)].empty:
+            # the cluster overlap an already max-searched region
+            max_elt = pd.DataFrame(columns=columns).astype(dtype=data_type)
+        elif batch:
+            max_elt = max_elts[idx]
+        else:
+            def search_window(win_beg, win_end, strand_search):
+                return local_max(replicon, win_beg, win_end, model_attc_path,
+                                 strand_search=strand_search, cpu_nb=cpu, **local_max_opts)
+            max_elt = run_window_search(searches[idx], search_window)
 
         max_final = pd.concat([max_final, max_elt])
         max_final.drop_duplicates(subset=max_final.columns[:-1], inplace=True)
         max_final.index = list(range(len(max_final)))
     max_final = max_final.astype(dtype=data_type)
     return max_final
+
+
+def _run_batched_window_searches(searches, replicon, model_attc_path, results=None, stop=None, **local_max_opts):
+    """
+    Drive several window searches at the same time.
+    At each round, the next window of each search is searched,
+    all these windows are searched with one cmsearch by strand (see :func:`infernal.local_max_batch`).
+
+    :param searches: the window searches (see :func:`infernal.run_window_search`) by index
+    :type searches: dict {int: generator}
+    :param replicon: replicon where the integrons were found
+    :type replicon: :class:`Bio.Seq.SeqRecord` object.
+    :param str model_attc_path: path to the attc model (Covariance Matrix).
+    :param results: the results of other searches, the results of *searches* are added to it.
+    :type results: dict {int: result}
+    :param stop: called with the index of a search and the results known so far before each window of the search.
+                 If it returns True, the search is stopped and its result is None.
+    :type stop: callable
+    :param local_max_opts: the other options passed to :func:`infernal.local_max_batch`
+    :return: the result of each search by index
+    :rtype: dict {int: result}
+    """
+    results = {} if results is None else results
+    pending = {}
+    for idx, search in searches.items():
+        try:
+            pending[idx] = next(search)
+        except StopIteration as stop_search:
+            results[idx] = stop_search.value
+    while pending:
+        if stop is not None:
+            for idx in list(pending):
+                if stop(idx, results):
+                    searches[idx].close()
+                    del pending[idx]
+                    results[idx] = None
+            if not pending:
+                break
+        dfs_max = local_max_batch(replicon, list(pending.values()), model_attc_path, **local_max_opts)
+        next_pending = {}
+        for idx, df_max in zip(pending, dfs_max):
+            try:
+                next_pending[idx] = searches[idx].send(df_max)
+            except StopIteration as stop_search:
+                results[idx] = stop_search.value
+        pending = next_pending
+    return results
+
+
+def _integron_max_windows(full_element, size_replicon, distance_threshold, circular, max_attc_size,
+                          columns, data_type):
+    """
+    The local_max search around one integron.
+    This generator yields the windows to search (window_beg, window_end, strand_search),
+    receives the attC hits found in the window and returns all hits found around the integron.
+
+    :param full_element: the description of the integron
+    :type full_element: :class:`pandas.DataFrame` object
+    :param int size_replicon: the length of the replicon
+    :param int distance_threshold: the maximal distance between 2 elements to aggregate them.
+    :param bool circular: True if replicon is circular, False otherwise.
+    :param int max_attc_size: maximum value for the attC size.
+    :param columns: the columns of the returned DataFrame
+    :param data_type: the types of the columns of the returned DataFrame
+    """
+    max_elt = pd.DataFrame(columns=columns)
+    max_elt = max_elt.astype(dtype=data_type)
+
+    if all(full_element.type == "complete"):
+        # Where is the integrase compared to the attc sites (no matter the strand) :
+        integrase_is_left = ((full_element[full_element.type_elt == "attC"].pos_beg.values[0] -
+                              full_element[full_element.annotation == "intI"].pos_end.values[0]) % size_replicon <
+                             (full_element[full_element.annotation == "intI"].pos_beg.values[0] -
+                              full_element[full_element.type_elt == "attC"].pos_end.values[-1]) % size_replicon)
+
+        if integrase_is_left:
+            window_beg = full_element[full_element.annotation == "intI"].pos_end.values[0]
+            distance_threshold_left = 0
+            window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+            distance_threshold_right = distance_threshold
+
+        else:  # is right
+            window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
+            distance_threshold_left = distance_threshold
+            window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
+            distance_threshold_right = 0
+
+        if circular:
+            window_beg = (window_beg - distance_threshold_left) % size_replicon
+            window_end = (window_end + distance_threshold_right) % size_replicon
+        else:
+            window_beg = max(0, window_beg - distance_threshold_left)
+            window_end = min(size_replicon, window_end + distance_threshold_right)
+
+        strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
+        df_max = yield window_beg, window_end, strand
+        max_elt = pd.concat([max_elt, df_max])
+
+        # If we find new attC after the last found with default algo and if the integrase is on the left
+        # (We don't expand over the integrase) :
+        # pos_beg - pos_end so it's the same, the distance will always be > distance_threshold
+
+        go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
+                   ) % size_replicon < distance_threshold and not integrase_is_left
+        go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+                    ) % size_replicon < distance_threshold and integrase_is_left
+        max_elt = yield from expand_windows(size_replicon,
+                                            window_beg, window_end, max_elt, df_max,
+                                            circular, distance_threshold,
+                                            max_attc_size=max_attc_size,
+                                            search_left=go_left, search_right=go_right)
+
+    elif all(full_element.type == "CALIN"):
+        window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
+        window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+        if circular:
+            window_beg = (window_beg - distance_threshold) % size_replicon
+            window_end = (window_end + distance_threshold) % size_replicon
+        else:
+            window_beg = max(0, window_beg - distance_threshold)
+            window_end = min(size_replicon, window_end + distance_threshold)
+        strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
+        df_max = yield window_beg, window_end, strand
+        max_elt = pd.concat([max_elt, df_max])
+
+        if not df_max.empty:  # Max can sometimes find bigger attC than permitted
+            go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
+                       ) % size_replicon < distance_threshold
+            go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+                        ) % size_replicon < distance_threshold
+            max_elt = yield from expand_windows(size_replicon,
+                                                window_beg, window_end, max_elt, df_max,
+                                                circular, distance_threshold,
+                                                max_attc_size=max_attc_size,
+                                                search_left=go_left, search_right=go_right)
+
+    elif all(full_element.type == "In0"):
+        if all(full_element.model != "Phage_integrase"):
+            window_beg = full_element[full_element.annotation == "intI"].pos_beg.values[0]
+            window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
+            if circular:
+                window_beg = (window_beg - distance_threshold) % size_replicon
+                window_end = (window_end + distance_threshold) % size_replicon
+            else:
+                window_beg = max(0, window_beg - distance_threshold)
+                window_end = min(size_replicon, window_end + distance_threshold)
+            df_max = yield window_beg, window_end, "both"
+            max_elt = pd.concat([max_elt, df_max])
+            if not max_elt.empty:
+                max_elt = yield from expand_windows(size_replicon,
+                                                    window_beg, window_end, max_elt, df_max,
+                                                    circular, distance_threshold,
+                                                    max_attc_size=max_attc_size,
+                                                    search_left=True, search_right=True)
+    return max_elt
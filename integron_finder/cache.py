@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Persistent cache of the results of the external tools (cmsearch, hmmsearch, prodigal).
+
+The results are stored on disk under a key computed from the content of the inputs
+(sequence, model), the version of the tool and the options which change the results.
+So the same replicon analysed in different runs or in different output directories
+reuse the same results.
+The size of the cache is bounded, the least recently used entries are removed first.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+from subprocess import run, PIPE, STDOUT
+
+import colorlog
+
+_log = colorlog.getLogger(__name__)
+
+_tool_versions = {}
+
+"""The number of results stored between two scans of the cache, to count the entries stored by other processes"""
+_RESCAN_PUTS = 100
+
+
+def file_digest(path):
+    """
+    :param str path: the path of the file to hash
+    :return: the sha256 hexdigest of the content of the file
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def tool_version(path):
+    """
+    Get the version of an external tool (cmsearch, hmmsearch, prodigal)
+    The version is computed once by process for each tool.
+
+    :param str path: the path to the executable
+    :return: the version of the tool as reported by the tool itself,
+             or the digest of the executable if the version cannot be found.
+    :rtype: str
+    """
+    if path in _tool_versions:
+        return _tool_versions[path]
+    version = None
+    for opt in ('-h', '-v'):
+        try:
+            out = run([path, opt], stdout=PIPE, stderr=STDOUT).stdout.decode(errors='replace')
+        except OSError:
+            break
+        # '# INFERNAL 1.1.2 (July 2016)', '# HMMER 3.1b2 (February 2015)', 'Prodigal V2.6.3: February, 2016'
+        match = re.search(r"(INFERNAL|HMMER|Prodigal)\s+V?(\S+)", out)
+        if match:
+            version = '{} {}'.format(match.group(1), match.group(2).rstrip(':'))
+            break
+    if version is None:
+        exe = shutil.which(path) or path
+        version = file_digest(exe) if os.path.isfile(exe) else exe
+    _tool_versions[path] = version
+    return version
+
+
+class ResultCache:
+    """
+    Size bounded, content addressed, cache of files.
+    Each entry is a directory, named by its key, which contains the files of one result.
+    """
+
+    """The sub directory for the data used all along a run (the compiled hmm banks), it is never evicted"""
+    BANKS_DIR = 'banks'
+
+    def __init__(self, cache_dir, max_size=5000):
+        """
+        :param str cache_dir: the path to the directory where the results are stored.
+                              It is created if it does not exist.
+        :param int max_size: the maximum size of the cache in Mb.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # the size of the cache as known by this process, None until the first scan
+        self._size = None
+        self._puts = 0
+
+
+    @property
+    def banks_dir(self):
+        """
+        :return: the directory where the data used by all the replicons of a run are stored.
+                 These data are not counted in the cache size and are never evicted,
+                 as they must not disappear while a run uses them.
+        :rtype: str
+        """
+        return os.path.join(self.cache_dir, self.BANKS_DIR)
+
+
+    @staticmethod
+    def key(*components):
+        """
+        :param components: all values which determine a result (inputs digests, tool version, options ...)
+        :return: the key corresponding to these components.
+        :rtype: str
+        """
+        sha = hashlib.sha256()
+        for comp in components:
+            sha.update(repr(comp).encode())
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+
+    def get(self, key, files):
+        """
+        Copy the files of a cached result to their destination.
+
+        :param str key: the key of the result
+        :param dict files: the name of the file in the entry as key, the destination path as value.
+        :return: True if the result was in cache and the files are copied, False otherwise.
+        :rtype: bool
+        """
+        entry = self._entry_path(key)
+        try:
+            for name, dest in files.items():
+                shutil.copyfile(os.path.join(entry, name), dest)
+            # mark the entry as recently used
+            os.utime(entry)
+        except OSError:
+            # no entry, incomplete entry or entry evicted by another process
+            return False
+        _log.debug("get result {} from cache".format(key))
+        return True
+
+
+    def put(self, key, files):
+        """
+        Store a result in the cache, then evict the least recently used entries if the cache is too big.
+        The size of the cache is kept up to date by this process,
+        the cache is scanned only when this size exceeds max_size or every few results
+        to count the results stored by the other processes.
+
+        :param str key: the key of the result
+        :param dict files: the name of the file in the entry as key, the path of the file to store as value.
+        """
+        entry = self._entry_path(key)
+        if os.path.exists(entry):
+            return
+        entry_dir = os.path.dirname(entry)
+        os.makedirs(entry_dir, exist_ok=True)
+        # the result is first written in a temporary directory then renamed
+        # so concurrent processes never see partial entries.
+        tmp_entry = tempfile.mkdtemp(prefix='.tmp_', dir=entry_dir)
+        try:
+            size = 0
+            for name, src in files.items():
+                shutil.copyfile(src, os.path.join(tmp_entry, name))
+                size += os.path.getsize(src)
+            os.rename(tmp_entry, entry)
+            _log.debug("put result {} in cache".format(key))
+        except OSError as err:
+            # the same result has been stored by another process in the meantime
+            _log.debug("cannot store result {} in cache: {}".format(key, err))
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        self._puts += 1
+        if self._size is not None:
+            self._size += size
+        if self._size is None or self._size > self.max_size or self._puts >= _RESCAN_PUTS:
+            self.evict()
+
+
+    def evict(self):
+        """
+        Scan the cache and remove the least recently used entries until the size of the cache is under max_size.
+        """
+        entries = []
+        total_size = 0
+        for prefix in os.scandir(self.cache_dir):
+            if not prefix.is_dir() or prefix.name == self.BANKS_DIR:
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.startswith('.tmp_'):
+                    continue
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    # evicted by another process
+                    continue
+                total_size += size
+        if total_size > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_size:
+                    break
+                _log.debug("evict {} from cache".format(path))
+                shutil.rmtree(path, ignore_errors=True)
+                total_size -= size
+        self._size = total_size
+        self._puts = 0
@@ -27,9 +27,15 @@
 ####################################################################################
 
 import os
+import shutil
+
+import colorlog
 
 from . import utils
-from . import __INTEGRON_DATA__
+from . import __INTEGRON_DATA__, IntegronError
+from .cache import ResultCache
+
+_log = colorlog.getLogger(__name__)
 
 
 class Config:
@@ -39,6 +45,9 @@ class Config:
 
     def __init__(self, args):
         self._model_len = None  # model_len cache, because it's computation is "heavy" (open file)
+        self._cache = None
+        self._func_annot_bank = None
+        self._func_annot_bank_done = False  # the bank is compiled once by run
         self._args = args
 
         if __INTEGRON_DATA__ == '$' + 'INTEGRONDATA':
@@ -47,12 +56,33 @@ class Config:
             self._prefix_data = os.path.join(__INTEGRON_DATA__, 'data')
 
     def __getattr__(self, item):
+        if item == '_args':
+            # _args is not set yet, for instance when the config is unpickled
+            # in a worker process. Do not recurse.
+            raise AttributeError("config object has no attribute '{}'".format(item))
         try:
             attr = getattr(self._args, item)
             return attr
         except AttributeError:
             raise AttributeError("config object has no attribute '{}'".format(item))
 
+    @property
+    def workers(self):
+        """The number of replicons analysed in parallel"""
+        return max(1, getattr(self._args, 'workers', 1) or 1)
+
+    @property
+    def cpu(self):
+        """
+        The number of cpu used by each INFERNAL or HMMER call.
+        When several workers run in parallel, the '--cpu' budget is shared between them
+        (each worker use at least one cpu).
+        """
+        cpu = self._args.cpu
+        if self.workers > 1:
+            cpu = max(1, cpu // self.workers)
+        return cpu
+
     @property
     def input_seq_path(self):
         """The absolute path to the input file"""
@@ -110,6 +140,22 @@ class Config:
         """The absolute path to the phage-integrase model file"""
         return os.path.join(self.model_dir, "phage-int.hmm")
 
+    @property
+    def local_max_batch(self):
+        """
+        True if the local_max windows of all integrons are searched together (one cmsearch by round),
+        False if they are searched one by one.
+        """
+        return not getattr(self._args, 'no_local_max_batch', False)
+
+    @property
+    def combined_integrase_search(self):
+        """
+        True if the integrase and phage integrase profiles are searched with only one hmmsearch process,
+        False otherwise (one hmmsearch process by profile).
+        """
+        return getattr(self._args, 'combined_integrase_search', False)
+
     @property
     def model_attc_path(self):
         """The absolute path to the attC model file"""
@@ -150,6 +196,21 @@ class Config:
         else:
             return self._model_len
 
+    @property
+    def cache(self):
+        """
+        The cache of the cmsearch, hmmsearch and prodigal results shared between runs.
+
+        :return: the cache or None if no cache directory is set (--cache-dir).
+        :rtype: :class:`integron_finder.cache.ResultCache` object or None
+        """
+        cache_dir = getattr(self._args, 'cache_dir', None)
+        if not cache_dir:
+            return None
+        if self._cache is None:
+            self._cache = ResultCache(cache_dir, max_size=getattr(self._args, 'cache_size', 5000))
+        return self._cache
+
     @property
     def func_annot_path(self):
         """
@@ -160,6 +221,91 @@ class Config:
         return os.path.join(self._prefix_data, "Functional_annotation")
 
 
+    @property
+    def columnar_output(self):
+        """The columnar format of the integrons report: 'parquet', 'feather' or None for no columnar output"""
+        return getattr(self._args, 'columnar_output', None)
+
+    @property
+    def timing(self):
+        """True if the resources used by each stage of the analysis of each replicon must be reported"""
+        return getattr(self._args, 'timing', False)
+
+    @property
+    def func_annot_program(self):
+        """
+        The program used to search the functional annotation profiles:
+        'hmmsearch', 'hmmscan' or 'auto' to choose the fastest one (see :meth:`integron_finder.hmm.HmmBank.program`)
+        """
+        return getattr(self._args, 'func_annot_program', 'auto') or 'auto'
+
+    def _hmmer_tool(self, name):
+        """
+        :param str name: the name of a program of the hmmer suite
+        :return: the path to the program in the same directory as hmmsearch or in the PATH, None if not found.
+        :rtype: str
+        """
+        hmmsearch = getattr(self._args, 'hmmsearch', None)
+        if hmmsearch:
+            path = os.path.join(os.path.dirname(hmmsearch), name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+        return shutil.which(name)
+
+    @property
+    def hmmscan(self):
+        """The path to hmmscan, None if not found"""
+        return self._hmmer_tool('hmmscan')
+
+    @property
+    def hmmpress(self):
+        """The path to hmmpress, None if not found"""
+        return self._hmmer_tool('hmmpress')
+
+    @property
+    def func_annot_bank(self):
+        """
+        The profiles used for the functional annotation (--func-annot, --path-func-annot) gathered in one bank,
+        compiled once by run (see :func:`integron_finder.hmm.compile_hmm_bank`).
+        The bank is stored in the cache directory (--cache-dir) to be reused by the next runs,
+        otherwise in the results directory.
+
+        :return: the bank or None if there is no functional annotation.
+        :rtype: :class:`integron_finder.hmm.HmmBank` object or None
+        :raise IntegronError: if the default functional annotation directory does not exist.
+        """
+        if not self._func_annot_bank_done:
+            self._func_annot_bank = self._compile_func_annot_bank()
+            self._func_annot_bank_done = True
+        return self._func_annot_bank
+
+    def _compile_func_annot_bank(self):
+        from .hmm import scan_hmm_bank, compile_hmm_bank
+
+        if getattr(self._args, 'no_proteins', False):
+            return None
+        # func_annot_path is the canonical path for Functional_annotation
+        # path_func_annot is the path provide on the command line
+        path_func_annot = getattr(self._args, 'path_func_annot', None)
+        if path_func_annot:
+            hmm_files = scan_hmm_bank(path_func_annot)
+        elif getattr(self._args, 'func_annot', False):
+            if os.path.exists('bank_hmm'):
+                hmm_files = scan_hmm_bank('bank_hmm')
+            elif os.path.exists(self.func_annot_path):
+                hmm_files = scan_hmm_bank(self.func_annot_path)
+            else:
+                raise IntegronError("the dir '{}' neither 'bank_hmm' exists, specify the location of hmm "
+                                    "profile with --path-func-annot option".format(self.func_annot_path))
+        else:
+            return None
+        if not hmm_files:
+            _log.warning("No hmm profiles for functional annotation detected, skip functional annotation step.")
+            return None
+        cache = self.cache
+        bank_dir = cache.banks_dir if cache is not None else self.tmp_dir('func_annot')
+        return compile_hmm_bank(hmm_files, bank_dir, hmmpress=self.hmmpress)
+
     @property
     def log_level(self):
         """
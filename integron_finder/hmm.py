@@ -28,10 +28,13 @@
 
 import os
 import glob
+import atexit
+import shutil
+import tempfile
 import warnings
+from subprocess import call
 
 import colorlog
-import numpy as np
 import pandas as pd
 
 # display warning only for non installed integron_finder
@@ -40,6 +43,10 @@ warnings.simplefilter('ignore', BiopythonExperimentalWarning)
 
 from Bio import SearchIO
 
+from .cache import ResultCache, file_digest, tool_version
+from .utils import get_name_from_path
+from . import timing
+
 _log = colorlog.getLogger(__name__)
 
 
@@ -93,19 +100,240 @@ def scan_hmm_bank(path):
         raise IOError("{} no such file or directory".format(path))
 
 
-def read_hmm(replicon_id, prot_db, infile, cfg, evalue=1., coverage=0.5):
+# hmmscan is used instead of hmmsearch when the bank has more than _SCAN_RATIO profiles by protein to annotate
+_SCAN_RATIO = 100
+
+
+class HmmBank:
+    """
+    Profiles used for the functional annotation, gathered in one hmm file.
+    """
+
+    def __init__(self, path, profiles_nb=None, pressed=False):
+        """
+        :param str path: the path to the hmm file
+        :param int profiles_nb: the number of profiles in the file (None if unknown)
+        :param bool pressed: True if the file is pressed (see hmmpress), so it can be searched with hmmscan.
+        """
+        self.path = path
+        self.profiles_nb = profiles_nb
+        self.pressed = pressed
+
+    def __repr__(self):
+        return "{}({!r}, profiles_nb={}, pressed={})".format(self.__class__.__name__, self.path,
+                                                            self.profiles_nb, self.pressed)
+
+    def program(self, seq_nb, cfg):
+        """
+        Choose the program to search the bank against *seq_nb* sequences.
+        hmmsearch reads all profiles of the text hmm file for each search,
+        whereas hmmscan reads the binary pressed bank, which is faster when the sequences are few
+        and the profiles numerous.
+
+        :param int seq_nb: the number of sequences to annotate
+        :param cfg: the configuration (see --func-annot-program)
+        :type cfg: :class:`integron_finder.config.Config` object.
+        :return: 'hmmscan' or 'hmmsearch'
+        :rtype: str
+        """
+        program = cfg.func_annot_program
+        if program == 'auto':
+            if self.pressed and self.profiles_nb and self.profiles_nb > seq_nb * _SCAN_RATIO:
+                program = 'hmmscan'
+            else:
+                program = 'hmmsearch'
+        if program == 'hmmscan' and (not self.pressed or cfg.hmmscan is None):
+            _log.warning("cannot use hmmscan with '{}', hmmsearch is used instead".format(self.path))
+            program = 'hmmsearch'
+        return program
+
+
+def compile_hmm_bank(hmm_files, bank_dir, hmmpress=None):
+    """
+    Concatenate the hmm files in one bank and press it with hmmpress.
+    The bank is stored in *bank_dir* under the digest of the hmm files,
+    so it is compiled once and reused as long as the profiles do not change.
+    If hmmpress fails, the bank is not stored: it is used unpressed by this run and removed at exit.
+
+    :param hmm_files: the paths to the hmm files to gather.
+    :type hmm_files: list of str
+    :param str bank_dir: the directory where the banks are stored. It is created if it does not exist.
+    :param str hmmpress: the path to hmmpress, if None the bank is not pressed.
+    :return: the bank
+    :rtype: :class:`HmmBank` object.
+    """
+    components = ['hmm_bank'] + [file_digest(path) for path in hmm_files]
+    if hmmpress:
+        # the format of the pressed files depends on the hmmer version
+        components.append(tool_version(hmmpress))
+    key = ResultCache.key(*components)
+    # a bank made of one hmm file keeps its name, so the names of the results do not change
+    name = get_name_from_path(hmm_files[0]) if len(hmm_files) == 1 else 'func_annot'
+    entry = os.path.join(bank_dir, key[:2], key)
+    bank_path = os.path.join(entry, name + '.hmm')
+    profiles_path = os.path.join(entry, 'profiles_nb')
+
+    if os.path.exists(entry):
+        _log.debug("use hmm bank {}".format(bank_path))
+    else:
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # the bank is built in a temporary directory then renamed,
+        # so concurrent runs never see partial banks.
+        tmp_entry = tempfile.mkdtemp(prefix='.tmp_', dir=os.path.dirname(entry))
+        tmp_bank = os.path.join(tmp_entry, name + '.hmm')
+        profiles_nb = 0
+        with open(tmp_bank, 'w') as bank:
+            for path in hmm_files:
+                with open(path) as hmm_file:
+                    for line in hmm_file:
+                        if line.startswith('NAME '):
+                            profiles_nb += 1
+                        bank.write(line)
+        with open(os.path.join(tmp_entry, 'profiles_nb'), 'w') as profiles_file:
+            profiles_file.write(str(profiles_nb))
+        press_failed = False
+        if hmmpress:
+            cmd = [hmmpress, tmp_bank]
+            _log.debug("run hmmpress: {}".format(' '.join(cmd)))
+            try:
+                with open(os.devnull, 'w') as dev_null:
+                    returncode = call(cmd, stdout=dev_null)
+            except Exception as err:
+                _log.warning("{} failed : {}".format(' '.join(cmd), err))
+                returncode = None
+            if returncode != 0:
+                press_failed = True
+                for pressed in glob.glob(tmp_bank + '.h3?'):
+                    os.unlink(pressed)
+        if press_failed:
+            # the unpressed bank is used for this run only and is not stored under the key,
+            # so the next run will try to press it again.
+            _log.warning("hmmpress failed, the hmm bank {} is not pressed".format(tmp_bank))
+            atexit.register(shutil.rmtree, tmp_entry, True)
+            bank_path = tmp_bank
+            profiles_path = os.path.join(tmp_entry, 'profiles_nb')
+        else:
+            try:
+                os.rename(tmp_entry, entry)
+                _log.info("hmm bank {} compiled from {} files".format(bank_path, len(hmm_files)))
+            except OSError:
+                # the same bank has been compiled by another process in the meantime
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    with open(profiles_path) as profiles_file:
+        profiles_nb = int(profiles_file.read())
+    return HmmBank(bank_path, profiles_nb=profiles_nb, pressed=os.path.exists(bank_path + '.h3m'))
+
+
+def domtblout_path(hmm_out):
+    """
+    :param str hmm_out: the path of the output of hmmsearch (-o)
+    :return: the path of the domain tabulated output (--domtblout) of the same hmmsearch
+    :rtype: str
+    """
+    return os.path.splitext(hmm_out)[0] + '_domtbl.res'
+
+
+def _text_hits(infile, scan=False):
+    """
+    Parse hmmer --out output.
+
+    :param str infile: the path of the hmmsearch output
+    :param bool scan: True if infile is an output of hmmscan (the profiles are the targets)
+    :return: for each hit, the query name, the query accession, the profile length, the hit id
+             and the list of the domains (i-evalue, hmmfrom, hmmto, alifrom, alito) of the hit.
+    :rtype: generator of tuple
+    """
+    for query_result in SearchIO.parse(infile, 'hmmer3-text'):
+        if scan:
+            for hit in query_result.hits:
+                domains = [(hsp.evalue, hsp.hit_start + 1, hsp.hit_end, hsp.query_start + 1, hsp.query_end)
+                           for hsp in hit.hsps]
+                id_query = getattr(hit, 'accession', None) or "-"
+                yield hit.id, id_query, hit.seq_len, query_result.id, domains
+            continue
+        try:
+            id_query = query_result.accession
+        except AttributeError:
+            id_query = "-"
+        for hit in query_result.hits:
+            domains = [(hsp.evalue, hsp.query_start + 1, hsp.query_end, hsp.hit_start + 1, hsp.hit_end)
+                       for hsp in hit.hsps]
+            yield query_result.id, id_query, query_result.seq_len, hit.id, domains
+
+
+def _domtblout_hits(infile, scan=False):
+    """
+    Parse hmmer --domtblout output.
+    The domains of a hit are on consecutive lines.
+
+    :param str infile: the path of the hmmsearch domain tabulated output
+    :param bool scan: True if infile is an output of hmmscan (the profiles are the targets)
+    :return: for each hit, the query name, the query accession, the profile length, the hit id
+             and the list of the domains (i-evalue, hmmfrom, hmmto, alifrom, alito) of the hit.
+    :rtype: generator of tuple
+    """
+    # the columns of the profile and of the sequence
+    prof, seq = (0, 3) if scan else (3, 0)
+    hit = None
+    with open(infile) as domtbl:
+        for line in domtbl:
+            if line.startswith('#'):
+                continue
+            # target name, accession, tlen, query name, accession, qlen, E-value, score, bias,
+            # #, of, c-Evalue, i-Evalue, score, bias, hmm from, hmm to, ali from, ali to, ...
+            fields = line.split(None, 19)
+            domain = (float(fields[12]), int(fields[15]), int(fields[16]), int(fields[17]), int(fields[18]))
+            if hit is not None and hit[0] == fields[prof] and hit[3] == fields[seq]:
+                hit[4].append(domain)
+            else:
+                if hit is not None:
+                    yield hit
+                hit = (fields[prof], fields[prof + 1], int(fields[prof + 2]), fields[seq], [domain])
+    if hit is not None:
+        yield hit
+
+
+def reported_hits(tblout, scan=False):
+    """
+    Parse hmmer --tblout output.
+
+    :param str tblout: the path of the hmmsearch per sequence tabulated output
+    :param bool scan: True if tblout is an output of hmmscan (the profiles are the targets)
+    :return: one row per sequence reported by hmmsearch with columns "query_name", "ID_prot"
+    :rtype: a :class:`pandas.DataFrame`
+    """
+    # the columns of the profile and of the sequence
+    prof, seq = (0, 2) if scan else (2, 0)
+    data = {"query_name": [], "ID_prot": []}
+    with open(tblout) as tbl:
+        for line in tbl:
+            if line.startswith('#'):
+                continue
+            # target name, accession, query name, accession, E-value, ...
+            fields = line.split(None, 3)
+            data["query_name"].append(fields[prof])
+            data["ID_prot"].append(fields[seq])
+    return pd.DataFrame(data, columns=["query_name", "ID_prot"])
+
+
+@timing.timed('read_hmm')
+def read_hmm(replicon_id, prot_db, infile, cfg, evalue=1., coverage=0.5, scan=False):
     """
     Function that parse hmmer --out output and returns a pandas DataFrame
     filter output by evalue and coverage. (Being % of the profile aligned)
+    If the domain tabulated output of the same hmmsearch (see :func:`domtblout_path`) is present
+    it is parsed instead of the --out output, the results are the same but it is much faster to parse.
 
     :param str replicon_id: the id of the replicon
     :param prot_db: The protein database corresponding to the replicon translation
     :type prot_db: :class:`integron_finder.prot_db.ProteinDB` object.
-    :param str infile: the hmm output (in tabulated format) to parse
+    :param str infile: the hmm output to parse
     :param cfg: the config
     :type cfg: :class:`integron_finder.config.Config` object.
     :param float evalue: filter out hits with evalue greater tha evalue.
     :param float coverage: filter out hits with coverage under coverage (% of the profile aligned)
+    :param bool scan: True if infile is an output of hmmscan (the profiles are the targets)
     :returns: data Frame with columns:
 
               | "Accession_number", "query_name", "ID_query", "ID_prot", "strand", "pos_beg", "pos_end", "evalue"
@@ -113,55 +341,41 @@ def read_hmm(replicon_id, prot_db, infile, cfg, evalue=1., coverage=0.5):
 
     :rtype: a :class:`pandas.DataFrame`
     """
-    df = pd.DataFrame(columns=["Accession_number", "query_name", "ID_query",
-                               "ID_prot", "strand", "pos_beg", "pos_end",
-                               "evalue", "hmmfrom", "hmmto", "alifrom",
-                               "alito", "len_profile"])
-    _log.debug("Parse {}".format(infile))
-    gen = SearchIO.parse(infile, 'hmmer3-text')
-    for idx, query_result in enumerate(gen):
-        len_profile = query_result.seq_len
-        query = query_result.id
+    columns = ["Accession_number", "query_name", "ID_query",
+               "ID_prot", "strand", "pos_beg", "pos_end",
+               "evalue", "hmmfrom", "hmmto", "alifrom",
+               "alito", "len_profile"]
+    # the rows are accumulated in one list by column and the DataFrame is built once at the end
+    data = {col: [] for col in columns}
+    domtbl = domtblout_path(infile)
+    if os.path.exists(domtbl):
+        _log.debug("Parse {}".format(domtbl))
+        hits = _domtblout_hits(domtbl, scan=scan)
+    else:
+        _log.debug("Parse {}".format(infile))
+        hits = _text_hits(infile, scan=scan)
+    for query, id_query, len_profile, id_prot, domains in hits:
+        if not domains:
+            continue
+        _, strand, pos_beg, pos_end = prot_db.get_description(id_prot)
+        # the first domain with the best i-evalue
+        best_evalue, hmmfrom, hmmto, alifrom, alito = min(domains, key=lambda domain: domain[0])
 
-        try:
-            id_query = query_result.accession
-        except AttributeError:
-            id_query = "-"
-        for idx2, hit in enumerate(query_result.hits):
-            id_prot = hit.id
-
-            _, strand, pos_beg, pos_end = prot_db.get_description(hit.id)
-
-            evalue_tmp = []
-            hmmfrom = []
-            hmmto = []
-            alifrom = []
-            alito = []
-
-            for hsp in hit.hsps:
-                # strand = hsp.query_strand
-                evalue_tmp.append(hsp.evalue)
-                hmmfrom.append(hsp.query_start + 1)
-                hmmto.append(hsp.query_end)
-                alifrom.append(hsp.hit_start + 1)
-                alito.append(hsp.hit_end)
-
-            best_evalue = np.argmin(evalue_tmp)
-
-            df.loc[idx+idx2, "ID_prot"] = id_prot
-            df.loc[idx+idx2, "ID_query"] = id_query  # "-"  # remnant of ancient parsing function to keep data structure
-            df.loc[idx+idx2, "pos_beg"] = pos_beg
-            df.loc[idx+idx2, "pos_end"] = pos_end
-            df.loc[idx+idx2, "strand"] = strand
-            df.loc[idx+idx2, "evalue"] = evalue_tmp[best_evalue]   # i-evalue
-            df.loc[idx+idx2, "hmmfrom"] = hmmfrom[best_evalue]   # hmmfrom
-            df.loc[idx+idx2, "hmmto"] = hmmto[best_evalue]     # hmm to
-            df.loc[idx+idx2, "alifrom"] = alifrom[best_evalue]   # alifrom
-            df.loc[idx+idx2, "alito"] = alito[best_evalue]  # ali to
-            df.loc[idx+idx2, "len_profile"] = float(len_profile)
-            df.loc[idx+idx2, "Accession_number"] = replicon_id
-            df.loc[idx+idx2, "query_name"] = query
+        data["ID_prot"].append(id_prot)
+        data["ID_query"].append(id_query)  # "-"  # remnant of ancient parsing function to keep data structure
+        data["pos_beg"].append(pos_beg)
+        data["pos_end"].append(pos_end)
+        data["strand"].append(strand)
+        data["evalue"].append(best_evalue)   # i-evalue
+        data["hmmfrom"].append(hmmfrom)
+        data["hmmto"].append(hmmto)
+        data["alifrom"].append(alifrom)
+        data["alito"].append(alito)
+        data["len_profile"].append(float(len_profile))
+        data["Accession_number"].append(replicon_id)
+        data["query_name"].append(query)
 
+    df = pd.DataFrame(data, columns=columns, dtype=object)
     intcols = ["pos_beg", "pos_end", "strand"]
     floatcol = ["evalue", "len_profile"]
     df[intcols] = df[intcols].astype(int)
@@ -27,16 +27,21 @@
 ####################################################################################
 
 import os
+from operator import itemgetter
 from subprocess import call
 import colorlog
+import numpy as np
 import pandas as pd
 from Bio import SeqIO
 
 from .utils import model_len
+from .cache import file_digest, tool_version
+from . import timing
 
 _log = colorlog.getLogger(__name__)
 
 
+@timing.timed('read_infernal')
 def read_infernal(infile, replicon_id, len_model_attc,
                   evalue=1, size_max_attc=200, size_min_attc=40):
     """
@@ -65,20 +70,33 @@ def read_infernal(infile, replicon_id, len_model_attc,
              "pos_end": "int",
              "evalue": "float",
            }
-    try:
-        _ = pd.read_csv(infile, comment="#", sep="\t")
-    except Exception:
-        df = pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
-                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
-        return df.astype(dtype)
-
-    df = pd.read_csv(infile, sep="\s+", engine="python",  header=None,
-                     skipfooter=10, skiprows=2, usecols=[2, 5, 6, 7, 8, 9, 15])
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
     # some line can have different number of columns due to difference in description
     # we do not use this columns so we must parse only cols we need
     # Keep only columns: query_name(2), mdl from(5), mdl to(6), seq from(7),
     # seq to(8), strand(9), E-value(15)
-    df.columns = ["cm_attC", "cm_debut", "cm_fin", "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"]
+    used_fields = itemgetter(2, 5, 6, 7, 8, 9, 15)
+    try:
+        tblout = open(infile)
+    except OSError:
+        hits = []
+    else:
+        with tblout:
+            # the description of target (the last column) may contain spaces,
+            # so each line is split in 17 fields at most
+            hits = [used_fields(line.split(None, 16)) for line in tblout if not line.startswith('#')]
+    if not hits:
+        df = pd.DataFrame(columns=columns)
+        return df.astype(dtype)
+
+    cm_attc, cm_debut, cm_fin, pos_beg_tmp, pos_end_tmp, sens, evalues = zip(*hits)
+    df = pd.DataFrame({"cm_attC": cm_attc,
+                       "cm_debut": np.array(cm_debut, dtype=np.int64),
+                       "cm_fin": np.array(cm_fin, dtype=np.int64),
+                       "pos_beg_tmp": np.array(pos_beg_tmp, dtype=np.int64),
+                       "pos_end_tmp": np.array(pos_end_tmp, dtype=np.int64),
+                       "sens": sens,
+                       "evalue": np.array(evalues, dtype=float)})
     df["Accession_number"] = replicon_id
     _log.debug("Before filtering on evalue {}, there were {} attC sites".format(evalue, len(df)))
     df = df[df.evalue < evalue]  # filter on evalue
@@ -88,23 +106,23 @@ def read_infernal(infile, replicon_id, len_model_attc,
     _log.debug("After filtering on size max: {} and size min: {}, "
                "there are now {} attC sites".format(size_max_attc, size_min_attc, len(df)))
     if not df.empty:
-        df.sort_values(['pos_end_tmp', 'evalue'], inplace=True)
+        df = df.sort_values(['pos_end_tmp', 'evalue'])
         df.index = list(range(0, len(df)))
-        idx = (df.pos_beg_tmp > df.pos_end_tmp)
-        df.loc[idx, "pos_beg"] = df.loc[idx].apply(lambda x: x["pos_end_tmp"] - (len_model_attc - x["cm_fin"]), axis=1)
-        df.loc[idx, "pos_end"] = df.loc[idx].apply(lambda x: x["pos_beg_tmp"] + (x["cm_debut"] - 1), axis=1)
-
-        df.loc[~idx, "pos_end"] = df.loc[~idx].apply(lambda x: x["pos_end_tmp"] + (len_model_attc - x["cm_fin"]), axis=1)
-        df.loc[~idx, "pos_beg"] = df.loc[~idx].apply(lambda x: x["pos_beg_tmp"] - (x["cm_debut"] - 1), axis=1)
-
-        df = df[["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]]
+        # the hit is on the reverse strand
+        rev = (df.pos_beg_tmp > df.pos_end_tmp).values
+        pos_beg_tmp = df.pos_beg_tmp.values
+        pos_end_tmp = df.pos_end_tmp.values
+        cm_head = df.cm_debut.values - 1
+        cm_tail = len_model_attc - df.cm_fin.values
+        df["pos_beg"] = np.where(rev, pos_end_tmp - cm_tail, pos_beg_tmp - cm_head)
+        df["pos_end"] = np.where(rev, pos_beg_tmp + cm_head, pos_end_tmp + cm_tail)
+        df = df[columns]
     else:
-        df = pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
-                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+        df = pd.DataFrame(columns=columns)
     return df.astype(dtype)
 
 
-def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, incE=1., cpu=1):
+def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, incE=1., cpu=1, cache=None):
     """
     Call cmsearch to find attC sites in a single replicon.
 
@@ -115,64 +133,53 @@ def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, in
     :param str model_attc: path to the attc model (Covariance Matrix).
     :param float incE: consider sequences <= this E-value threshold as significant (to get the alignment with -A)
     :param int cpu: the number of cpu used by cmsearch.
+    :param cache: the cache where to look for the results of a previous run on the same replicon.
+                  The results are stored in the cache after cmsearch run.
+    :type cache: :class:`integron_finder.cache.ResultCache` object or None
     :returns: None, the results are written on the disk.
     :raises RuntimeError: when cmsearch run failed.
     """
+    out_path = os.path.join(out_dir, replicon_id + "_attc.res")
+    tblout_path = os.path.join(out_dir, replicon_id + "_attc_table.res")
+    out_files = {'attc.res': out_path, 'attc_table.res': tblout_path}
+    if cache is not None:
+        # the number of cpu does not change the results
+        cache_key = cache.key('cmsearch', tool_version(cmsearch_path),
+                              file_digest(replicon_path), file_digest(model_attc),
+                              '-E', 10, '--incE', incE)
+        if cache.get(cache_key, out_files):
+            _log.debug("cmsearch results for {} found in cache".format(replicon_id))
+            return
+
     cmsearch_cmd = "{cmsearch} --cpu {cpu} -A {out} --tblout {tblout_path} " \
                    "-E 10 --incE {incE} {mod_attc} {infile}".format(cmsearch=cmsearch_path,
                                                                     cpu=cpu,
-                                                                    out=os.path.join(out_dir,
-                                                                                     replicon_id + "_attc.res"),
-                                                                    tblout_path=os.path.join(out_dir,
-                                                                                             replicon_id +
-                                                                                             "_attc_table.res"),
+                                                                    out=out_path,
+                                                                    tblout_path=tblout_path,
                                                                     incE=incE,
                                                                     mod_attc=model_attc,
                                                                     infile=replicon_path)
     try:
         _log.debug("run cmsearch: {}".format(cmsearch_cmd))
-        with open(os.devnull, 'w') as dev_null:
+        with open(os.devnull, 'w') as dev_null, timing.stage('cmsearch'):
             returncode = call(cmsearch_cmd.split(), stdout=dev_null)
     except Exception as err:
         raise RuntimeError("{0} failed : {1}".format(cmsearch_cmd, err))
     if returncode != 0:
         raise RuntimeError("{0} failed returncode = {1}".format(cmsearch_cmd, returncode))
+    if cache is not None:
+        cache.put(cache_key, out_files)
 
 
-def local_max(replicon,
-              window_beg, window_end,
-              model_attc_path,
-              strand_search="both",
-              evalue_attc=1., max_attc_size=200, min_attc_size=40,
-              cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1):
+def _window_seq(replicon, window_beg, window_end):
     """
-    :param replicon: The name of replicon (without suffix)
+    :param replicon: The replicon
     :type replicon: :class:`Bio.Seq.SeqRecord` object.
-    :param int window_beg: Start of window to search for attc (position of protein).
-    :param int window_end: End of window to search for attc (position of protein).
-    :param str model_attc_path: The path to the covariance model for attc (eg: attc_4.cm)
-                                used by cmsearch to find attC sites
-    :param str strand_search: The strand on which to looking for attc.
-                              Available values:
-
-                                * 'top': Only search the top (Watson) strand of target sequences.
-                                * 'bottom': Only search the bottom (Crick) strand of target sequences
-                                * 'both': search on both strands
-
-    :param float evalue_attc: evalue threshold to filter out hits above it
-    :param int max_attc_size: The maximum value fot the attC size
-    :param int min_attc_size: The minimum value fot the attC size
-    :param str cmsearch_bin: The path to cmsearch
-    :param str out_dir: The path to directory where to write results
-    :param int cpu_nb: The number of cpu used by cmsearch
-    :return: DataFrame with same structure as the DataFrame returns by :func:`read_infernal`
-             where position are converted on position on replicon and attc are filtered
-             by evalue, min_attc_size, max_attc_size
-             also write a file with intermediate results <replicon_id>_subseq_attc_table_end.res
-             this file store the local_max results before filtering by max_attc_size and min_attc_size
-    :rtype: :class:`pandas.DataFrame` object
+    :param int window_beg: Start of window
+    :param int window_end: End of window
+    :return: the sequence of the window, if window_beg > window_end the window overlap the replicon origin
+    :rtype: :class:`Bio.Seq.SeqRecord` object.
     """
-    replicon_size = len(replicon)
     if window_beg < window_end:
         subseq = replicon[window_beg:window_end]
     else:
@@ -180,18 +187,21 @@ def local_max(replicon,
         subseq1 = replicon[window_beg:]
         subseq2 = replicon[:window_end]
         subseq = subseq1 + subseq2
+    return subseq
 
-    infile_path = os.path.join(out_dir, replicon.id + "_subseq.fst")
-    with open(infile_path, "w") as f:
-        SeqIO.write(subseq, f, "fasta")
 
-    output_path = os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc.res".format(name=replicon.id,
-                                                                                            win_beg=window_beg,
-                                                                                            win_end=window_end))
-    tblout_path = os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc_table.res".format(name=replicon.id,
-                                                                                                  win_beg=window_beg,
-                                                                                                  win_end=window_end))
+def _window_tblout_path(replicon, window_beg, window_end, out_dir):
+    return os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc_table.res".format(name=replicon.id,
+                                                                                          win_beg=window_beg,
+                                                                                          win_end=window_end))
 
+
+def _cmsearch_max(replicon_size, strand_search, infile_path, output_path, tblout_path,
+                  model_attc_path, evalue_attc, cmsearch_bin, cpu_nb):
+    """
+    Run cmsearch --max with the search space size of the whole replicon,
+    so the E-values do not depend on the size or on the number of the searched sequences.
+    """
     cmsearch_cmd = \
         "{bin} -Z {size} {strand} --max --cpu {cpu} -A {out} --tblout {tblout} -E 10 " \
         "--incE {incE} {mod_attc_path} {infile}".format(bin=cmsearch_bin,
@@ -207,12 +217,20 @@ def local_max(replicon,
                                                         infile=infile_path)
     try:
         _log.debug("run cmsearch: {}".format(cmsearch_cmd))
-        with open(os.devnull, 'w') as dev_null:
+        with open(os.devnull, 'w') as dev_null, timing.stage('cmsearch_local_max'):
             returncode = call(cmsearch_cmd.split(), stdout=dev_null)
     except Exception as err:
         raise RuntimeError("{0} failed : {1}".format(cmsearch_cmd, err))
     if returncode != 0:
         raise RuntimeError("{0} failed returncode = {1}".format(cmsearch_cmd, returncode))
+
+
+def _local_max_hits(replicon, window_beg, tblout_path, model_attc_path,
+                    evalue_attc, max_attc_size, min_attc_size, out_dir):
+    """
+    Parse the cmsearch results of one window and convert the positions on the window in positions on the replicon.
+    """
+    replicon_size = len(replicon)
     df_max = read_infernal(tblout_path,
                            replicon.id, model_len(model_attc_path),
                            evalue=evalue_attc,
@@ -236,51 +254,185 @@ def local_max(replicon,
     return df_max
 
 
-def expand(replicon,
-           window_beg, window_end, max_elt, df_max,
-           circular, dist_threshold, model_attc_path,
-           max_attc_size=200, min_attc_size=40, evalue_attc=1.,
-           search_left=False, search_right=False,
-           out_dir='.', cpu=1):
+def local_max(replicon,
+              window_beg, window_end,
+              model_attc_path,
+              strand_search="both",
+              evalue_attc=1., max_attc_size=200, min_attc_size=40,
+              cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1):
     """
-    for a given element, we can search on the left hand side (if integrase is on the right for instance)
-    or right hand side (opposite situation) or both side (only integrase or only attC sites)
-
-    :param replicon: The Replicon to annotate
-    :type replicon: a :class:`Bio.Seq.SeqRecord` object.
-    :param int window_beg: start of window to search for attc (position of protein)
-    :param int window_end: end of window to search for attc (position of protein)
-    :param max_elt: DataFrame with columns:
-        ::
+    :param replicon: The name of replicon (without suffix)
+    :type replicon: :class:`Bio.Seq.SeqRecord` object.
+    :param int window_beg: Start of window to search for attc (position of protein).
+    :param int window_end: End of window to search for attc (position of protein).
+    :param str model_attc_path: The path to the covariance model for attc (eg: attc_4.cm)
+                                used by cmsearch to find attC sites
+    :param str strand_search: The strand on which to looking for attc.
+                              Available values:
 
-            Accession_number cm_attC  cm_debut  cm_fin   pos_beg   pos_end sens   evalue
+                                * 'top': Only search the top (Watson) strand of target sequences.
+                                * 'bottom': Only search the bottom (Crick) strand of target sequences
+                                * 'both': search on both strands
 
-        and each row is an occurrence of attc site
+    :param float evalue_attc: evalue threshold to filter out hits above it
+    :param int max_attc_size: The maximum value fot the attC size
+    :param int min_attc_size: The minimum value fot the attC size
+    :param str cmsearch_bin: The path to cmsearch
+    :param str out_dir: The path to directory where to write results
+    :param int cpu_nb: The number of cpu used by cmsearch
+    :return: DataFrame with same structure as the DataFrame returns by :func:`read_infernal`
+             where position are converted on position on replicon and attc are filtered
+             by evalue, min_attc_size, max_attc_size
+             also write a file with intermediate results <replicon_id>_subseq_attc_table_end.res
+             this file store the local_max results before filtering by max_attc_size and min_attc_size
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    subseq = _window_seq(replicon, window_beg, window_end)
+    infile_path = os.path.join(out_dir, replicon.id + "_subseq.fst")
+    with open(infile_path, "w") as f:
+        SeqIO.write(subseq, f, "fasta")
 
-    :type max_elt: :class:`pandas.DataFrame` object
-    :param df_max: DataFrame with columns
-        ::
+    output_path = os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc.res".format(name=replicon.id,
+                                                                                            win_beg=window_beg,
+                                                                                            win_end=window_end))
+    tblout_path = _window_tblout_path(replicon, window_beg, window_end, out_dir)
+    _cmsearch_max(len(replicon), strand_search, infile_path, output_path, tblout_path,
+                  model_attc_path, evalue_attc, cmsearch_bin, cpu_nb)
+    return _local_max_hits(replicon, window_beg, tblout_path, model_attc_path,
+                           evalue_attc, max_attc_size, min_attc_size, out_dir)
 
-            Accession_number cm_attC  cm_debut  cm_fin   pos_beg   pos_end sens   evalue
 
-        and each row is an occurrence of attc site
+def local_max_batch(replicon, windows,
+                    model_attc_path,
+                    evalue_attc=1., max_attc_size=200, min_attc_size=40,
+                    cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1):
+    """
+    Same as :func:`local_max` but for several windows of the same replicon.
+    All windows to search on the same strand are written in one multi-sequence fasta file
+    and searched with only one cmsearch.
+    As cmsearch is run with the search space size of the replicon (-Z), each window get the same hits
+    as with :func:`local_max`, the tabulated output of cmsearch is split in one file per window.
 
-    :type df_max: :class:`pandas.DataFrame` object
-    :param bool circular: True if replicon topology is circular otherwise False.
-    :param int dist_threshold: Two elements are aggregated if they are distant of dist_threshold [4kb] or less
-    :param int max_attc_size: The maximum value for the attC size
-    :param int min_attc_size: The minimum value for the attC size
-    :param str model_attc_path: the path to the attc model file
+    :param replicon: The replicon
+    :type replicon: :class:`Bio.Seq.SeqRecord` object.
+    :param windows: the windows to search for attc
+    :type windows: list of tuple (int window_beg, int window_end, str strand_search)
+                   see :func:`local_max` for the available values of strand_search
+    :param str model_attc_path: The path to the covariance model for attc (eg: attc_4.cm)
     :param float evalue_attc: evalue threshold to filter out hits above it
-    :param bool search_left: trigger the local_max search on the left of the already detected element
-    :param bool search_right: trigger the local_max search on the right of the already detected element
+    :param int max_attc_size: The maximum value fot the attC size
+    :param int min_attc_size: The minimum value fot the attC size
+    :param str cmsearch_bin: The path to cmsearch
     :param str out_dir: The path to directory where to write results
-    :param int cpu: the number of cpu use by expand
-    :return: a copy of max_elt with attC hits
-    :rtype: :class:`pandas.DataFrame` object
+    :param int cpu_nb: The number of cpu used by cmsearch
+    :return: for each window (in the same order as windows) the DataFrame as returned by :func:`local_max`
+    :rtype: list of :class:`pandas.DataFrame` object
+    """
+    by_strand = {}
+    for window in windows:
+        win_beg, win_end, strand_search = window
+        # the same window can be requested several times
+        strand_windows = by_strand.setdefault(strand_search, [])
+        if (win_beg, win_end) not in strand_windows:
+            strand_windows.append((win_beg, win_end))
+
+    results = {}
+    for strand_search, strand_windows in by_strand.items():
+        infile_path = os.path.join(out_dir, replicon.id + "_subseq.fst")
+        # short names, the width of the target name column of the tabulated output
+        # is the same as with only the replicon
+        win_names = ["win_{}".format(i) for i in range(len(strand_windows))]
+        with open(infile_path, "w") as f:
+            for win_name, (win_beg, win_end) in zip(win_names, strand_windows):
+                subseq = _window_seq(replicon, win_beg, win_end)
+                # keep the same target description as with the replicon id
+                if subseq.description.split(None, 1)[:1] == [subseq.id]:
+                    subseq.description = subseq.description[len(subseq.id):].strip()
+                subseq.id = win_name
+                f.write(subseq.format("fasta"))
+
+        output_path = os.path.join(out_dir, "{}_subseq_attc.res".format(replicon.id))
+        tblout_path = os.path.join(out_dir, "{}_subseq_attc_table.res".format(replicon.id))
+        _cmsearch_max(len(replicon), strand_search, infile_path, output_path, tblout_path,
+                      model_attc_path, evalue_attc, cmsearch_bin, cpu_nb)
+        win_tblout_paths = [_window_tblout_path(replicon, win_beg, win_end, out_dir)
+                            for win_beg, win_end in strand_windows]
+        _split_tblout(tblout_path, replicon.id, dict(zip(win_names, win_tblout_paths)))
+
+        for (win_beg, win_end), win_tblout_path in zip(strand_windows, win_tblout_paths):
+            results[(win_beg, win_end, strand_search)] = _local_max_hits(replicon, win_beg, win_tblout_path,
+                                                                         model_attc_path, evalue_attc,
+                                                                         max_attc_size, min_attc_size, out_dir)
+    return [results[window].copy() for window in windows]
+
+
+def _split_tblout(tblout_path, replicon_id, outputs):
+    """
+    Split a cmsearch tabulated output by target, the name of the target is replaced by the replicon_id.
 
+    :param str tblout_path: the path of the cmsearch tabulated output to split
+    :param str replicon_id: the replicon id which replace the target names
+    :param dict outputs: the target name as key, the path of the tabulated output for this target as value
+    """
+    header = []
+    footer = []
+    hits = {}
+    with open(tblout_path) as tblout:
+        for line in tblout:
+            if line.startswith('#'):
+                if len(header) < 2:
+                    header.append(line)
+                else:
+                    footer.append(line)
+            else:
+                target, _ = line.split(None, 1)
+                hits.setdefault(target, []).append(line)
+    for target, path in outputs.items():
+        target_hits = hits.get(target, [])
+        tgt_header = header
+        if target_hits:
+            # cmsearch align the target name column on the longest target name
+            width = len(header[1].split()[0])
+            new_width = max(20, len(replicon_id))
+            target_hits = [replicon_id.ljust(new_width) + line[width:] for line in target_hits]
+            tgt_header = ["#target name".ljust(new_width) + header[0][width:],
+                          "#" + "-" * (new_width - 1) + header[1][width:]]
+        with open(path, 'w') as out:
+            out.writelines(tgt_header)
+            out.writelines(target_hits)
+            out.writelines(footer)
+
+
+def run_window_search(search, search_window):
+    """
+    Drive a window search one window at a time.
+
+    :param search: a generator which yields windows to search (window_beg, window_end, strand_search),
+                   receives the attC hits found in the window and returns the result of the search.
+    :type search: generator
+    :param search_window: the function called for each window with window_beg, window_end, strand_search
+                          which returns the attC hits found in the window.
+    :return: the result of the search
+    """
+    try:
+        window = next(search)
+        while True:
+            window = search.send(search_window(*window))
+    except StopIteration as stop:
+        return stop.value
+
+
+def expand_windows(replicon_size,
+                   window_beg, window_end, max_elt, df_max,
+                   circular, dist_threshold, max_attc_size=200,
+                   search_left=False, search_right=False):
+    """
+    The steps of :func:`expand`.
+    This generator yields the windows to search (window_beg, window_end, strand_search),
+    receives the attC hits found in the window (as returned by :func:`local_max`),
+    and returns max_elt with all attC hits.
+    See :func:`expand` for the parameters.
     """
-    replicon_size = len(replicon)
     # for a given element, we can search on the left hand side of it
     # (if the integrase is on the right and attC sites on the left for instance),
     # on the right hand side of it (opposite situation), or on both sides (only integrase or only attC sites)
@@ -301,15 +453,7 @@ def expand(replicon,
         searched_strand = "both" if search_left else "top"  # search on both strands if search in both directions
 
         while not df_max.empty and 0 < (window_beg and window_end) < replicon_size:
-            df_max = local_max(replicon,
-                               window_beg, window_end,
-                               model_attc_path,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,
-                               strand_search=searched_strand,
-                               out_dir=out_dir, cpu_nb=cpu,
-                               evalue_attc=evalue_attc
-                               )
+            df_max = yield window_beg, window_end, searched_strand
             max_elt = pd.concat([max_elt, df_max])
 
             if circular:
@@ -335,16 +479,7 @@ def expand(replicon,
         searched_strand = "both" if search_right else "bottom"
 
         while not df_max.empty and 0 < (window_beg and window_end) < replicon_size:
-
-            df_max = local_max(replicon,
-                               window_beg, window_end,
-                               model_attc_path,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,
-                               strand_search=searched_strand,
-                               out_dir=out_dir,
-                               cpu_nb=cpu,
-                               evalue_attc=evalue_attc)
+            df_max = yield window_beg, window_end, searched_strand
             max_elt = pd.concat([max_elt, df_max])  # update of attC list of hits.
 
             if circular:
@@ -357,3 +492,67 @@ def expand(replicon,
     max_elt.drop_duplicates(inplace=True)
     max_elt.index = list(range(len(max_elt)))
     return max_elt
+
+
+def expand(replicon,
+           window_beg, window_end, max_elt, df_max,
+           circular, dist_threshold, model_attc_path,
+           max_attc_size=200, min_attc_size=40, evalue_attc=1.,
+           search_left=False, search_right=False,
+           out_dir='.', cpu=1, cmsearch_bin='cmsearch'):
+    """
+    for a given element, we can search on the left hand side (if integrase is on the right for instance)
+    or right hand side (opposite situation) or both side (only integrase or only attC sites)
+
+    :param replicon: The Replicon to annotate
+    :type replicon: a :class:`Bio.Seq.SeqRecord` object.
+    :param int window_beg: start of window to search for attc (position of protein)
+    :param int window_end: end of window to search for attc (position of protein)
+    :param max_elt: DataFrame with columns:
+        ::
+
+            Accession_number cm_attC  cm_debut  cm_fin   pos_beg   pos_end sens   evalue
+
+        and each row is an occurrence of attc site
+
+    :type max_elt: :class:`pandas.DataFrame` object
+    :param df_max: DataFrame with columns
+        ::
+
+            Accession_number cm_attC  cm_debut  cm_fin   pos_beg   pos_end sens   evalue
+
+        and each row is an occurrence of attc site
+
+    :type df_max: :class:`pandas.DataFrame` object
+    :param bool circular: True if replicon topology is circular otherwise False.
+    :param int dist_threshold: Two elements are aggregated if they are distant of dist_threshold [4kb] or less
+    :param int max_attc_size: The maximum value for the attC size
+    :param int min_attc_size: The minimum value for the attC size
+    :param str model_attc_path: the path to the attc model file
+    :param float evalue_attc: evalue threshold to filter out hits above it
+    :param bool search_left: trigger the local_max search on the left of the already detected element
+    :param bool search_right: trigger the local_max search on the right of the already detected element
+    :param str out_dir: The path to directory where to write results
+    :param int cpu: the number of cpu use by expand
+    :param str cmsearch_bin: The path to cmsearch
+    :return: a copy of max_elt with attC hits
+    :rtype: :class:`pandas.DataFrame` object
+
+    """
+    search = expand_windows(len(replicon),
+                            window_beg, window_end, max_elt, df_max,
+                            circular, dist_threshold, max_attc_size=max_attc_size,
+                            search_left=search_left, search_right=search_right)
+
+    def search_window(win_beg, win_end, strand_search):
+        return local_max(replicon,
+                         win_beg, win_end,
+                         model_attc_path,
+                         max_attc_size=max_attc_size,
+                         min_attc_size=min_attc_size,
+                         strand_search=strand_search,
+                         out_dir=out_dir, cpu_nb=cpu,
+                         evalue_attc=evalue_attc,
+                         cmsearch_bin=cmsearch_bin)
+
+    return run_window_search(search, search_window)
@@ -31,6 +31,9 @@ from subprocess import call
 import colorlog
 
 from . import EmptyFileError
+from .cache import file_digest, tool_version
+from .hmm import domtblout_path
+from . import timing
 
 _log = colorlog.getLogger(__name__)
 
@@ -48,8 +51,6 @@ def find_integrase(replicon_id, prot_file, out_dir, cfg):
     :returns: None, the results are written on the disk
     """
 
-    intI_hmm_out = os.path.join(out_dir, replicon_id + "_intI.res")
-    hmm_cmd = []
     if not os.path.exists(prot_file):
         msg = "The protein file: '{}' does not exists cannot perform hmmsearch on it.".format(prot_file)
         _log.warning(msg)
@@ -59,28 +60,173 @@ def find_integrase(replicon_id, prot_file, out_dir, cfg):
         _log.warning(msg)
         raise EmptyFileError(msg)
 
-    if not os.path.isfile(intI_hmm_out):
-        hmm_cmd.append([cfg.hmmsearch,
-                        "--cpu", str(cfg.cpu),
-                        "--tblout", os.path.join(out_dir, replicon_id + "_intI_table.res"),
-                        "-o", intI_hmm_out,
-                        cfg.model_integrase,
-                        prot_file])
-
-    phage_hmm_out = os.path.join(out_dir, replicon_id + "_phage_int.res")
-    if not os.path.isfile(phage_hmm_out):
-        hmm_cmd.append([cfg.hmmsearch,
-                        "--cpu", str(cfg.cpu),
-                        "--tblout", os.path.join(out_dir, replicon_id + "_phage_int_table.res"),
-                        "-o", phage_hmm_out,
-                        cfg.model_phage_int,
-                        prot_file])
-
-    for cmd in hmm_cmd:
-        try:
-            _log.debug("run hmmsearch: {}".format(' '.join(cmd)))
+    searches = [(cfg.model_integrase,
+                 os.path.join(out_dir, replicon_id + "_intI.res"),
+                 os.path.join(out_dir, replicon_id + "_intI_table.res")),
+                (cfg.model_phage_int,
+                 os.path.join(out_dir, replicon_id + "_phage_int.res"),
+                 os.path.join(out_dir, replicon_id + "_phage_int_table.res"))
+                ]
+    cache = cfg.cache
+    to_search = []
+    for model, hmm_out, hmm_tblout in searches:
+        if os.path.isfile(hmm_out):
+            continue
+        cache_key = None
+        if cache is not None:
+            # the number of cpu does not change the results
+            cache_key = cache.key('hmmsearch', tool_version(cfg.hmmsearch),
+                                  file_digest(prot_file), file_digest(model), '--domtblout')
+            if cache.get(cache_key, _cached_files(hmm_out, hmm_tblout)):
+                _log.debug("hmmsearch results for {} with {} found in cache".format(replicon_id, model))
+                continue
+        to_search.append((model, hmm_out, hmm_tblout, cache_key))
+
+    if cfg.combined_integrase_search and len(to_search) > 1:
+        # hmmsearch runs its pipeline once per query profile over the whole protein file,
+        # so gathering the profiles saves one process launch, not a pass over the proteins.
+        combined_model = os.path.join(out_dir, replicon_id + "_integrases.hmm")
+        combined_out = os.path.join(out_dir, replicon_id + "_integrases.res")
+        combined_tblout = os.path.join(out_dir, replicon_id + "_integrases_table.res")
+        outputs = []
+        with open(combined_model, 'w') as combined_file:
+            for model, hmm_out, hmm_tblout, _ in to_search:
+                with open(model) as model_file:
+                    combined_file.write(model_file.read())
+                outputs.append((hmm_names(model), hmm_out, hmm_tblout))
+        _run_hmmsearch(combined_model, combined_out, combined_tblout, prot_file, cfg)
+        split_hmm_results(combined_out, combined_tblout, outputs)
+    else:
+        for model, hmm_out, hmm_tblout, _ in to_search:
+            _run_hmmsearch(model, hmm_out, hmm_tblout, prot_file, cfg)
+
+    if cache is not None:
+        for _, hmm_out, hmm_tblout, cache_key in to_search:
+            cache.put(cache_key, _cached_files(hmm_out, hmm_tblout))
+
+
+def _cached_files(hmm_out, hmm_tblout):
+    """
+    :param str hmm_out: the path of the hmmsearch output
+    :param str hmm_tblout: the path of the hmmsearch tabulated output
+    :return: the files of a hmmsearch result to store in the cache
+    :rtype: dict
+    """
+    return {'hmm.res': hmm_out, 'hmm_table.res': hmm_tblout, 'hmm_domtbl.res': domtblout_path(hmm_out)}
+
+
+def _run_hmmsearch(model, hmm_out, hmm_tblout, prot_file, cfg):
+    """
+    Run hmmsearch with the profile(s) of model against the proteins of prot_file.
+    The domain tabulated output is written beside hmm_out (see :func:`integron_finder.hmm.domtblout_path`).
+
+    :param str model: the path to the hmm profile(s) file
+    :param str hmm_out: the path of the hmmsearch output
+    :param str hmm_tblout: the path of the hmmsearch tabulated output
+    :param str prot_file: the path to the fasta file containing the proteins to search
+    :param cfg: the configuration
+    :type cfg: a :class:`integron_finder.config.Config` object
+    :raise RuntimeError: if hmmsearch failed
+    """
+    cmd = [cfg.hmmsearch,
+           "--cpu", str(cfg.cpu),
+           "--tblout", hmm_tblout,
+           "--domtblout", domtblout_path(hmm_out),
+           "-o", hmm_out,
+           model,
+           prot_file]
+    try:
+        _log.debug("run hmmsearch: {}".format(' '.join(cmd)))
+        with timing.stage('hmmsearch_integrase'):
             returncode = call(cmd)
-        except Exception as err:
-            raise RuntimeError("{0} failed : {1}".format(' '.join(cmd), err))
-        if returncode != 0:
-            raise RuntimeError("{0} failed return code = {1}".format(' '.join(cmd), returncode))
+    except Exception as err:
+        raise RuntimeError("{0} failed : {1}".format(' '.join(cmd), err))
+    if returncode != 0:
+        raise RuntimeError("{0} failed return code = {1}".format(' '.join(cmd), returncode))
+
+
+def hmm_names(model):
+    """
+    :param str model: the path to a hmm profile file
+    :return: the names of the profiles in the file
+    :rtype: list of str
+    """
+    with open(model) as model_file:
+        return [line.split()[1] for line in model_file if line.startswith('NAME ')]
+
+
+def split_hmm_results(hmm_out, hmm_tblout, outputs):
+    """
+    Split the results of one hmmsearch with several profiles (query) in one result per query,
+    as if hmmsearch was run with each profile separately.
+    hmmsearch computes the E-values against the number of target sequences, so they do not depend on
+    the number of profiles searched.
+
+    The domain tabulated outputs are split too (see :func:`integron_finder.hmm.domtblout_path`).
+
+    :param str hmm_out: the path of the hmmsearch output
+    :param str hmm_tblout: the path of the hmmsearch tabulated output
+    :param outputs: for each result to produce, the names of the queries,
+                    the path of the output and the path of the tabulated output.
+    :type outputs: list of tuple (list of str, str, str)
+    """
+    with open(hmm_out) as hmm_file:
+        header = []
+        blocks = {}
+        block = None
+        for line in hmm_file:
+            if line.startswith('Query:'):
+                block = blocks.setdefault(line.split()[1], [])
+            if block is None:
+                if not line.startswith('[ok]'):
+                    header.append(line)
+            else:
+                block.append(line)
+                if line.startswith('//'):
+                    block = None
+
+    # target name, accession, query name, ...
+    tbl_header, hits, tbl_footer = _split_table(hmm_tblout, 2)
+    # target name, accession, tlen, query name, ...
+    domtbl_header, domains, domtbl_footer = _split_table(domtblout_path(hmm_out), 3)
+
+    for queries, out, tblout in outputs:
+        with open(out, 'w') as out_file:
+            out_file.writelines(header)
+            for query in queries:
+                out_file.writelines(blocks.get(query, []))
+            out_file.write('[ok]\n')
+        for path, header_lines, lines, footer in ((tblout, tbl_header, hits, tbl_footer),
+                                                  (domtblout_path(out), domtbl_header, domains, domtbl_footer)):
+            with open(path, 'w') as tbl_file:
+                tbl_file.writelines(header_lines)
+                for query in queries:
+                    tbl_file.writelines(lines.get(query, []))
+                tbl_file.writelines(footer)
+
+
+def _split_table(path, query_col):
+    """
+    Parse a hmmsearch tabulated output (--tblout or --domtblout)
+
+    :param str path: the path of the tabulated output
+    :param int query_col: the index of the query name column
+    :return: the header lines, the lines of each query (the query name as key), the footer lines
+    :rtype: tuple (list of str, dict, list of str)
+    """
+    with open(path) as tbl_file:
+        header = []
+        footer = []
+        lines = {}
+        in_header = True
+        for line in tbl_file:
+            if line.startswith('#'):
+                if in_header:
+                    header.append(line)
+                    # the header ends with the '#----- ---' line
+                    in_header = not line.startswith('#-')
+                else:
+                    footer.append(line)
+            else:
+                lines.setdefault(line.split()[query_col], []).append(line)
+    return header, lines, footer
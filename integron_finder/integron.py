@@ -27,22 +27,20 @@
 ####################################################################################
 
 import os
+from collections import namedtuple
+from functools import lru_cache
 import colorlog
 import numpy as np
 import pandas as pd
 
-from matplotlib import use as m_use
-m_use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.colors
-
-from Bio import Seq
 from Bio import SeqIO
-from Bio import motifs
+
+# matplotlib is slow to import and needed only with --pdf so it is imported in draw_integron
 
 from .hmm import read_hmm
 from .infernal import read_infernal
-from .attc import search_attc
+from .attc import attc_arrays
+from .motif import Motif, MotifMatcher
 
 _log = colorlog.getLogger(__name__)
 
@@ -109,104 +107,59 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
                              size_min_attc=cfg.min_attc_size)
         attc.sort_values(["Accession_number", "pos_beg", "evalue"], inplace=True)
 
-    # attc_ac = list of Dataframe, each have a an array of attC
-    attc_ac = search_attc(attc, cfg.keep_palindromes, cfg.distance_threshold, len(replicon))
+    # attc_ac = the arrays of attC, each array is a range of rows of attc_ac.hits
+    attc_ac = attc_arrays(attc, cfg.keep_palindromes, cfg.distance_threshold, len(replicon))
+    attc_values = attc_ac.hits.values
+    # the index of the arrays not yet attributed to an integrase
+    attc_remaining = list(range(len(attc_ac)))
     integrons = []
 
-    if not intI_ac.empty and attc_ac:
-        n_attc_array = len(attc_ac)
-        # If an array hasn't been clustered with an Integrase
-        # or if an integrase lacks an array
-        # redundant info, we could check for len(attc_ac)==0
-        # -> to remove
+    if not intI_ac.empty and attc_remaining:
+        assigner = _AttcArrayAssigner(attc_ac.hits.pos_beg.values[attc_ac.starts],
+                                      attc_ac.hits.pos_end.values[attc_ac.ends - 1],
+                                      len(replicon),
+                                      replicon.topology == 'circ')
         for i, id_int in enumerate(intI_ac.ID_prot.values):  # For each Integrase
-
-            if n_attc_array == 0:  # No more array to attribute to an integrase
-
-                integrons.append(Integron(replicon, cfg))
-                integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                            intI_ac.pos_end.values[i],
-                                            id_int,
-                                            int(intI_ac.strand.values[i]),
-                                            intI_ac.evalue.values[i],
-                                            intI_ac.query_name.values[i])
-
-            else:  # we still have attC and int :
-                attc_left = np.array([i_attc.pos_beg.values[0] for i_attc in attc_ac])
-                attc_right = np.array([i_attc.pos_end.values[-1] for i_attc in attc_ac])
-
-                if replicon.topology == 'circ':
-                    distances = np.array([(attc_left - intI_ac.pos_end.values[i]),
-                                          (intI_ac.pos_beg.values[i] - attc_right)]) % len(replicon)
-                else:
-                    distances = np.array([abs(attc_left - intI_ac.pos_end.values[i]),
-                                          abs(intI_ac.pos_beg.values[i] - attc_right)])
-                if attc_ac:
-                    # tmp = (distances /
-                    #       np.array([[len(aac) for aac in attc_ac]]))
-
-                    side, idx_attc = np.where(distances == distances.min())
-                    # side : 0 <=> left; 1 <=> right
-                    # index of the closest and biggest attC array to the integrase
-                    # exactly tmp = dist(cluster to integrase) / size cluster
-                    # to make a decision between 2 equally distant arrays
-                    # Usually they are on the same side but on 2 different strands
-
-                    # If they are exactly similar (same distance, same number of attC, take the first one arbitrarily
-                    # Or just flatten from idx_attc=[i] to idx_attc=i
-                    idx_attc = idx_attc[0]
-                    side = side[0]
-
-                else:
-                    idx_attc = 0
-                    side = np.argmin(distances)
-
-                if distances[side, idx_attc] < cfg.distance_threshold:
-                    integrons.append(Integron(replicon, cfg))
-                    integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                                intI_ac.pos_end.values[i],
-                                                id_int,
-                                                int(intI_ac.strand.values[i]),
-                                                intI_ac.evalue.values[i],
-                                                intI_ac.query_name.values[i])
-
-                    attc_tmp = attc_ac.pop(idx_attc)
-
-                    for a_tmp in attc_tmp.values:
-                        integrons[-1].add_attC(a_tmp[4],
-                                               a_tmp[5],
-                                               1 if a_tmp[6] == "+" else -1,
-                                               a_tmp[7], cfg.model_attc_name)
-                    n_attc_array -= 1
-
-                else:  # no array close to the integrase on both side
-                    integrons.append(Integron(replicon, cfg))
-                    integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                                intI_ac.pos_end.values[i],
-                                                id_int,
-                                                int(intI_ac.strand.values[i]),
-                                                intI_ac.evalue.values[i], intI_ac.query_name.values[i])
-
-        if n_attc_array > 0:  # after the integrase loop (<=> no more integrases)
-            for attc_array in attc_ac:
-                integrons.append(Integron(replicon, cfg))
-
-                for a_tmp in attc_array.values:
+            integrons.append(Integron(replicon, cfg))
+            integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
+                                        intI_ac.pos_end.values[i],
+                                        id_int,
+                                        int(intI_ac.strand.values[i]),
+                                        intI_ac.evalue.values[i],
+                                        intI_ac.query_name.values[i])
+            if not assigner:
+                # No more array to attribute to an integrase
+                continue
+            distance, array_idx = assigner.closest(intI_ac.pos_beg.values[i], intI_ac.pos_end.values[i])
+            if distance < cfg.distance_threshold:
+                assigner.remove(array_idx)
+                for a_tmp in attc_values[attc_ac.starts[array_idx]:attc_ac.ends[array_idx]]:
                     integrons[-1].add_attC(a_tmp[4],
                                            a_tmp[5],
                                            1 if a_tmp[6] == "+" else -1,
                                            a_tmp[7], cfg.model_attc_name)
+            # else no array close to the integrase on both side
+
+        # after the integrase loop (<=> no more integrases)
+        for array_idx in assigner.remaining():
+            integrons.append(Integron(replicon, cfg))
+
+            for a_tmp in attc_values[attc_ac.starts[array_idx]:attc_ac.ends[array_idx]]:
+                integrons[-1].add_attC(a_tmp[4],
+                                       a_tmp[5],
+                                       1 if a_tmp[6] == "+" else -1,
+                                       a_tmp[7], cfg.model_attc_name)
 
-    elif intI_ac.pos_end.values.size == 0 and attc_ac:  # If attC only
-        for attc_array in attc_ac:
+    elif intI_ac.pos_end.values.size == 0 and attc_remaining:  # If attC only
+        for array_idx in attc_remaining:
             integrons.append(Integron(replicon, cfg))
-            for a_tmp in attc_array.values:
+            for a_tmp in attc_values[attc_ac.starts[array_idx]:attc_ac.ends[array_idx]]:
                 integrons[-1].add_attC(a_tmp[4],
                                        a_tmp[5],
                                        1 if a_tmp[6] == "+" else -1,
                                        a_tmp[7], cfg.model_attc_name)
 
-    elif intI_ac.pos_end.values.size >= 1 and not attc_ac:  # If intI only
+    elif intI_ac.pos_end.values.size >= 1 and not attc_remaining:  # If intI only
         for i, id_int in enumerate(intI_ac.ID_prot.values):
             integrons.append(Integron(replicon, cfg))
             integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
@@ -222,7 +175,7 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
     # Only after local_max if it will be called
     if (cfg.local_max and local_max_done) or not cfg.local_max:
         _log.debug("filter out 'CALIN' with less attC sites than {}".format(cfg.calin_threshold))
-        integrons = [i for i in integrons if i.type() != 'CALIN' or len(i.attC) >= cfg.calin_threshold]
+        integrons = [i for i in integrons if i.type() != 'CALIN' or len(i._attC) >= cfg.calin_threshold]
 
     ###############
     # log summary #
@@ -241,6 +194,284 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
     return integrons
 
 
+"""The matcher of the known promoters and attI sites and the indexes of the Pint, Pc and attI motifs in it"""
+_KnownMotifs = namedtuple('_KnownMotifs', ('matcher', 'pint', 'pc', 'attI'))
+
+
+@lru_cache(maxsize=4)
+def _known_motifs(variants_pc_path):
+    """
+    Build once the matcher of all the known promoters and attI sites.
+
+    :param str variants_pc_path: the path to the fasta file of the variants of Pc_intI1
+    :return: the matcher and the indexes of the motifs Pint, Pc and attI
+    :rtype: :class:`_KnownMotifs` object
+    """
+    # PintI1, PintI2 and PintI3 are not known
+    pint = [Motif("P_intI1", ["TTGCTGCTTGGATGCCCGAGGCATAGACTGTACA"])]
+
+    # Pc-int1 one motif by length of the variants
+    # Pc-int2 is not known
+    variants = {}
+    for variant in SeqIO.parse(variants_pc_path, "fasta"):
+        variants.setdefault(len(variant), []).append(str(variant.seq).upper())
+    pc = [Motif("Pc_int1", instances) for instances in variants.values()]
+    pc.append(Motif("Pc_int3", ["TAGACATAAGCTTTCTCGGTCTGTAGGCTGTAATG",
+                                "TAGACATAAGCTTTCTCGGTCTGTAGGATGTAATG"]))
+
+    attI = [Motif("attI1", ['TGATGTTATGGAGCAGCAACGATGTTACGCAGCAGGGCAGTCGCCCTAAAACAAAGTT']),
+            Motif("attI2", ['TTAATTAACGGTAAGCATCAGCGGGTGACAAAACGAGCATGCTTACTAATAAAATGTT']),
+            Motif("attI3", ['CTTTGTTTAACGACCACGGTTGTGGGTATCCGGTGTTTGGTCAGATAAACCACAAGTT'])]
+
+    motifs = pint + pc + attI
+    indexes = list(range(len(motifs)))
+    return _KnownMotifs(MotifMatcher(motifs),
+                        indexes[:len(pint)],
+                        indexes[len(pint):len(pint) + len(pc)],
+                        indexes[len(pint) + len(pc):])
+
+
+class _SortedFreeKeys:
+    """
+    Keys sorted once, which can be removed, to search the nearest remaining key of a value.
+    The equal keys are sorted by index, so among equal keys the one of lowest index is found.
+    The removed keys are skipped with 'union-find' pointers, so each search is almost constant time.
+    """
+
+    def __init__(self, keys):
+        """
+        :param keys: the keys
+        :type keys: :class:`numpy.ndarray`
+        """
+        self.order = np.lexsort((np.arange(len(keys)), keys))
+        self.keys = keys[self.order]
+        # the sorted position of each key
+        self.rank = np.empty(len(keys), dtype=int)
+        self.rank[self.order] = np.arange(len(keys))
+        self._group_start = np.searchsorted(self.keys, self.keys, side='left')
+        # _next[i] leads to the first free position >= i (len(keys) if there is not)
+        self._next = list(range(len(keys) + 1))
+        # _prev[i + 1] leads to the last free position <= i (-1 if there is not)
+        self._prev = list(range(len(keys) + 1))
+
+    @staticmethod
+    def _find(pointers, i):
+        root = i
+        while pointers[root] != root:
+            root = pointers[root]
+        while pointers[i] != root:
+            pointers[i], i = root, pointers[i]
+        return root
+
+    def first_from(self, pos):
+        """
+        :param int pos: a sorted position
+        :return: the first sorted position >= pos of a free key, None if there is not
+        """
+        found = self._find(self._next, pos)
+        return None if found == len(self.keys) else found
+
+    def last_until(self, pos):
+        """
+        :param int pos: a sorted position
+        :return: the last sorted position <= pos of a free key, or None if there is not.
+                 If several free keys are equal, the position of the one of lowest index.
+        """
+        if pos < 0:
+            return None
+        found = self._find(self._prev, pos + 1) - 1
+        if found < 0:
+            return None
+        return self.first_from(self._group_start[found])
+
+    def remove(self, idx):
+        """
+        :param int idx: the index of the key to remove
+        """
+        pos = self.rank[idx]
+        self._next[pos] = pos + 1
+        self._prev[pos + 1] = pos
+
+    def after(self, value, wrap=False):
+        """
+        :return: the index of the first free key >= value, if there is not and wrap is True the first free key.
+        :rtype: int or None
+        """
+        pos = self.first_from(int(np.searchsorted(self.keys, value, side='left')))
+        if pos is None and wrap:
+            pos = self.first_from(0)
+        return None if pos is None else self.order[pos]
+
+    def before(self, value, wrap=False):
+        """
+        :return: the index of the last free key <= value, if there is not and wrap is True the last free key.
+        :rtype: int or None
+        """
+        pos = self.last_until(int(np.searchsorted(self.keys, value, side='right')) - 1)
+        if pos is None and wrap:
+            pos = self.last_until(len(self.keys) - 1)
+        return None if pos is None else self.order[pos]
+
+
+class _AttcArrayAssigner:
+    """
+    Find the closest attC array to an integrase among the arrays not yet attributed.
+
+    The distance of an array on the right of the integrase is (array beginning - integrase end),
+    the distance of an array on the left is (integrase beginning - array end), modulo the replicon size
+    on circular replicons, absolute value otherwise.
+    When several arrays are at the same distance, an array on the right is preferred,
+    then the array of lowest index.
+    The beginnings and the ends of the arrays are sorted once, so each search is in O(log(arrays)).
+    """
+
+    def __init__(self, attc_left, attc_right, replicon_size, circular):
+        """
+        :param attc_left: the beginning of each array
+        :type attc_left: :class:`numpy.ndarray` of int
+        :param attc_right: the end of each array
+        :type attc_right: :class:`numpy.ndarray` of int
+        :param int replicon_size: the length of the replicon
+        :param bool circular: True if the replicon is circular
+        """
+        self.attc_left = attc_left
+        self.attc_right = attc_right
+        self.replicon_size = replicon_size
+        self.circular = circular
+        if circular:
+            attc_left = attc_left % replicon_size
+            attc_right = attc_right % replicon_size
+        self._left = _SortedFreeKeys(attc_left)
+        self._right = _SortedFreeKeys(attc_right)
+        self._free = np.ones(len(attc_left), dtype=bool)
+        self._free_nb = len(attc_left)
+
+    def __len__(self):
+        return self._free_nb
+
+    def _distance(self, side, array_idx, int_beg, int_end):
+        if side == 0:
+            dist = self.attc_left[array_idx] - int_end
+        else:
+            dist = int_beg - self.attc_right[array_idx]
+        return dist % self.replicon_size if self.circular else abs(dist)
+
+    def closest(self, int_beg, int_end):
+        """
+        :param int int_beg: the beginning of the integrase
+        :param int int_end: the end of the integrase
+        :return: the distance and the index of the closest array
+        :rtype: tuple (int distance, int array index)
+        """
+        if self.circular:
+            candidates = [(0, self._left.after(int_end % self.replicon_size, wrap=True)),
+                          (1, self._right.before(int_beg % self.replicon_size, wrap=True))]
+        else:
+            candidates = [(0, self._left.after(int_end)),
+                          (0, self._left.before(int_end)),
+                          (1, self._right.after(int_beg)),
+                          (1, self._right.before(int_beg))]
+        return min((self._distance(side, idx, int_beg, int_end), side, idx)
+                   for side, idx in candidates if idx is not None)[::2]
+
+    def remove(self, array_idx):
+        """
+        Attribute the array to an integrase, it is not a candidate anymore
+
+        :param int array_idx: the index of the array
+        """
+        self._left.remove(array_idx)
+        self._right.remove(array_idx)
+        self._free[array_idx] = False
+        self._free_nb -= 1
+
+    def remaining(self):
+        """
+        :return: the index of the arrays not attributed, in ascending order
+        :rtype: list of int
+        """
+        return np.flatnonzero(self._free).tolist()
+
+
+class _ElementStore:
+    """
+    Store the elements of one kind (integrase, attC, promoter, ...) of an integron.
+    The elements are appended in lists, in amortized O(1), and the DataFrame is built
+    only when it is needed, then kept until new elements are appended.
+    """
+
+    __slots__ = ('_columns', '_dtype', '_frame', '_rows', '_index')
+
+    def __init__(self, columns, dtype):
+        """
+        :param columns: the columns of the DataFrame
+        :type columns: list of str
+        :param dict dtype: the type of each column
+        """
+        self._columns = columns
+        self._dtype = dtype
+        self._frame = None
+        self._rows = []
+        self._index = []
+
+    def __len__(self):
+        return (0 if self._frame is None else len(self._frame)) + len(self._rows)
+
+    @property
+    def pending(self):
+        """
+        :return: True if some elements have been appended since the last DataFrame was built.
+        :rtype: bool
+        """
+        return bool(self._rows)
+
+    def append(self, index, row):
+        """
+        :param index: the index of the new element
+        :param row: the values of the new element in the columns order
+        :type row: list
+        """
+        self._index.append(index)
+        self._rows.append(row)
+
+    def last(self, column):
+        """
+        :param str column: the name of the column
+        :return: the value of column for the last element
+        """
+        if self._rows:
+            return self._rows[-1][self._columns.index(column)]
+        return self._frame[column].values[-1]
+
+    def frame(self):
+        """
+        :return: the elements
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        if self._frame is None and not self._rows:
+            self._frame = pd.DataFrame(columns=self._columns)
+            self._frame = self._frame.astype(dtype=self._dtype)
+        elif self._rows:
+            new = pd.DataFrame(self._rows, index=self._index, columns=self._columns)
+            new = new.astype(dtype=self._dtype)
+            if self._frame is None or self._frame.empty:
+                self._frame = new
+            else:
+                self._frame = pd.concat([self._frame, new])
+            self._rows = []
+            self._index = []
+        return self._frame
+
+    def set_frame(self, frame):
+        """
+        :param frame: the new elements, replace all the previous ones
+        :type frame: :class:`pandas.DataFrame` object
+        """
+        self._frame = frame
+        self._rows = []
+        self._index = []
+
+
 class Integron(object):
     """Integron object represents an object composed of an integrase, attC sites and gene cassettes.
     Each element is characterized by their coordinates in the replicon, the strand (+ or -),
@@ -266,26 +497,83 @@ class Integron(object):
                        "model": "str",
                        "distance_2attC": "float",
                        "annotation": "str"}
-        self.integrase = pd.DataFrame(columns=self._columns)
-        self.integrase = self.integrase.astype(dtype=self._dtype)
+        # the elements are stored in _ElementStore and exposed as DataFrames
+        # built only when they are accessed.
+        self._integrase = _ElementStore(self._columns, self._dtype)
+        self._attC = _ElementStore(self._columns, self._dtype)
+        self._promoter = _ElementStore(self._columns, self._dtype)
+        self._attI = _ElementStore(self._columns, self._dtype)
+        self._proteins = _ElementStore(self._columns, self._dtype)
 
-        self.attC = pd.DataFrame(columns=self._columns)
-        self.attC = self.attC.astype(dtype=self._dtype)
+        self.sizes_cassettes = None
 
-        self.promoter = pd.DataFrame(columns=self._columns)
-        self.promoter = self.promoter.astype(dtype=self._dtype)
+    @property
+    def dtype(self):
+        return {k: v for k, v in self._dtype.items()}
 
-        self.attI = pd.DataFrame(columns=self._columns)
-        self.attI = self.attI.astype(dtype=self._dtype)
+    @property
+    def integrase(self):
+        """
+        :return: the integrase of the integron
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self._integrase.frame()
 
-        self.proteins = pd.DataFrame(columns=self._columns)
-        self.proteins = self.proteins.astype(dtype=self._dtype)
+    @integrase.setter
+    def integrase(self, integrase):
+        self._integrase.set_frame(integrase)
 
-        self.sizes_cassettes = None
+    @property
+    def attC(self):
+        """
+        :return: the attC sites of the integron
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        if self._attC.pending:
+            attC = self._attC.frame()
+            attC["distance_2attC"] = self.sizes_cassettes
+            attC.index = ["attc_%03i" % (j + 1) for j in range(len(attC))]
+        return self._attC.frame()
+
+    @attC.setter
+    def attC(self, attC):
+        self._attC.set_frame(attC)
 
     @property
-    def dtype(self):
-        return {k: v for k, v in self._dtype.items()}
+    def promoter(self):
+        """
+        :return: the promoters of the integron
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self._promoter.frame()
+
+    @promoter.setter
+    def promoter(self, promoter):
+        self._promoter.set_frame(promoter)
+
+    @property
+    def attI(self):
+        """
+        :return: the attI sites of the integron
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self._attI.frame()
+
+    @attI.setter
+    def attI(self, attI):
+        self._attI.set_frame(attI)
+
+    @property
+    def proteins(self):
+        """
+        :return: the proteins of the integron
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self._proteins.frame()
+
+    @proteins.setter
+    def proteins(self, proteins):
+        self._proteins.set_frame(proteins)
 
     def add_integrase(self, pos_beg_int, pos_end_int, id_int, strand_int, evalue, model):
         """Adds integrases to the integron. Should be called once.
@@ -298,20 +586,11 @@ class Integron(object):
         :param str model: the name of integrase model (for instance intersection_tyr_intI)
         """
 
-        if not self.integrase.empty:
+        if len(self._integrase):
             raise RuntimeError("add_integrase should be called once.")
-        tmp_df = pd.DataFrame(columns=self._columns)
-        tmp_df = tmp_df.astype(dtype=self._dtype)
-        tmp_df["pos_beg"] = [pos_beg_int]
-        tmp_df["pos_end"] = [pos_end_int]
-        tmp_df["strand"] = [strand_int]
-        tmp_df["evalue"] = [evalue]
-        tmp_df["type_elt"] = "protein"
-        tmp_df["annotation"] = "intI"
-        tmp_df["model"] = [model]
-        tmp_df.index = [id_int]
-        tmp_df["distance_2attC"] = [np.nan]
-        self.integrase = self.integrase.append(tmp_df)
+        # "pos_beg", "pos_end", "strand", "evalue", "type_elt", "model", "distance_2attC", "annotation"
+        self._integrase.append(id_int, [pos_beg_int, pos_end_int, strand_int, evalue,
+                                        "protein", model, np.nan, "intI"])
 
 
     def add_attC(self, pos_beg_attC, pos_end_attC, strand, evalue, model):
@@ -323,26 +602,14 @@ class Integron(object):
         :param float evalue: the evalue associated to this attc site
         :param str model: the name of attc model (for instance attc4)
         """
-        tmp_df = pd.DataFrame(columns=self._columns)
-        tmp_df = tmp_df.astype(dtype=self._dtype)
-        tmp_df["pos_beg"] = [pos_beg_attC]
-        tmp_df["pos_end"] = [pos_end_attC]
-        tmp_df["strand"] = [strand]
-        tmp_df["evalue"] = [evalue]
-        tmp_df["type_elt"] = "attC"
-        tmp_df["annotation"] = "attC"
-        tmp_df["model"] = [model]
-        self.attC = self.attC.append(tmp_df, ignore_index=True)
-        attC_len = len(self.attC)
-        if attC_len < 2:
+        if not len(self._attC):
             self.sizes_cassettes = [np.nan]
         else:
-            self.sizes_cassettes.append((self.attC.iloc[attC_len - 1].pos_beg -
-                                         self.attC.iloc[attC_len - 2].pos_end) % len(self.replicon))
-        self.attC["distance_2attC"] = self.sizes_cassettes
-
-        # self.attC.sort_values(["pos_beg"], inplace = True)G669
-        self.attC.index = ["attc_%03i" % int(j + 1) for j in self.attC.index]
+            self.sizes_cassettes.append((pos_beg_attC - self._attC.last("pos_end")) % len(self.replicon))
+        # the index (attc_001, attc_002, ...) and the distance_2attC column
+        # are set when the DataFrame is built (see attC property)
+        self._attC.append(None, [pos_beg_attC, pos_end_attC, strand, evalue,
+                                 "attC", model, np.nan, "attC"])
 
 
     def type(self):
@@ -354,96 +621,39 @@ class Integron(object):
                     - 'In0' : Just an integrase intI
         :rtype: str
         """
-        if not self.attC.empty and not self.integrase.empty:
+        if self.has_attC() and self.has_integrase():
             return "complete"
-        elif self.attC.empty and not self.integrase.empty:
+        elif not self.has_attC() and self.has_integrase():
             return "In0"
-        elif not self.attC.empty and self.integrase.empty:
+        elif self.has_attC() and not self.has_integrase():
             return "CALIN"
 
 
-    def add_promoter(self):
+    def _motif_hits(self):
         """
-        Looks for known promoters if they exists within your integrons element.
-        It takes 1s for about 13kb.
+        :return: the matcher of the promoters and attI sites and its hits on the replicon.
+                 The replicon is scanned once, the hits are kept in the replicon for the other integrons.
+        :rtype: tuple (:class:`_KnownMotifs` object, :class:`integron_finder.motif.MotifHits` object)
         """
-        dist_prom = 500  # pb distance from edge of the element for which we seek promoter
-
-        ######## Promoter of integrase #########
-
-        if self.has_integrase():
-            # PintI1
-            p_intI1 = motifs.create([Seq.Seq("TTGCTGCTTGGATGCCCGAGGCATAGACTGTACA")])
-            p_intI1.name = "P_intI1"
-
-            # PintI2
-            # Not known
-
-            # PintI3
-            # Not known
-
-            motifs_Pint = [p_intI1]
-
-            seq_p_int = self.replicon.seq[int(self.integrase.pos_beg.min()) - dist_prom:
-                                          int(self.integrase.pos_end.max()) + dist_prom]
-
-            for m in motifs_Pint:
-                if self.integrase.strand.values[0] == 1:
-                    generator_motifs = m.instances.search(seq_p_int[:dist_prom])
-                    for pos, s in generator_motifs:
-                        tmp_df = pd.DataFrame(columns=self._columns)
-                        tmp_df = tmp_df.astype(dtype=self._dtype)
-                        tmp_df["pos_beg"] = [self.integrase.pos_beg.values[0] - dist_prom + pos]
-                        tmp_df["pos_end"] = [self.integrase.pos_beg.values[0] - dist_prom + pos + len(s)]
-                        tmp_df["strand"] = [self.integrase.strand.values[0]]
-                        tmp_df["evalue"] = [np.nan]
-                        tmp_df["type_elt"] = "Promoter"
-                        tmp_df["annotation"] = "Pint_%s" %(m.name[-1])
-                        tmp_df["model"] = "NA"
-                        tmp_df.index = [m.name]
-                        tmp_df["distance_2attC"] = [np.nan]
-                        self.promoter = self.promoter.append(tmp_df)
-                else:
-                    generator_motifs = m.instances.reverse_complement().search(seq_p_int[-dist_prom:])
-                    for pos, s in generator_motifs:
-                        tmp_df = pd.DataFrame(columns=self._columns)
-                        tmp_df = tmp_df.astype(dtype=self._dtype)
-                        tmp_df["pos_beg"] = [self.integrase.pos_end.max() + pos]
-                        tmp_df["pos_end"] = [self.integrase.pos_end.max() + pos + len(s)]
-                        tmp_df["strand"] = [self.integrase.strand.values[0]]
-                        tmp_df["evalue"] = [np.nan]
-                        tmp_df["type_elt"] = "Promoter"
-                        tmp_df["annotation"] = "Pint_%s" % (m.name[-1])
-                        tmp_df["model"] = "NA"
-                        tmp_df.index = [m.name]
-                        tmp_df["distance_2attC"] = [np.nan]
-                        self.promoter = self.promoter.append(tmp_df)
-
-        ######## Promoter of K7 #########
-
-        # Pc-int1
-        motifs_Pc = []
-
-        pc = SeqIO.parse(os.path.join(self.cfg.model_dir, "variants_Pc_intI1.fst"), "fasta")
-        pseq = [i for i in pc]
-        d = {len(i): [] for i in pseq}
-        _ = [d[len(i)].append(i.seq.upper()) for i in pseq]
-        for k, i in d.items():
-            motifs_Pc.append(motifs.create(i))
-            motifs_Pc[-1].name = "Pc_int1"
-
-        # Pc-int2
-        # Not known
-
-        # Pc-int3
-
-        pc_intI3 = motifs.create([Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGCTGTAATG"),
-                                  Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGATGTAATG")])
-        pc_intI3.name = "Pc_int3"
-        motifs_Pc.append(pc_intI3)
+        known = _known_motifs(os.path.join(self.cfg.model_dir, "variants_Pc_intI1.fst"))
+        circular = getattr(self.replicon, 'topology', None) == 'circ'
+        hits = getattr(self.replicon, 'motif_hits', None)
+        if hits is None or hits.matcher is not known.matcher or hits.circular != circular:
+            hits = known.matcher.scan(self.replicon.seq, circular=circular)
+            self.replicon.motif_hits = hits
+        return known, hits
 
-        if self.type() == "complete":
 
+    def _array_window(self, dist):
+        """
+        :param int dist: the distance from the edges of the integron to search in
+        :return: the beginning, the end of the window around the integron elements
+                 (the end can be after the replicon size if the integron overlaps the origin)
+                 and the strand to search (1, -1 or "both").
+        :rtype: tuple (int start, int end, int or str strand)
+        """
+        integron_type = self.type()
+        if integron_type == "complete":
             if ((self.attC.pos_beg.values[0] - self.integrase.pos_end.values[0]) % self.replicon_size >
                     (self.integrase.pos_beg.values[0] - self.attC.pos_end.values[-1]) % self.replicon_size):
                 # if integrase after attcs (on the right)
@@ -452,124 +662,89 @@ class Integron(object):
             else:
                 left = int(self.integrase.pos_end.values[-1])
                 right = int(self.attC.pos_beg.values[0])
-
             strand_array = self.attC.strand.unique()[0]
 
-        elif self.type() == "In0":
+        elif integron_type == "In0":
             left = int(self.integrase.pos_beg.values[0])
             right = int(self.integrase.pos_end.values[-1])
             strand_array = "both"
 
-        elif self.type() == "CALIN":
+        elif integron_type == "CALIN":
             left = int(self.attC.pos_beg.values[0])
             right = int(self.attC.pos_end.values[-1])
             strand_array = self.attC.strand.unique()[0]
 
-        if left < right:
-            seq_Pc = self.replicon.seq[left - dist_prom:right + dist_prom]
-        else:
-            seq_Pc1 = self.replicon.seq[left - dist_prom:self.replicon_size]
-            seq_Pc2 = self.replicon.seq[:right + dist_prom]
-            seq_Pc = seq_Pc1 + seq_Pc2
-
-        for m in motifs_Pc:
-            if strand_array == 1:
-                mot = [m]
-            elif strand_array == "both":
-                mot = [m.reverse_complement(), m]
-            else:
-                mot = [m.reverse_complement()]
-
-            for sa, mo in enumerate(mot):
-                for pos, s in mo.instances.search(seq_Pc):
-                    tmp_df = pd.DataFrame(columns=self._columns)
-                    tmp_df = tmp_df.astype(dtype=self._dtype)
-                    tmp_df["pos_beg"] = [(left - dist_prom + pos) % self.replicon_size]
-                    tmp_df["pos_end"] = [(left - dist_prom + pos + len(s)) % self.replicon_size]
-                    tmp_df["strand"] = [strand_array] if strand_array != "both" else [sa * 2 - 1]
-                    tmp_df["evalue"] = [np.nan]
-                    tmp_df["type_elt"] = "Promoter"
-                    tmp_df["annotation"] = "Pc_%s" % (m.name[-1])
-                    tmp_df["model"] = "NA"
-                    tmp_df.index = [m.name]
-                    tmp_df["distance_2attC"] = [np.nan]
-                    self.promoter = self.promoter.append(tmp_df)
+        start = left - dist
+        end = right + dist
+        if left >= right:
+            end += self.replicon_size
+        return start, end, strand_array
 
 
-    def add_attI(self):
+    def _add_motifs(self, store, hits, motifs, strands, start, end, type_elt, annot_prefix):
         """
-        Looking for Att1 sites and add them to this integron.
+        Add the hits of motifs in a window to the store of elements.
+
+        :param store: where to add the elements
+        :type store: :class:`_ElementStore` object
+        :param hits: the motifs found on the replicon
+        :type hits: :class:`integron_finder.motif.MotifHits` object
+        :param motifs: the indexes of the motifs to add in the matcher
+        :type motifs: list of int
+        :param strands: the strands to search (1 or -1) in this order
+        :type strands: list of int
+        :param int start: the beginning of the window
+        :param int end: the end of the window
+        :param str type_elt: the type of the elements
+        :param str annot_prefix: the prefix of the annotation, the last character of the motif name is appended
         """
-        dist_atti = 500
-
-        # attI1
-        instances_attI1 = [Seq.Seq('TGATGTTATGGAGCAGCAACGATGTTACGCAGCAGGGCAGTCGCCCTAAAACAAAGTT')]
-        attI1 = motifs.create(instances_attI1)
-        attI1.name = "attI1"
+        for motif_idx in motifs:
+            motif = hits.matcher.motifs[motif_idx]
+            for strand in strands:
+                for pos in hits.search(motif_idx, strand, start, end):
+                    store.append(motif.name, [pos % self.replicon_size,
+                                              (pos + motif.length) % self.replicon_size,
+                                              strand,
+                                              np.nan, type_elt, "NA", np.nan,
+                                              "%s_%s" % (annot_prefix, motif.name[-1])])
 
-        # attI2
-        instances_attI2 = [Seq.Seq('TTAATTAACGGTAAGCATCAGCGGGTGACAAAACGAGCATGCTTACTAATAAAATGTT')]
-        attI2 = motifs.create(instances_attI2)
-        attI2.name = "attI2"
 
-        # attI3
-        instances_attI3 = [Seq.Seq('CTTTGTTTAACGACCACGGTTGTGGGTATCCGGTGTTTGGTCAGATAAACCACAAGTT')]
-        attI3 = motifs.create(instances_attI3)
-        attI3.name = "attI3"
-
-        motif_attI = [attI1, attI2, attI3]
+    def add_promoter(self):
+        """
+        Looks for known promoters if they exists within your integrons element.
+        """
+        dist_prom = 500  # pb distance from edge of the element for which we seek promoter
+        known, hits = self._motif_hits()
 
-        if self.type() == "complete":
-            if ((self.attC.pos_beg.values[0] - self.integrase.pos_end.values[0]) % self.replicon_size >
-                    (self.integrase.pos_beg.values[0] - self.attC.pos_end.values[-1]) % self.replicon_size):
-                # if integrase after attcs (on the right)
+        ######## Promoter of integrase #########
 
-                left = int(self.attC.pos_end.values[-1])
-                right = int(self.integrase.pos_beg.values[0])
+        if self.has_integrase():
+            # the promoter is upstream the integrase
+            if self.integrase.strand.values[0] == 1:
+                start = int(self.integrase.pos_beg.min()) - dist_prom
+                strand = 1
             else:
-                left = int(self.integrase.pos_end.values[-1])
-                right = int(self.attC.pos_beg.values[0])
-            strand_array = self.attC.strand.unique()[0]
+                start = int(self.integrase.pos_end.max())
+                strand = -1
+            self._add_motifs(self._promoter, hits, known.pint, [strand],
+                             start, start + dist_prom, "Promoter", "Pint")
 
-        elif self.type() == "In0":
-            left = int(self.integrase.pos_beg)
-            right = int(self.integrase.pos_end)
-            strand_array = "both"
-        elif self.type() == "CALIN":
-            left = int(self.attC.pos_beg.values[0])
-            right = int(self.attC.pos_end.values[-1])
-            strand_array = self.attC.strand.unique()[0]
+        ######## Promoter of K7 #########
 
-        if left < right:
-            seq_attI = self.replicon.seq[left - dist_atti:right + dist_atti]
-        else:
-            seq_attI1 = self.replicon.seq[left - dist_atti:self.replicon_size]
-            seq_attI2 = self.replicon.seq[:right + dist_atti]
-            seq_attI = seq_attI1 + seq_attI2
+        start, end, strand_array = self._array_window(dist_prom)
+        strands = [-1, 1] if strand_array == "both" else [strand_array]
+        self._add_motifs(self._promoter, hits, known.pc, strands, start, end, "Promoter", "Pc")
 
-        for m in motif_attI:
 
-            if strand_array == 1:
-                mot = [m]
-            elif strand_array == "both":
-                mot = [m.reverse_complement(), m]
-            else:
-                mot = [m.reverse_complement()]
-
-            for sa, mo in enumerate(mot):
-                for pos, s in mo.instances.search(seq_attI):
-                    tmp_df = pd.DataFrame(columns=self._columns)
-                    tmp_df = tmp_df.astype(dtype=self._dtype)
-                    tmp_df["pos_beg"] = [(left - dist_atti + pos) % self.replicon_size]
-                    tmp_df["pos_end"] = [(left - dist_atti + pos + len(s)) % self.replicon_size]
-                    tmp_df["strand"] = [strand_array] if strand_array != "both" else [sa * 2 - 1]
-                    tmp_df["evalue"] = [np.nan]
-                    tmp_df["type_elt"] = "attI"
-                    tmp_df["annotation"] = "attI_%s" % (m.name[-1])
-                    tmp_df["model"] = "NA"
-                    tmp_df.index = [m.name]
-                    tmp_df["distance_2attC"] = [np.nan]
-                    self.attI = self.attI.append(tmp_df)
+    def add_attI(self):
+        """
+        Looking for Att1 sites and add them to this integron.
+        """
+        dist_atti = 500
+        known, hits = self._motif_hits()
+        start, end, strand_array = self._array_window(dist_atti)
+        strands = [-1, 1] if strand_array == "both" else [strand_array]
+        self._add_motifs(self._attI, hits, known.attI, strands, start, end, "attI", "attI")
 
 
     def add_proteins(self, prot_db):
@@ -594,31 +769,27 @@ class Integron(object):
             window_start = attc_start - 200
             window_end = attc_end + 200
 
-        for prot_id in prot_db:
-            prot_attr = prot_db.get_description(prot_id)
-
-            s_int = (window_end - window_start) % self.replicon_size
-
-            if ((window_end - prot_attr.stop) % self.replicon_size < s_int) or \
-                    ((prot_attr.start - window_start) % self.replicon_size < s_int):
-                # We keep proteins (<--->) if start (<) and end (>) follows that scheme:
-                #
-                # ok:            <--->         <--->
-                # ok:  <--->                                    <--->
-                #          ^ 200pb v                    v 200pb ^
-                #                  |------integron------|
-                #                window_start                 fin
-
-                prot_annot = "protein"
-                prot_evalue = np.nan
-                prot_model = "NA"
-
-                self.proteins.loc[prot_attr.id] = [prot_attr.start, prot_attr.stop, prot_attr.strand, prot_evalue,
-                                                   "protein", prot_model, np.nan, prot_annot]
-            intcols = ["pos_beg", "pos_end", "strand"]
-            floatcols = ["evalue", "distance_2attC"]
-            self.proteins[intcols] = self.proteins[intcols].astype(int)
-            self.proteins[floatcols] = self.proteins[floatcols].astype(float)
+        # We keep proteins (<--->) if start (<) or end (>) is in the window:
+        #
+        # ok:            <--->         <--->
+        # ok:  <--->                                    <--->
+        #          ^ 200pb v                    v 200pb ^
+        #                  |------integron------|
+        #                window_start                 fin
+        prots_attr = prot_db.proteins_in_window(window_start, window_end)
+        if prots_attr:
+            prot_annot = "protein"
+            prot_evalue = np.nan
+            prot_model = "NA"
+            proteins = pd.DataFrame([[prot_attr.start, prot_attr.stop, prot_attr.strand, prot_evalue,
+                                      "protein", prot_model, np.nan, prot_annot] for prot_attr in prots_attr],
+                                    index=[prot_attr.id for prot_attr in prots_attr],
+                                    columns=self._columns)
+            self.proteins = pd.concat([self.proteins.drop(proteins.index, errors='ignore'), proteins])
+        intcols = ["pos_beg", "pos_end", "strand"]
+        floatcols = ["evalue", "distance_2attC"]
+        self.proteins[intcols] = self.proteins[intcols].astype(int)
+        self.proteins[floatcols] = self.proteins[floatcols].astype(float)
 
 
     def describe(self):
@@ -659,6 +830,11 @@ class Integron(object):
 
         :param str file: the path to save the integron schema (in pdf format)
         """
+        from matplotlib import use as m_use
+        m_use("Agg")
+        import matplotlib.pyplot as plt
+        import matplotlib.colors
+
         full = self.describe()
         full["evalue"] = full["evalue"].astype("float")
         h = [i + (0.5*i) if j == "Promoter" else i for i, j in zip(full.strand, full.type_elt)]
@@ -714,11 +890,11 @@ class Integron(object):
         """
         :return: True if integron has integrase False otherwise.
         """
-        return not self.integrase.empty
+        return len(self._integrase) > 0
 
 
     def has_attC(self):
         """
         :return: True if integron has attc sites False otherwise.
         """
-        return not self.attC.empty
+        return len(self._attC) > 0
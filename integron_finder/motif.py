@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Exact search of short motifs (the promoters and the attI sites) in a replicon.
+
+All the instances of all the motifs, on both strands, are indexed once in a :class:`MotifMatcher`.
+A replicon is scanned once with all of them, then the hits lying in the window of each integron
+are picked up from the :class:`MotifHits` without reading the sequence again.
+"""
+
+import numpy as np
+from Bio.Seq import reverse_complement
+
+# code of the nucleotides: A, C, G, T are 0 to 3, any other character is 4
+_NT_CODES = np.full(256, 4, dtype=np.uint8)
+_NT_CODES[np.frombuffer(b'ACGT', dtype=np.uint8)] = np.arange(4)
+
+
+class Motif:
+    """
+    A named set of sequences of the same length, as :class:`Bio.motifs.Motif` created from instances.
+    """
+
+    def __init__(self, name, instances):
+        """
+        :param str name: the name of the motif
+        :param instances: the sequences of the motif (on the forward strand)
+        :type instances: iterable of str
+        """
+        self.name = name
+        self.instances = tuple(str(inst) for inst in instances)
+        lengths = {len(inst) for inst in self.instances}
+        if len(lengths) != 1:
+            raise ValueError("the instances of motif '{}' must have the same length".format(name))
+        self.length = lengths.pop()
+
+
+class MotifHits:
+    """
+    The positions of the motifs of a :class:`MotifMatcher` found in one replicon.
+    """
+
+    def __init__(self, matcher, hits, size, circular):
+        """
+        :param matcher: the matcher which produced the hits
+        :type matcher: :class:`MotifMatcher` object
+        :param dict hits: the sorted start positions (0-based) of the hits for each (motif index, strand)
+        :param int size: the length of the replicon
+        :param bool circular: True if the replicon is circular
+        """
+        self.matcher = matcher
+        self._hits = hits
+        self.size = size
+        self.circular = circular
+
+    def search(self, motif_idx, strand, start, end):
+        """
+        Give the hits of a motif entirely included in the window [start, end[.
+
+        On a circular replicon the window can begin before 0 or end after the size of the replicon,
+        the positions are then given in the same frame as the window (it is not modulo the size).
+        On a linear replicon the window is clipped to the replicon.
+
+        :param int motif_idx: the index of the motif in the matcher
+        :param int strand: 1 to search the instances, -1 to search their reverse complement
+        :param int start: the beginning of the window (0-based, included)
+        :param int end: the end of the window (excluded)
+        :return: the start positions of the hits in ascending order, at most one by position
+        :rtype: list of int
+        """
+        positions = self._hits.get((motif_idx, strand))
+        if positions is None:
+            return []
+        length = self.matcher.motifs[motif_idx].length
+        if self.circular:
+            shifts = range(start // self.size, (end - 1) // self.size + 1)
+        else:
+            start = max(start, 0)
+            end = min(end, self.size)
+            shifts = (0, )
+        found = []
+        for shift in shifts:
+            offset = shift * self.size
+            lo = np.searchsorted(positions, start - offset, side='left')
+            hi = np.searchsorted(positions, end - length - offset, side='right')
+            found.extend((positions[lo:hi] + offset).tolist())
+        return found
+
+
+class MotifMatcher:
+    """
+    Exact multi-pattern matcher for a list of :class:`Motif` on both strands.
+
+    The patterns are indexed by the 2 bits encoding of their first k nucleotides.
+    A sequence is scanned by computing the code of all its k-mers at once with numpy,
+    then only the positions sharing a prefix with a pattern are compared to the patterns.
+    The patterns must be made of A, C, G, T. The search is case sensitive,
+    as :meth:`Bio.motifs.Instances.search`.
+    """
+
+    _max_k = 16  # the k-mer codes must fit in an uint32
+
+    def __init__(self, motifs):
+        """
+        :param motifs: the motifs to search
+        :type motifs: list of :class:`Motif` objects
+        """
+        self.motifs = list(motifs)
+        self.k = min(self._max_k, min(m.length for m in self.motifs))
+        self.max_length = max(m.length for m in self.motifs)
+        # prefix code -> [(pattern, motif index, strand), ...]
+        self._patterns = {}
+        for motif_idx, motif in enumerate(self.motifs):
+            for strand, instances in ((1, motif.instances),
+                                      (-1, [reverse_complement(inst) for inst in motif.instances])):
+                for inst in instances:
+                    codes = self._encode(inst)
+                    if (codes > 3).any():
+                        raise ValueError("the instance '{}' of motif '{}' is not only made of A, C, G, T".format(
+                            inst, motif.name))
+                    prefix = int(self._kmer_codes(codes[:self.k], self.k)[0])
+                    self._patterns.setdefault(prefix, []).append((inst, motif_idx, strand))
+        self._prefixes = np.array(sorted(self._patterns), dtype=np.uint32)
+
+
+    def _encode(self, text):
+        """
+        :param str text: a nucleic sequence
+        :return: the code of each nucleotide, A, C, G, T are 0 to 3 any other character is 4
+        :rtype: :class:`numpy.ndarray` of uint8
+        """
+        return _NT_CODES[np.frombuffer(text.encode('ascii', errors='replace'), dtype=np.uint8)]
+
+
+    @staticmethod
+    def _kmer_codes(codes, k):
+        """
+        :param codes: the nucleotides codes
+        :type codes: :class:`numpy.ndarray` of uint8
+        :param int k: the length of the k-mers
+        :return: the 2 bits encoding of each k-mer (meaningless if the k-mer contains a code > 3)
+        :rtype: :class:`numpy.ndarray` of uint32
+        """
+        n = len(codes) - k + 1
+        kmers = np.zeros(n, dtype=np.uint32)
+        for i in range(k):
+            kmers <<= 2
+            kmers |= codes[i:i + n] & 3
+        return kmers
+
+
+    def scan(self, seq, circular=False):
+        """
+        Search all the motifs on both strands of a sequence.
+
+        :param seq: the sequence to scan
+        :type seq: :class:`Bio.Seq.Seq` or str
+        :param bool circular: if True the hits across the origin of the sequence are also reported
+        :return: the hits
+        :rtype: :class:`MotifHits` object
+        """
+        text = str(seq)
+        size = len(text)
+        if circular:
+            text += text[:self.max_length - 1]
+        codes = self._encode(text)
+        hits = {}
+        if len(codes) >= self.k:
+            kmers = self._kmer_codes(codes, self.k)
+            n = len(kmers)
+            # the k-mers containing something else than A, C, G, T cannot match
+            invalid = np.concatenate(([0], np.cumsum(codes > 3)))
+            valid = invalid[self.k:self.k + n] == invalid[:n]
+            idx = np.searchsorted(self._prefixes, kmers)
+            idx[idx == len(self._prefixes)] = 0
+            candidates = np.flatnonzero((self._prefixes[idx] == kmers) & valid)
+            for pos in candidates[candidates < size].tolist():
+                for pattern, motif_idx, strand in self._patterns[int(kmers[pos])]:
+                    if text.startswith(pattern, pos):
+                        # several identical instances give one hit, as Bio.motifs.Instances.search
+                        hits.setdefault((motif_idx, strand), set()).add(pos)
+        hits = {key: np.array(sorted(pos), dtype=np.int64) for key, pos in hits.items()}
+        return MotifHits(self, hits, size, circular)
@@ -30,12 +30,16 @@ from abc import ABC, abstractmethod
 import os
 from subprocess import call
 from collections import namedtuple
+from functools import lru_cache
 import re
 
 import colorlog
+import numpy as np
 import pandas as pd
 from Bio import SeqIO, Seq
 from integron_finder import IntegronError
+from integron_finder.cache import file_digest, tool_version
+from integron_finder import timing
 
 _log = colorlog.getLogger(__name__)
 
@@ -44,6 +48,87 @@ _log = colorlog.getLogger(__name__)
 SeqDesc = namedtuple('SeqDesc', ('id', 'strand', 'start', 'stop'))
 
 
+def _normalize_gembase_id(seq_id):
+    """
+    In gembase the contig number of the genes ids is preceded by a letter
+    (b/i for border/inside in Draft, the replicon type in Complet) which can be absent from the replicon id.
+    for instance: ::
+
+        ACBA.0917.00019.b0001_00001 => ACBA.0917.00019.0001_00001
+        ACBA.0917.00019.0001        => ACBA.0917.00019.0001
+        ESCO001.C.00001.C001_00003  => ESCO001.C.00001.001_00003
+        ESCO001.C.00001.C001        => ESCO001.C.00001.001
+
+    :param str seq_id: a gembase replicon or gene identifier
+    :return: the identifier without the letter before the contig number
+    :rtype: str
+    """
+    prefix, _, contig_gene = seq_id.rpartition('.')
+    if contig_gene[:1].isalpha():
+        contig_gene = contig_gene[1:]
+    return "{}.{}".format(prefix, contig_gene)
+
+
+class LstInfoIndex:
+    """
+    Index of the CDS described in a Gembase LSTINFO file.
+    The file is parsed once and the CDS are grouped by contig,
+    so all the contigs of a draft genome share the same index.
+    """
+
+    def __init__(self, prots_info):
+        """
+        :param prots_info: the information related to the CDS of all the contigs of the genome
+        :type prots_info: :class:`pandas.DataFrame` object
+        """
+        self._empty = prots_info.iloc[0:0]
+        gene_keys = [_normalize_gembase_id(seq_id) for seq_id in prots_info['seq_id']]
+        contig_keys = [key.rpartition('_')[0] for key in gene_keys]
+        self._contigs = {contig: info for contig, info in prots_info.groupby(contig_keys, sort=False)}
+        self._descriptions = {}
+        for contig, gene_key, seq_id, strand, start, end in zip(contig_keys, gene_keys,
+                                                                prots_info['seq_id'].tolist(),
+                                                                prots_info['strand'].tolist(),
+                                                                prots_info['start'].tolist(),
+                                                                prots_info['end'].tolist()):
+            self._descriptions.setdefault(contig, {})[gene_key] = SeqDesc(seq_id,
+                                                                          1 if strand == "D" else -1,
+                                                                          start,
+                                                                          end)
+
+    def contig_info(self, replicon_id):
+        """
+        :param str replicon_id: the id of a contig of the genome
+        :return: the information related to the CDS of this contig, in the LSTINFO order
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        return self._contigs.get(_normalize_gembase_id(replicon_id), self._empty)
+
+    def contig_descriptions(self, replicon_id):
+        """
+        :param str replicon_id: the id of a contig of the genome
+        :return: the description of the CDS of this contig, with the normalized gene id as key
+        :rtype: dict
+        """
+        return self._descriptions.get(_normalize_gembase_id(replicon_id), {})
+
+
+@lru_cache(maxsize=8)
+def _lst_index(lst_path, gembase_type, mtime):
+    """
+    :param str lst_path: the path of the LSTINFO file
+    :param str gembase_type: 'Complet' or 'Draft'
+    :param float mtime: the modification time of the file, so a modified file is parsed again
+    :return: the index of the LSTINFO file
+    :rtype: :class:`LstInfoIndex` object
+    """
+    if gembase_type == 'Draft':
+        prots_info = GembaseDB._read_draft_lst(lst_path)
+    else:
+        prots_info = GembaseDB._read_complete_lst(lst_path)
+    return LstInfoIndex(prots_info)
+
+
 class ProteinDB(ABC):
     """
     AbstractClass defining the interface for ProteinDB.
@@ -51,6 +136,8 @@ class ProteinDB(ABC):
     to the replicon/contig CDS.
     """
 
+    _coord_index = None
+
     def __init__(self, replicon, cfg, prot_file=None):
         """
 
@@ -118,6 +205,72 @@ class ProteinDB(ABC):
         """
         pass
 
+
+    def _coordinates_index(self):
+        """
+        Build, the first time it is needed, an index of the proteins coordinates.
+        The starts and the stops (modulo the replicon size) are sorted in two separated arrays
+        with the position of the corresponding protein in the db, so a window can be looked up by dichotomy.
+
+        :return: the descriptions of the proteins in the db order,
+                 the sorted starts, the order of the starts, the sorted stops, the order of the stops.
+        :rtype: tuple
+        """
+        if self._coord_index is None:
+            size = len(self.replicon)
+            descriptions = [self.get_description(prot_id) for prot_id in self]
+            starts = np.array([desc.start for desc in descriptions], dtype=np.int64) % size
+            stops = np.array([desc.stop for desc in descriptions], dtype=np.int64) % size
+            starts_order = np.argsort(starts, kind='stable')
+            stops_order = np.argsort(stops, kind='stable')
+            self._coord_index = (descriptions,
+                                 starts[starts_order], starts_order,
+                                 stops[stops_order], stops_order)
+        return self._coord_index
+
+
+    @staticmethod
+    def _circular_range(sorted_pos, order, lower, length, size):
+        """
+        :param sorted_pos: the sorted positions (modulo size)
+        :type sorted_pos: :class:`numpy.ndarray`
+        :param order: the index in the db of each position of sorted_pos
+        :type order: :class:`numpy.ndarray`
+        :param int lower: the first position of the range (0 <= lower < size)
+        :param int length: the length of the range
+        :param int size: the size of the replicon
+        :return: the index in the db of the positions in [lower, lower + length[ on the circular replicon
+        :rtype: :class:`numpy.ndarray`
+        """
+        upper = lower + length
+        if upper <= size:
+            return order[np.searchsorted(sorted_pos, lower):np.searchsorted(sorted_pos, upper)]
+        else:
+            return np.concatenate((order[np.searchsorted(sorted_pos, lower):],
+                                   order[:np.searchsorted(sorted_pos, upper - size)]))
+
+
+    def proteins_in_window(self, window_start, window_end):
+        """
+        Find the proteins which start or stop in a window of the replicon.
+        The replicon is considered as circular, so the window can cross the origin,
+        and window_start can be negative or window_end greater than the replicon size.
+
+        :param int window_start: the first position of the window
+        :param int window_end: the last position of the window
+        :return: the description of the proteins which start in [window_start, window_end[
+                 or stop in ]window_start, window_end] in the order of the db.
+        :rtype: list of :class:`SeqDesc` namedtuple object
+        """
+        descriptions, starts, starts_order, stops, stops_order = self._coordinates_index()
+        size = len(self.replicon)
+        length = (window_end - window_start) % size
+        if not length:
+            return []
+        found = np.union1d(self._circular_range(starts, starts_order, window_start % size, length, size),
+                           self._circular_range(stops, stops_order, (window_end - length + 1) % size, length, size))
+        return [descriptions[i] for i in found]
+
     @property
     def protfile(self):
         """
@@ -270,6 +423,16 @@ class GembaseDB(ProteinDB):
         :return: the information related to the 'valid' CDS corresponding to the sequence_id
         :rtype: `class`:pandas.DataFrame` object
         """
+        return _lst_index(lst_path, 'Complet', os.path.getmtime(lst_path)).contig_info(sequence_id)
+
+
+    @staticmethod
+    def _read_complete_lst(lst_path):
+        """
+        :param str lst_path: the path of of the LSTINFO file Gembase Complet
+        :return: the information related to the 'valid' CDS of all the sequences of the file
+        :rtype: `class`:pandas.DataFrame` object
+        """
         dtype = {'start': 'int',
                  'end': 'int',
                  'strand': 'str',
@@ -290,10 +453,7 @@ class GembaseDB(ProteinDB):
                                columns=['start', 'end', 'strand', 'type', 'seq_id', 'valid', 'gene_name', 'description']
                                )
             lst = lst.astype(dtype)
-            specie, date, strain, contig = sequence_id.split('.')
-            pattern = '{}\.{}\.{}\.\w?{}'.format(specie, date, strain, contig)
-            genome_info = lst.loc[lst['seq_id'].str.contains(pattern, regex=True)]
-            prots_info = genome_info.loc[(genome_info['type'] == 'CDS') & (genome_info['valid'] == 'Valid')]
+            prots_info = lst.loc[(lst['type'] == 'CDS') & (lst['valid'] == 'Valid')]
             return prots_info
 
 
@@ -305,6 +465,16 @@ class GembaseDB(ProteinDB):
         :return: the information related to the 'valid' CDS corresponding to the sequence_id
         :rtype: `class`:pandas.DataFrame` object
         """
+        return _lst_index(lst_path, 'Draft', os.path.getmtime(lst_path)).contig_info(replicon_id)
+
+
+    @staticmethod
+    def _read_draft_lst(lst_path):
+        """
+        :param str lst_path: the path of of the LSTINFO file from a Gembase Draft
+        :return: the information related to the CDS of all the contigs of the file
+        :rtype: `class`:pandas.DataFrame` object
+        """
         lst = pd.read_csv(lst_path,
                           header=None,
                           names=['start', 'end', 'strand', 'type', 'seq_id', 'gene_name', 'description'],
@@ -317,10 +487,7 @@ class GembaseDB(ProteinDB):
                                  'description': 'str'},
                           sep="\t"
                           )
-        specie, date, strain, contig_gene = replicon_id.split('.')
-        pattern = '{}\.{}\.{}\.\w?{}'.format(specie, date, strain, contig_gene)
-        genome_info = lst.loc[lst['seq_id'].str.contains(pattern, regex=True)]
-        prots_info = genome_info.loc[genome_info['type'] == 'CDS']
+        prots_info = lst.loc[lst['type'] == 'CDS']
         return prots_info
 
 
@@ -332,11 +499,10 @@ class GembaseDB(ProteinDB):
 
         lst_path = os.path.join(self._gembase_path, 'LSTINFO', self._gembase_file_basename + '.lst')
         gembase_type = self.gembase_sniffer(lst_path)
-        if gembase_type == 'Draft':
-            prots_info = self.gembase_draft_parser(lst_path, self.replicon.id)
-        else:
-            prots_info = self.gembase_complete_parser(lst_path, self.replicon.id)
-        return prots_info
+        # the file is parsed only once for all the contigs of a genome
+        lst_index = _lst_index(lst_path, gembase_type, os.path.getmtime(lst_path))
+        self._descriptions = lst_index.contig_descriptions(self.replicon.id)
+        return lst_index.contig_info(self.replicon.id)
 
 
     def __getitem__(self, prot_seq_id):
@@ -364,21 +530,12 @@ class GembaseDB(ProteinDB):
         :raise IntegronError: when gene_id is not a valid Gembase gene identifier
         :raise KeyError: if gene_id is not found in GembaseDB instance
         """
-        try:
-            specie, date, strain, contig_gene = gene_id.split('.')
-            contig_gene = contig_gene[1:]  # remove the first letter b/i
-        except ValueError:
+        if gene_id.count('.') != 3:
             raise IntegronError("'{}' is not a valid Gembase protein identifier.".format(gene_id))
-        pattern = '{}\.{}\.{}\.\w?{}'.format(specie, date, strain, contig_gene)
-        seq_info = self._info.loc[self._info['seq_id'].str.contains(pattern, regex=True)]
-        if not seq_info.empty:
-            return SeqDesc(seq_info.seq_id.values[0],
-                           1 if seq_info.strand.values[0] == "D" else -1,
-                           seq_info.start.values[0],
-                           seq_info.end.values[0],
-                           )
-        else:
-            raise KeyError(gene_id)
+        try:
+            return self._descriptions[_normalize_gembase_id(gene_id)]
+        except KeyError:
+            raise KeyError(gene_id) from None
 
 
 class ProdigalDB(ProteinDB):
@@ -398,20 +555,31 @@ class ProdigalDB(ProteinDB):
             os.makedirs(self.cfg.tmp_dir(self.replicon.id))
         prot_file_path = os.path.join(self.cfg.tmp_dir(self.replicon.id), self.replicon.id + ".prt")
         if not os.path.exists(prot_file_path):
+            meta = '' if len(self.replicon) > 200000 else '-p meta'
+            cache = self.cfg.cache
+            if cache is not None:
+                cache_key = cache.key('prodigal', tool_version(self.cfg.prodigal),
+                                      file_digest(self.replicon.path), meta)
+                if cache.get(cache_key, {'prt': prot_file_path}):
+                    _log.debug("prodigal results for {} found in cache".format(self.replicon.id))
+                    return prot_file_path
             prodigal_cmd = "{prodigal} {meta} -i {replicon} -a {prot} -o {out} -q ".format(
                 prodigal=self.cfg.prodigal,
-                meta='' if len(self.replicon) > 200000 else '-p meta',
+                meta=meta,
                 replicon=self.replicon.path,
                 prot=prot_file_path,
                 out=os.devnull,
             )
             try:
                 _log.debug("run prodigal: {}".format(prodigal_cmd))
-                returncode = call(prodigal_cmd.split())
+                with timing.stage('prodigal'):
+                    returncode = call(prodigal_cmd.split())
             except Exception as err:
                 raise RuntimeError("{0} failed : {1}".format(prodigal_cmd, err))
             if returncode != 0:
                 raise RuntimeError("{0} failed returncode = {1}".format(prodigal_cmd, returncode))
+            if cache is not None:
+                cache.put(cache_key, {'prt': prot_file_path})
 
         return prot_file_path
 
@@ -24,10 +24,16 @@
 # If not, see <http://www.gnu.org/licenses/>.                                      #
 ####################################################################################
 
+import os
+import glob
+import shutil
+
 import colorlog
 import pandas as pd
 from pandas.errors import EmptyDataError
 
+from integron_finder import IntegronError
+
 _log = colorlog.getLogger(__name__)
 
 """
@@ -89,10 +95,7 @@ def merge_results(*results_file):
         if agg_results.shape[1] == 4:  # it's a summary file
             agg_results = agg_results.set_index('ID_replicon')
     else:
-        agg_results = pd.DataFrame(columns=['ID_integron', 'ID_replicon', 'element',
-                                            'pos_beg', 'pos_end', 'strand', 'evalue',
-                                            'type_elt', 'annotation', 'model', 'type', 'default',
-                                            'distance_2attC', 'considered_topology'])
+        agg_results = pd.DataFrame(columns=[col for col, _ in _REPORT_SCHEMA])
     return agg_results
 
 
@@ -149,3 +152,272 @@ def filter_calin(result, threshold=2):
         filter(lambda x: x['type'].size < threshold).ID_integron
     filtered = result[~result.ID_integron.isin(idx)]
     return filtered
+
+
+#: the columnar formats available for the integrons report and the extension of the files
+COLUMNAR_FORMATS = {'parquet': '.integrons.parquet',
+                    'feather': '.integrons.feather'}
+
+# the fixed schema of the columnar integrons report (same columns as the .integrons files)
+_REPORT_SCHEMA = [("ID_integron", "string"),
+                  ("ID_replicon", "category"),
+                  ("element", "string"),
+                  ("pos_beg", "int64"),
+                  ("pos_end", "int64"),
+                  ("strand", "int64"),
+                  ("evalue", "float64"),
+                  ("type_elt", "category"),
+                  ("annotation", "category"),
+                  ("model", "category"),
+                  ("type", "string"),
+                  ("default", "string"),
+                  ("distance_2attC", "float64"),
+                  ("considered_topology", "string")]
+
+# the partitioning key of the merged columnar datasets
+_PARTITION_KEY = 'input_file'
+
+
+def _pyarrow():
+    """
+    :return: the pyarrow module
+    :raise IntegronError: if pyarrow is not installed
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise IntegronError("the columnar outputs (parquet, feather) need the 'pyarrow' package, "
+                            "install it with: pip install pyarrow") from None
+    return pyarrow
+
+
+def _arrow_schema():
+    """
+    :return: the schema of the columnar integrons report, the categorical columns are dictionary encoded.
+    :rtype: :class:`pyarrow.Schema` object
+    """
+    pa = _pyarrow()
+    arrow_types = {"string": pa.string(),
+                   "category": pa.dictionary(pa.int32(), pa.string()),
+                   "int64": pa.int64(),
+                   "float64": pa.float64()}
+    return pa.schema([(col, arrow_types[dtype]) for col, dtype in _REPORT_SCHEMA])
+
+
+def typed_report(report):
+    """
+    Cast an integrons report to the fixed schema of the columnar outputs.
+
+    :param report: the integrons report as returned by :func:`integrons_report` or :func:`merge_results`
+    :type report: :class:`pandas.DataFrame` object.
+    :return: a copy of the report with the columns of *.integrons* files in the same order,
+             'ID_replicon', 'type_elt', 'annotation' and 'model' are categorical.
+    :rtype: :class:`pandas.DataFrame` object.
+    """
+    typed = pd.DataFrame(index=range(len(report)))
+    for col, dtype in _REPORT_SCHEMA:
+        values = pd.Series(report[col].values)
+        if dtype in ("string", "category"):
+            # the missing values stay missing, the others are strings (the ids can be parsed as numbers)
+            values = values.astype(str).where(values.notna(), None)
+        typed[col] = values.astype(dtype)
+    return typed
+
+
+class _ColumnarWriter:
+    """
+    Write integrons reports in a columnar file, one row group (or record batch) by report,
+    with the fixed schema of :func:`typed_report`.
+    """
+
+    def __init__(self, path, fmt):
+        """
+        :param str path: the path of the file to write
+        :param str fmt: the format 'parquet' or 'feather'
+        :raise IntegronError: if pyarrow is not installed
+        """
+        pa = _pyarrow()
+        self._pa = pa
+        # the schema with the pandas metadata to read the columns back with the same dtypes
+        self._schema = pa.Table.from_pandas(typed_report(merge_results()), schema=_arrow_schema(),
+                                            preserve_index=False).schema
+        # the categories of the previous reports, the dictionaries of a feather file can only be extended
+        self._categories = {col: [] for col, dtype in _REPORT_SCHEMA if dtype == 'category'}
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self._schema)
+        elif fmt == 'feather':
+            options = pa.ipc.IpcWriteOptions(compression='lz4', emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(path, self._schema, options=options)
+        else:
+            raise ValueError("unknown columnar format '{}' must be one of {}".format(fmt,
+                                                                                   ', '.join(COLUMNAR_FORMATS)))
+
+    def write(self, report):
+        """
+        :param report: the integrons report to append
+        :type report: :class:`pandas.DataFrame` object.
+        """
+        typed = typed_report(report)
+        for col, categories in self._categories.items():
+            categories.extend(cat for cat in typed[col].cat.categories if cat not in categories)
+            typed[col] = typed[col].cat.set_categories(categories)
+        self._writer.write_table(self._pa.Table.from_pandas(typed, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+def write_columnar_report(report, path, fmt):
+    """
+    Write an integrons report in a columnar format, with a fixed schema (see :func:`typed_report`).
+
+    :param report: the integrons report
+    :type report: :class:`pandas.DataFrame` object.
+    :param str path: the path of the file to write
+    :param str fmt: the format 'parquet' or 'feather'
+    :raise IntegronError: if pyarrow is not installed
+    """
+    writer = _ColumnarWriter(path, fmt)
+    try:
+        writer.write(report)
+    finally:
+        writer.close()
+
+
+class ResultsWriter:
+    """
+    Append the results of each replicon, as soon as it is analysed, to the merged results:
+    the integrons file (.integrons), the summary file (.summary) and the columnar report.
+    The results are written in the order they are added and are not kept in memory.
+
+    .. code-block:: python
+
+        with ResultsWriter(integron_path, summary_path, header="cmd: integron_finder ...") as writer:
+            for integrons_report, summary in replicons_results:
+                writer.add(integrons_report, summary)
+    """
+
+    _summary_columns = ['ID_replicon', 'CALIN', 'complete', 'In0']
+
+    def __init__(self, integron_path=None, summary_path=None, header=None, columnar_path=None, columnar_format=None):
+        """
+        :param str integron_path: the path of the merged integrons file, None to not write it.
+        :param str summary_path: the path of the merged summary file, None to not write it.
+        :param str header: the comment line on the top of the integrons and summary files.
+        :param str columnar_path: the path of the columnar report, None to not write it.
+        :param str columnar_format: the format of the columnar report 'parquet' or 'feather'
+        """
+        self._integron_file = open(integron_path, 'w') if integron_path else None
+        self._summary_file = open(summary_path, 'w') if summary_path else None
+        if header:
+            for out in (self._integron_file, self._summary_file):
+                if out is not None:
+                    out.write("# {}\n".format(header))
+        self._columnar = _ColumnarWriter(columnar_path, columnar_format) if columnar_path else None
+        self._integrons_nb = 0
+        self._summaries_nb = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, integrons_report, summary):
+        """
+        Append the results of one replicon.
+
+        :param integrons_report: the integrons of the replicon (see :func:`integrons_report`),
+                                 None or empty if there is no integron.
+        :type integrons_report: :class:`pandas.DataFrame` object.
+        :param summary: the summary of the replicon (see :func:`summary`), None if the replicon is skipped.
+        :type summary: :class:`pandas.DataFrame` object.
+        """
+        if integrons_report is not None and not integrons_report.empty:
+            if self._integron_file is not None:
+                integrons_report.to_csv(self._integron_file, sep="\t", index=False, na_rep="NA",
+                                        header=self._integrons_nb == 0)
+            if self._columnar is not None:
+                self._columnar.write(integrons_report)
+            self._integrons_nb += len(integrons_report)
+        if summary is not None and self._summary_file is not None:
+            summary.to_csv(self._summary_file, sep="\t", na_rep="NA", header=self._summaries_nb == 0)
+            self._summaries_nb += len(summary)
+
+    def close(self):
+        """
+        Close the merged results.
+        If no integrons was added the integrons file contains the comment '# No Integron found',
+        if no summary was added the summary file contains only the columns names.
+        """
+        if self._integron_file is not None:
+            if not self._integrons_nb:
+                self._integron_file.write("# No Integron found\n")
+            self._integron_file.close()
+            self._integron_file = None
+        if self._summary_file is not None:
+            if not self._summaries_nb:
+                self._summary_file.write("\t".join(self._summary_columns) + "\n")
+            self._summary_file.close()
+            self._summary_file = None
+        if self._columnar is not None:
+            self._columnar.close()
+            self._columnar = None
+
+
+def add_partition(dataset, report_path):
+    """
+    Add a columnar integrons report to a merged dataset.
+    The dataset is a directory partitioned by input file (hive layout: <dataset>/input_file=<name>/<report>),
+    so the report is copied as is, without being parsed.
+
+    :param str dataset: the path of the dataset directory, it is created if it does not exist.
+    :param str report_path: the path of the report (<name>.integrons.parquet or <name>.integrons.feather)
+    :return: the path of the partition
+    :rtype: str
+    """
+    report_name = os.path.basename(report_path)
+    for ext in COLUMNAR_FORMATS.values():
+        if report_name.endswith(ext):
+            input_name = report_name[:-len(ext)]
+            break
+    else:
+        raise ValueError("'{}' is not a columnar integrons report".format(report_path))
+    partition = os.path.join(dataset, "{}={}".format(_PARTITION_KEY, input_name))
+    os.makedirs(partition, exist_ok=True)
+    shutil.copy(report_path, partition)
+    return partition
+
+
+def read_columnar_report(path, input_files=None, replicons=None):
+    """
+    Read a columnar integrons report or a merged dataset (see :func:`add_partition`).
+    The filters are pushed down to the reader, so only the matching partitions and row groups are read.
+
+    :param str path: the path of a report (.integrons.parquet or .integrons.feather) or of a dataset directory
+    :param input_files: keep only the results of these input files (the names of the partitions)
+    :type input_files: list of str
+    :param replicons: keep only the results of these replicons
+    :type replicons: list of str
+    :return: the integrons report, with the *input_file* column for a dataset.
+    :rtype: :class:`pandas.DataFrame` object.
+    :raise IntegronError: if pyarrow is not installed
+    """
+    _pyarrow()
+    import pyarrow.dataset as ds
+    if os.path.isdir(path):
+        reports = glob.glob(os.path.join(path, '*', '*.integrons.*'))
+    else:
+        reports = [path]
+    fmt = 'feather' if any(p.endswith(COLUMNAR_FORMATS['feather']) for p in reports) else 'parquet'
+    dataset = ds.dataset(path, format='ipc' if fmt == 'feather' else fmt, partitioning='hive')
+    filters = []
+    if input_files is not None:
+        filters.append(ds.field(_PARTITION_KEY).isin(list(input_files)))
+    if replicons is not None:
+        filters.append(ds.field('ID_replicon').isin(list(replicons)))
+    expression = None
+    for expr in filters:
+        expression = expr if expression is None else expression & expr
+    return dataset.to_table(filter=expression).to_pandas()
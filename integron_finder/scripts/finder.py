@@ -34,37 +34,50 @@ integron_finder is a program that looks for integron in DNA sequences.
 import os
 import sys
 import argparse
-import distutils.spawn
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from shutil import which as find_executable
 
-import pandas as pd
-pd.options.mode.chained_assignment = 'raise'
 import integron_finder
 
 # must be done after import 'integron_finder'
 import colorlog
 _log = colorlog.getLogger('integron_finder')
 
-from Bio import SeqIO
-
-from integron_finder import IntegronError, logger_set_level
+from integron_finder import logger_set_level
 from integron_finder import utils
-from integron_finder import results
+from integron_finder import timing
 from integron_finder.topology import Topology
 from integron_finder.config import Config
-from integron_finder.hmm import scan_hmm_bank
-from integron_finder.integrase import find_integrase
-from integron_finder.attc import find_attc_max
-from integron_finder.infernal import find_attc
-from integron_finder.integron import find_integron
-from integron_finder.annotation import func_annot, add_feature
-from integron_finder.prot_db import GembaseDB, ProdigalDB
+
+# pandas, Biopython, matplotlib and the modules of the analysis pipeline
+# are imported in the functions which need them and not here.
+# So '--version', '--help' or a bad command line do not pay for them.
+# tests/test_import_time.py checks that it stays the case.
+
+
+class VersionAction(argparse.Action):
+    """
+    Display the version message and exit.
+    Unlike the argparse 'version' action the message is built only when the option is used,
+    as it needs to import all the dependencies to get their versions.
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS,
+                 help="show program's version number and exit"):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser._print_message(integron_finder.get_version_message() + '\n', sys.stdout)
+        parser.exit()
 
 
 def parse_args(args):
     parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument("replicon",
-                        help="Path to the replicon file (in fasta format), eg : path/to/file.fst or file.fst")
+                        help="Path to the replicon file (in fasta format), eg : path/to/file.fst or file.fst. "
+                             "The file can be compressed with gzip or bgzip.")
 
     parser.add_argument("--local-max",
                         default=False,
@@ -83,6 +96,19 @@ def parse_args(args):
                         type=int,
                         help='Number of CPUs used by INFERNAL and HMMER')
 
+    parser.add_argument('--workers',
+                        default=1,
+                        type=int,
+                        help='Number of replicons analysed in parallel. '
+                             'The cpus set with --cpu are shared between the workers (default: 1)')
+
+    parser.add_argument('--combined-integrase-search',
+                        action='store_true',
+                        default=False,
+                        help='Search the integrase and phage integrase profiles with one hmmsearch process '
+                             'instead of one process per profile. hmmsearch still scans the proteins once '
+                             'per profile, only one process launch is saved.')
+
     parser.add_argument('-dt', '--distance-thresh',
                         dest='distance_threshold',
                         default=4000,
@@ -101,21 +127,28 @@ def parse_args(args):
                         action="store_true")
 
     parser.add_argument('--cmsearch',
-                        default=distutils.spawn.find_executable("cmsearch"),
+                        default=find_executable("cmsearch"),
                         type=str,
                         help='Complete path to cmsearch if not in PATH. eg: /usr/local/bin/cmsearch')
 
     parser.add_argument('--hmmsearch',
-                        default=distutils.spawn.find_executable("hmmsearch"),
+                        default=find_executable("hmmsearch"),
                         help='Complete path to hmmsearch if not in PATH. eg: /usr/local/bin/hmmsearch')
 
     parser.add_argument('--prodigal',
-                        default=distutils.spawn.find_executable("prodigal"),
+                        default=find_executable("prodigal"),
                         help='Complete path to prodigal if not in PATH. eg: /usr/local/bin/prodigal')
 
     parser.add_argument('--path-func-annot',
                         help='Path to file containing all hmm bank paths (one per line)')
 
+    parser.add_argument('--func-annot-program',
+                        choices=['auto', 'hmmsearch', 'hmmscan'],
+                        default='auto',
+                        help="The program used to search the functional annotation profiles. "
+                             "'auto' uses hmmscan when the proteins to annotate are few compared to the profiles, "
+                             "hmmsearch otherwise (default: auto)")
+
     parser.add_argument("--gembase",
                         default=False,
                         help="Use gembase formatted protein file instead of Prodigal."
@@ -172,6 +205,21 @@ def parse_args(args):
                         help="Synonym of --local-max. Like a soaring eagle in the sky,"
                              " catching rabbits (or attC sites) by surprise.",
                         action="store_true")
+    parser.add_argument("--no-local-max-batch",
+                        default=False,
+                        help="With --local-max, search the windows around the integrons one by one "
+                             "instead of searching the windows of all integrons together, one cmsearch by round.",
+                        action="store_true")
+    parser.add_argument('--cache-dir',
+                        help='Path to a directory where the results of cmsearch, hmmsearch and prodigal are kept '
+                             'to be reused by the next runs on the same sequences.')
+
+    parser.add_argument('--cache-size',
+                        default=5000,
+                        type=int,
+                        help='The maximum size of the cache directory in Mb, '
+                             'the least recently used results are removed first (default: 5000)')
+
     output_options = parser.add_argument_group("Output options")
     output_options.add_argument('--pdf',
                                 action='store_true',
@@ -183,6 +231,17 @@ def parse_args(args):
                                 default=False,
                                 help='generate a GenBank file with the sequence annotated with the same annotations '
                                      'than .integrons file.')
+    output_options.add_argument('--columnar-output',
+                                choices=['parquet', 'feather'],
+                                help='Write also the integrons of all replicons in a columnar file '
+                                     '(<input>.integrons.parquet or <input>.integrons.feather) '
+                                     'with a fixed schema. Need the pyarrow package.')
+    output_options.add_argument('--timing',
+                                action='store_true',
+                                default=False,
+                                help='Write the wall time, the cpu time and the memory used by each stage '
+                                     '(prodigal, hmmsearch, cmsearch, parsing, ...) of the analysis '
+                                     'of each replicon in <input>.timing.tsv')
     output_options.add_argument('--keep-tmp',
                                 action='store_true',
                                 default=False,
@@ -208,8 +267,7 @@ def parse_args(args):
                         help="The path to a file where the topology for each replicon is specified.")
 
     parser.add_argument("-V", "--version",
-                        action="version",
-                        version=integron_finder.get_version_message())
+                        action=VersionAction)
 
     parser.add_argument("--mute",
                         action='store_true',
@@ -258,49 +316,45 @@ def find_integron_in_one_replicon(replicon, config):
     :type replicon: a :class:`Bio.SeqRecord` object.
     :param config: The configuration
     :type config: a :class:`integron_finder.config.Config` object.
-    :returns: the path to the integron file (<replicon_id>.integrons)
-              and the summary file (<replicon_id.summary>).
-              if there is no integron the summary file is None
-    :rtype: tuple (str integron_file, str summary_file) or (str integron_file, None)
+    :returns: the integrons report (see :func:`integron_finder.results.integrons_report`)
+              and the summary (see :func:`integron_finder.results.summary`) of the replicon.
+              The report is None if there is no integron, both are None if the replicon is skipped.
+              With --split-results they are also written in <replicon_id>.integrons and <replicon_id>.summary
+    :rtype: tuple (:class:`pandas.DataFrame` integrons_report, :class:`pandas.DataFrame` summary)
     """
+    import pandas as pd
+    pd.options.mode.chained_assignment = 'raise'
+    from Bio import SeqIO
+
+    from integron_finder import results
+    from integron_finder.integrase import find_integrase
+    from integron_finder.attc import find_attc_max
+    from integron_finder.infernal import find_attc
+    from integron_finder.integron import find_integron
+    from integron_finder.annotation import func_annot, add_feature
+    from integron_finder.prot_db import GembaseDB, ProdigalDB
+
     result_tmp_dir = config.tmp_dir(replicon.id)
     try:
         os.mkdir(result_tmp_dir)
     except OSError:
         pass
-    tmp_replicon_path = os.path.join(result_tmp_dir, replicon.id + '.fst')
-    SeqIO.write(replicon, tmp_replicon_path, "fasta")
+    # the input file itself or a copy of the record, without serialization through Biopython
+    tmp_replicon_path = utils.replicon_file(replicon, result_tmp_dir)
     # create attr path
     # used to generate protein file with prodigal
     replicon.path = tmp_replicon_path
 
-    # func_annot_path is the canonical path for Functional_annotation
-    # path_func_annot is the path provide on the command line
-    if config.func_annot and not config.no_proteins and not config.path_func_annot:
-        if os.path.exists('bank_hmm'):
-            fa_hmm = scan_hmm_bank('bank_hmm')
-        elif os.path.exists(config.func_annot_path):
-            fa_hmm = scan_hmm_bank(config.func_annot_path)
-        else:
-            raise IntegronError("the dir '{}' neither 'bank_hmm' exists, specify the location of hmm "
-                                "profile with --path-func-annot option".format(config.func_annot_path))
-        is_func_annot = True
-
-    elif config.path_func_annot and config.no_proteins is False:
-        fa_hmm = scan_hmm_bank(config.path_func_annot)
-        is_func_annot = True
-    else:
-        is_func_annot = False
+    # the profiles of the functional annotation gathered in one bank
+    fa_bank = config.func_annot_bank
 
-    if is_func_annot and not fa_hmm:
-        _log.warning("No hmm profiles for functional annotation detected, skip functional annotation step.")
-
-    if config.gembase_path:
-        protein_db = GembaseDB(replicon, config, gembase_path=config.gembase_path)
-    elif config.gembase:
-        protein_db = GembaseDB(replicon, config)
-    else:
-        protein_db = ProdigalDB(replicon, config)
+    with timing.stage('protein_db'):
+        if config.gembase_path:
+            protein_db = GembaseDB(replicon, config, gembase_path=config.gembase_path)
+        elif config.gembase:
+            protein_db = GembaseDB(replicon, config)
+        else:
+            protein_db = ProdigalDB(replicon, config)
 
     ##################
     # Default search #
@@ -318,10 +372,12 @@ def find_integron_in_one_replicon(replicon, config):
             # find attc with cmsearch
             find_attc(tmp_replicon_path, replicon.name, config.cmsearch, result_tmp_dir, config.model_attc_path,
                       incE=config.evalue_attc,
-                      cpu=config.cpu)
+                      cpu=config.cpu,
+                      cache=config.cache)
 
         _log.info("Default search done... : ")
-        integrons = find_integron(replicon, protein_db, attC_default_file, intI_file, phageI_file, config)
+        with timing.stage('find_integron'):
+            integrons = find_integron(replicon, protein_db, attC_default_file, intI_file, phageI_file, config)
 
         #########################
         # Search with local_max #
@@ -330,13 +386,16 @@ def find_integron_in_one_replicon(replicon, config):
             _log.info("Starting search with local_max...:")
             if not os.path.isfile(os.path.join(result_tmp_dir, "integron_max.pickle")):
                 circular = True if replicon.topology == 'circ' else False
-                integron_max = find_attc_max(integrons, replicon, config.distance_threshold,
-                                             config.model_attc_path,
-                                             max_attc_size=config.max_attc_size,
-                                             min_attc_size=config.min_attc_size,
-                                             circular=circular, out_dir=result_tmp_dir,
-                                             cpu=config.cpu,
-                                             evalue_attc=config.evalue_attc)
+                with timing.stage('local_max'):
+                    integron_max = find_attc_max(integrons, replicon, config.distance_threshold,
+                                                 config.model_attc_path,
+                                                 max_attc_size=config.max_attc_size,
+                                                 min_attc_size=config.min_attc_size,
+                                                 circular=circular, out_dir=result_tmp_dir,
+                                                 cpu=config.cpu,
+                                                 evalue_attc=config.evalue_attc,
+                                                 cmsearch_bin=config.cmsearch,
+                                                 batch=config.local_max_batch)
                 integron_max.to_pickle(os.path.join(result_tmp_dir, "integron_max.pickle"))
                 _log.info("Search with local_max done... :")
 
@@ -347,7 +406,8 @@ def find_integron_in_one_replicon(replicon, config):
                                             (config.min_attc_size < abs(integron_max.pos_end - integron_max.pos_beg))]
                 _log.info("Search with local_max was already done, continue... :")
 
-            integrons = find_integron(replicon, protein_db, integron_max, intI_file, phageI_file, config)
+            with timing.stage('find_integron'):
+                integrons = find_integron(replicon, protein_db, integron_max, intI_file, phageI_file, config)
 
         ##########################
         # Add promoters and attI #
@@ -357,56 +417,68 @@ def find_integron_in_one_replicon(replicon, config):
             if integron_type != "In0":  # complete & CALIN
                 if not config.no_proteins:
                     _log.info("Adding proteins ... :")
-                    integron.add_proteins(protein_db)
+                    with timing.stage('add_proteins'):
+                        integron.add_proteins(protein_db)
 
             if config.promoter_attI:
                 _log.info("Adding promoters and attI ... :")
-                if integron_type == "complete":
-                    integron.add_promoter()
-                    integron.add_attI()
-                elif integron_type == "In0":
-                    integron.add_attI()
-                    integron.add_promoter()
+                with timing.stage('promoter_attI'):
+                    if integron_type == "complete":
+                        integron.add_promoter()
+                        integron.add_attI()
+                    elif integron_type == "In0":
+                        integron.add_attI()
+                        integron.add_promoter()
         #########################
         # Functional annotation #
         #########################
-        if is_func_annot and fa_hmm:
+        if fa_bank:
             _log.info("Starting functional annotation ...:")
-            func_annot(integrons, replicon, protein_db, fa_hmm, config, result_tmp_dir)
+            with timing.stage('func_annot'):
+                func_annot(integrons, replicon, protein_db, [fa_bank], config, result_tmp_dir)
 
         #######################
         # Writing out results #
         #######################
         _log.info("Writing out results for replicon {}".format(replicon.id))
 
-        if config.pdf:
-            for j, integron in enumerate(integrons, 1):
-                if integron.type() == "complete":
-                    integron.draw_integron(file=os.path.join(config.result_dir, "{}_{}.pdf".format(replicon.id, j)))
-
-        base_outfile = os.path.join(config.result_dir, replicon.id)
-        integron_file = base_outfile + ".integrons"
-        _log.debug("Writing integron_file {}".format(integron_file))
-        summary_file = base_outfile + ".summary"
-        if integrons:
-            integrons_report = results.integrons_report(integrons)
-            integrons_report.to_csv(integron_file, sep="\t", index=False, na_rep="NA")
-            summary = results.summary(integrons_report)
-            if config.gbk:
-                add_feature(replicon, integrons_report, protein_db, config.distance_threshold)
-                SeqIO.write(replicon, os.path.join(config.result_dir, replicon.id + ".gbk"), "genbank")
-        else:
-            with open(integron_file, "w") as out_f:
-                out_f.write("# No Integron found\n")
-            summary = pd.DataFrame([[replicon.id, 0, 0, 0]],
-                                   columns=['ID_replicon', 'CALIN', 'complete', 'In0'])
-            summary = summary.set_index(['ID_replicon'])
-        summary.to_csv(summary_file, sep="\t", na_rep="NA")
+        with timing.stage('write_results'):
+            if config.pdf:
+                with timing.stage('pdf'):
+                    for j, integron in enumerate(integrons, 1):
+                        if integron.type() == "complete":
+                            integron.draw_integron(file=os.path.join(config.result_dir,
+                                                                     "{}_{}.pdf".format(replicon.id, j)))
+
+            if integrons:
+                integrons_report = results.integrons_report(integrons)
+                summary = results.summary(integrons_report)
+                if config.gbk:
+                    with timing.stage('gbk'):
+                        add_feature(replicon, integrons_report, protein_db, config.distance_threshold)
+                        SeqIO.write(replicon, os.path.join(config.result_dir, replicon.id + ".gbk"), "genbank")
+            else:
+                integrons_report = None
+                summary = pd.DataFrame([[replicon.id, 0, 0, 0]],
+                                       columns=['ID_replicon', 'CALIN', 'complete', 'In0'])
+                summary = summary.set_index(['ID_replicon'])
+
+            if config.split_results:
+                base_outfile = os.path.join(config.result_dir, replicon.id)
+                integron_file = base_outfile + ".integrons"
+                _log.debug("Writing integron_file {}".format(integron_file))
+                summary_file = base_outfile + ".summary"
+                if integrons_report is not None:
+                    integrons_report.to_csv(integron_file, sep="\t", index=False, na_rep="NA")
+                else:
+                    with open(integron_file, "w") as out_f:
+                        out_f.write("# No Integron found\n")
+                summary.to_csv(summary_file, sep="\t", na_rep="NA")
 
     except integron_finder.EmptyFileError as err:
         _log.warning('############ Skip replicon {} ############'.format(replicon.name))
-        integron_file = ''
-        summary_file = ''
+        integrons_report = None
+        summary = None
     #########################
     # clean temporary files #
     #########################
@@ -417,7 +489,164 @@ def find_integron_in_one_replicon(replicon, config):
         except Exception as err:
             _log.warning("Cannot remove temporary results : '{} : {}'".format(result_tmp_dir, str(err)))
 
-    return integron_file, summary_file
+    return integrons_report, summary
+
+
+def _init_worker(log_file, mute, log_level):
+    """
+    Initialize the loggers of a worker process.
+    When workers are forked they inherit the loggers of the main process, so there is nothing to do.
+
+    :param str log_file: The path to the log file
+    :param bool mute: True if the logs must not be written on stdout
+    :param log_level: the output verbosity
+    :type log_level: a positive int or a string among 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'
+    """
+    if not colorlog.getLogger('integron_finder').handlers:
+        integron_finder.init_logger(log_file=log_file, out=not mute)
+        logger_set_level(log_level)
+
+
+# Rough weights used to estimate the cost of the analysis of a replicon.
+# The unit is the cost of the default search on one Mb.
+# They are only used to order the replicons, the timing log allow to check them against real runs.
+_COST_OVERHEAD = 0.05  # start of prodigal, hmmsearch and cmsearch processes whatever the replicon size
+_COST_LOCAL_MAX = 1.0  # extra cost by Mb with --local-max
+_COST_FUNC_ANNOT = 0.5  # extra cost by Mb with --func-annot
+
+
+def estimate_replicon_cost(seq_len, config):
+    """
+    Estimate the cost of the analysis of one replicon.
+    The cost grows linearly with the replicon length and with the searches asked in config.
+
+    :param int seq_len: the length of the replicon
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :return: the estimated cost (1 unit ~ the default search on one Mb)
+    :rtype: float
+    """
+    cost_by_mb = 1.0
+    if config.local_max:
+        cost_by_mb += _COST_LOCAL_MAX
+    if config.func_annot or config.path_func_annot:
+        cost_by_mb += _COST_FUNC_ANNOT
+    return _COST_OVERHEAD + cost_by_mb * seq_len / 1000000
+
+
+def _timed_find_integron_in_one_replicon(replicon, config):
+    """
+    Call :func:`find_integron_in_one_replicon` and measure its wall time.
+
+    With --timing the resources used by each stage of the analysis are recorded too.
+
+    :return: the integrons report, the summary, the wall time in seconds and the stages of the analysis
+             (None without --timing)
+    :rtype: tuple (:class:`pandas.DataFrame` integrons_report, :class:`pandas.DataFrame` summary, float wall_time,
+            :class:`integron_finder.timing.StageRecorder` stages)
+    """
+    stages = timing.StageRecorder(replicon.id) if config.timing else None
+    start = time.perf_counter()
+    with timing.recording(stages):
+        integrons_report, summary = find_integron_in_one_replicon(replicon, config)
+    return integrons_report, summary, time.perf_counter() - start, stages
+
+
+def _log_timing(replicon_id, seq_len, cost, wall_time):
+    """
+    log the estimated cost and the real wall time of the analysis of one replicon
+    """
+    _log.info("Timing replicon {}: length = {} bp, estimated cost = {:.3f}, wall time = {:.2f} s".format(
+        replicon_id, seq_len, cost, wall_time))
+
+
+def find_integrons_in_parallel(sequences_db, config, log_level='WARNING'):
+    """
+    Analyse the replicons of *sequences_db* in a pool of *config.workers* processes.
+    Each replicon is analysed by :func:`find_integron_in_one_replicon`
+    and the cpus set with --cpu are shared between the workers.
+
+    The cost of each replicon is estimated (see :func:`estimate_replicon_cost`) before the dispatch
+    and the most expensive replicons are submitted first, so the large chromosomes do not start last.
+    At most twice as many replicons as workers are read and submitted ahead,
+    the next ones are submitted as the jobs end, so the input is never loaded in memory at once.
+
+    :param sequences_db: the replicons to analyse
+    :type sequences_db: :class:`integron_finder.utils.FastaIterator` object
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :param log_level: the output verbosity of the workers
+    :type log_level: a positive int or a string among 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'
+    :return: the integrons report, the summary and the stages of the analysis of each replicon
+             (see :func:`_timed_find_integron_in_one_replicon`), in the same order as the replicons in *sequences_db*.
+             Each result is generated as soon as it and the results of the previous replicons are available.
+    :rtype: generator of tuple (:class:`pandas.DataFrame` integrons_report, :class:`pandas.DataFrame` summary,
+            :class:`integron_finder.timing.StageRecorder` stages)
+    """
+    sequences_db_len = len(sequences_db)
+    schedule = []
+    for rep_no, seq_id in enumerate(sequences_db.seq_index.keys(), 1):
+        seq_len = sequences_db.seq_len(seq_id)
+        schedule.append((estimate_replicon_cost(seq_len, config), rep_no, seq_id, seq_len))
+    # the most expensive first, the input order between replicons with the same cost
+    schedule.sort(key=lambda job: (-job[0], job[1]))
+
+    log_file = os.path.join(config.result_dir, 'integron_finder.out')
+    with ProcessPoolExecutor(max_workers=config.workers,
+                             initializer=_init_worker,
+                             initargs=(log_file, config.mute, log_level)) as executor:
+        max_pending = 2 * config.workers
+        pending = {}
+        # the finished jobs by replicon number, None for the skipped replicons
+        done = {}
+        next_rep_no = 1
+
+        def ready():
+            """
+            :return: the results of the finished jobs which follow the last result yielded in input order
+            """
+            nonlocal next_rep_no
+            while next_rep_no in done:
+                job = done.pop(next_rep_no)
+                next_rep_no += 1
+                if job is not None:
+                    replicon_id, seq_len, cost, future = job
+                    integrons_report, summary, wall_time, stages = future.result()
+                    _log_timing(replicon_id, seq_len, cost, wall_time)
+                    yield integrons_report, summary, stages
+
+        def collect(block_until):
+            """
+            Wait until the number of pending jobs is less than or equal to *block_until*
+            and move the finished jobs in *done*.
+            """
+            while len(pending) > block_until:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    rep_no, job = pending.pop(future)
+                    done[rep_no] = job
+
+        for cost, rep_no, seq_id, seq_len in schedule:
+            collect(max_pending - 1)
+            yield from ready()
+            replicon = sequences_db[seq_id]
+            # if replicon contains illegal characters
+            # or replicon is too short < 50 bp
+            # then replicon is None
+            if replicon is not None:
+                _log.info("############ Submitting replicon {} ({}/{}) ############\n".format(replicon.id,
+                                                                                              rep_no,
+                                                                                              sequences_db_len))
+                future = executor.submit(_timed_find_integron_in_one_replicon, replicon, config)
+                pending[future] = rep_no, (replicon.id, seq_len, cost, future)
+            else:
+                _log.warning("############ Skipping replicon {}/{} ############".format(rep_no,
+                                                                                        sequences_db_len))
+                done[rep_no] = None
+        while pending:
+            collect(len(pending) - 1)
+            yield from ready()
+        yield from ready()
 
 
 def header(args):
@@ -524,10 +753,9 @@ def main(args=None, loglevel=None):
 
     if not loglevel:
         # logs are specify from args options
-        logger_set_level(config.log_level)
-    else:
-        # used by unit tests to mute or unmute logs
-        logger_set_level(loglevel)
+        loglevel = config.log_level
+    # else loglevel is used by unit tests to mute or unmute logs
+    logger_set_level(loglevel)
 
     #######################################
     # do last config check before running #
@@ -550,6 +778,17 @@ Please install prodigal package or setup 'prodigal' binary path with --prodigal
         _log.critical(msg)
         raise RuntimeError(msg)
 
+    if config.columnar_output:
+        from integron_finder import results
+        from integron_finder import IntegronError
+        try:
+            results._pyarrow()
+        except IntegronError:
+            msg = """cannot import 'pyarrow'.
+Please install pyarrow package to use the --columnar-output option"""
+            _log.critical(msg)
+            raise RuntimeError(msg) from None
+
     ################
     # print Header #
     ################
@@ -569,7 +808,13 @@ Please install prodigal package or setup 'prodigal' binary path with --prodigal
     log_header.propagate = False
     log_header.info(header(args))
 
-    with utils.FastaIterator(config.input_seq_path, dist_threshold=config.distance_threshold) as sequences_db:
+    # the profiles of the functional annotation are gathered once, before the replicons are dispatched
+    fa_bank = config.func_annot_bank
+    if fa_bank:
+        _log.info("Functional annotation with {} profiles from {}".format(fa_bank.profiles_nb, fa_bank.path))
+
+    with utils.FastaIterator(config.input_seq_path, dist_threshold=config.distance_threshold,
+                             tmp_dir=config.result_dir) as sequences_db:
         ################
         # set topology #
         ################
@@ -588,49 +833,48 @@ Please install prodigal package or setup 'prodigal' binary path with --prodigal
         ##############
         # do the job #
         ##############
-        sequences_db_len = len(sequences_db)
-        all_integrons = []
-        all_summaries = []
-        for rep_no, replicon in enumerate(sequences_db, 1):
-            # if replicon contains illegal characters
-            # or replicon is too short < 50 bp
-            # then replicon is None
-            if replicon is not None:
-                _log.info("############ Processing replicon {} ({}/{}) ############\n".format(replicon.id,
-                                                                                              rep_no,
-                                                                                              sequences_db_len))
-                integron_res, summary = find_integron_in_one_replicon(replicon, config)
-                if integron_res:
-                    all_integrons.append(integron_res)
-                if summary:
-                    all_summaries.append(summary)
-            else:
-                _log.warning("############ Skipping replicon {}/{} ############".format(rep_no,
-                                                                                        sequences_db_len))
-    if not config.split_results:
-        _log.info("Merging integrons results.\n")
-        agg_integrons = results.merge_results(*all_integrons)
-        agg_summary = results.merge_results(*all_summaries)
+        # the results of each replicon are appended to the merged results as soon as they are available
+        from integron_finder import results
         outfile_base_name = os.path.join(config.result_dir, utils.get_name_from_path(config.input_seq_path))
-        merged_integron_path = outfile_base_name + ".integrons"
-        if not agg_integrons.empty:
-            with open(merged_integron_path, 'w') as merged_integron_file:
-                merged_integron_file.write(f"# cmd: integron_finder {' '.join(args)}\n")
-                agg_integrons.to_csv(merged_integron_file, sep="\t", index=False, na_rep="NA")
+        if config.columnar_output:
+            columnar_path = outfile_base_name + results.COLUMNAR_FORMATS[config.columnar_output]
         else:
-            with open(merged_integron_path, "w") as merged_integron_file:
-                merged_integron_file.write(f"# cmd: integron_finder {' '.join(args)}\n")
-                merged_integron_file.write("# No Integron found\n")
-
-        merged_summary_path = outfile_base_name + ".summary"
-        with open(merged_summary_path, 'w') as merged_summary_file:
-            merged_summary_file.write(f"# cmd: integron_finder {' '.join(args)}\n")
-            agg_summary.to_csv(merged_summary_file, sep="\t")
-
-        for _file in all_integrons + all_summaries:
-            if _file != merged_integron_path and _file != merged_summary_path:
-                # in special case where the merged file has the same name that a replicon result file
-                os.unlink(_file)
+            columnar_path = None
+        results_writer = results.ResultsWriter(
+            integron_path=None if config.split_results else outfile_base_name + ".integrons",
+            summary_path=None if config.split_results else outfile_base_name + ".summary",
+            header=f"cmd: integron_finder {' '.join(args)}",
+            columnar_path=columnar_path,
+            columnar_format=config.columnar_output)
+        timing_writer = timing.TimingWriter(outfile_base_name + ".timing.tsv" if config.timing else None,
+                                            header=f"cmd: integron_finder {' '.join(args)}")
+        with results_writer, timing_writer:
+            sequences_db_len = len(sequences_db)
+            if config.workers > 1:
+                for integrons_report, summary, stages in find_integrons_in_parallel(sequences_db, config,
+                                                                                    log_level=loglevel):
+                    results_writer.add(integrons_report, summary)
+                    timing_writer.add(stages)
+            else:
+                for rep_no, replicon in enumerate(sequences_db, 1):
+                    # if replicon contains illegal characters
+                    # or replicon is too short < 50 bp
+                    # then replicon is None
+                    if replicon is not None:
+                        _log.info("############ Processing replicon {} ({}/{}) ############\n".format(
+                            replicon.id, rep_no, sequences_db_len))
+                        integrons_report, summary, wall_time, stages = _timed_find_integron_in_one_replicon(
+                            replicon, config)
+                        _log_timing(replicon.id, len(replicon), estimate_replicon_cost(len(replicon), config),
+                                    wall_time)
+                        results_writer.add(integrons_report, summary)
+                        timing_writer.add(stages)
+                    else:
+                        _log.warning("############ Skipping replicon {}/{} ############".format(rep_no,
+                                                                                                sequences_db_len))
+
+    if fa_bank and not config.keep_tmp and not config.cache:
+        shutil.rmtree(config.tmp_dir('func_annot'), ignore_errors=True)
 
 
 if __name__ == "__main__":
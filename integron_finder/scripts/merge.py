@@ -42,6 +42,21 @@ from integron_finder import utils
 from integron_finder import results
 
 
+def _results_files(ext, *in_dirs):
+    """
+    :param str ext: the extension of the results files
+    :param in_dirs: The path of the source directories
+    :type in_dirs: list of str
+    :return: the results files of the directories, plain or compressed with gzip (ext + '.gz')
+    :rtype: list of str
+    """
+    results_files = []
+    for _dir in in_dirs:
+        for pattern in ('*' + ext, '*' + ext + '.gz'):
+            results_files.extend(glob.glob(os.path.join(_dir, pattern)))
+    return results_files
+
+
 def merge_integrons(out_file, *in_dirs):
     """
 
@@ -50,10 +65,7 @@ def merge_integrons(out_file, *in_dirs):
     :param str out_file: The path to the merged file
     :return: The The path to the merged file
     """
-    integrons_files = []
-    for _dir in in_dirs:
-        in_files = glob.glob(os.path.join(_dir, '*' + '.integrons'))
-        integrons_files.extend(in_files)
+    integrons_files = _results_files('.integrons', *in_dirs)
     if integrons_files:
         agg_file = results.merge_results(*integrons_files)
         agg_file.to_csv(out_file, index=False, sep="\t", na_rep="NA")
@@ -72,16 +84,33 @@ def merge_summary(out_file, *in_dirs):
     :param str out_file: The path to the merged file
     :return: The The path to the merged file
     """
-    summaries_files = []
-    for _dir in in_dirs:
-        in_files = glob.glob(os.path.join(_dir, '*' + '.summary'))
-        summaries_files.extend(in_files)
+    summaries_files = _results_files('.summary', *in_dirs)
     if summaries_files:
         agg_file = results.merge_results(*summaries_files)
         agg_file.to_csv(out_file, sep="\t")
         return out_file
 
 
+def merge_columnar(out_dataset, ext, *in_dirs):
+    """
+    Gather the columnar integrons reports (see :func:`integron_finder.results.write_columnar_report`)
+    in one dataset partitioned by input file. The reports are copied, not parsed.
+
+    :param str out_dataset: The path to the merged dataset directory
+    :param str ext: the extension of the reports to merge ('.integrons.parquet' or '.integrons.feather')
+    :param in_dirs: The path of the source directories
+    :type in_dirs: list of str
+    :return: The path to the merged dataset or None if there is no reports to merge.
+    """
+    columnar_files = []
+    for _dir in in_dirs:
+        columnar_files.extend(glob.glob(os.path.join(_dir, '*' + ext)))
+    if columnar_files:
+        for columnar_file in columnar_files:
+            results.add_partition(out_dataset, columnar_file)
+        return out_dataset
+
+
 def copy_file(out_dir, ext, *from_dirs):
     """
     copy files from *from_dirs* and finishing with *ext* to the *out_dir* directory
@@ -125,8 +154,9 @@ def parse_args(args=None):
     """
     description = """Merge different integron_finder results in one
      
- - merge the '.integrons' files
- - merge the '.summary' files
+ - merge the '.integrons' files (or the '.integrons.gz' files)
+ - merge the '.summary' files (or the '.summary.gz' files)
+ - gather the '.integrons.parquet' or '.integrons.feather' files in one dataset partitioned by input file
  - copy the *.pdf files if they exist
  - copy the *.gbk file if they exist
  - copy the temporary directory if they exist
@@ -216,6 +246,8 @@ def main(args=None, log_level=None):
     merge_integrons(integron_file_out, *parsed_args.results)
     summary_file_out = os.path.join(outdir, parsed_args.outfile + ".summary")
     merge_summary(summary_file_out, *parsed_args.results)
+    for ext in results.COLUMNAR_FORMATS.values():
+        merge_columnar(os.path.join(outdir, parsed_args.outfile + ext), ext, *parsed_args.results)
     copy_file(outdir, '.gbk', *parsed_args.results)
     copy_file(outdir, '.pdf', *parsed_args.results)
     copy_dir(outdir, 'tmp_*', *parsed_args.results)
@@ -31,20 +31,84 @@ import sys
 import math
 import os
 import argparse
-from itertools import zip_longest
+import heapq
 import re
 
-from Bio import SeqIO
-
 import integron_finder
 # must be done after import 'integron_finder'
 import colorlog
 
 from integron_finder import logger_set_level
 from integron_finder import utils
+from integron_finder.config import Config
+
+_log = colorlog.getLogger('integron_finder.split')
+
+
+def _chunk_name(chunk_name, outdir):
+    """
+    :param str chunk_name: the name of the chunk file
+    :param str outdir: The path of a directory where to write chunk files.
+    :return: the path of the chunk file, with the suffix _chunk_i if a file with this name already exists.
+    :rtype: str
+    """
+    chunk_name = os.path.join(outdir, chunk_name)
+    i = 0
+    while os.path.exists(chunk_name):
+        root, ext = os.path.splitext(chunk_name)
+        i += 1
+        match = re.search(r"_chunk_\d+$", root)
+        if match:
+            root = root[:match.start()]
+        chunk_name = "{}_chunk_{}{}".format(root, i, ext)
+    return chunk_name
 
 
-def split(replicon_path, chunk=None, outdir='.'):
+def _write_chunk(sequences_db, seq_ids, chunk_name):
+    """
+    Write the records of a chunk by copying them from the input file, without parsing them.
+
+    :param sequences_db: The sequences to split
+    :type sequences_db: A :class:`integron_finder.utils.FastaIterator` object.
+    :param seq_ids: the ids of the sequences of the chunk
+    :type seq_ids: list of str
+    :param str chunk_name: the path of the chunk file
+    """
+    with utils.open_fasta(sequences_db.path) as src, open(chunk_name, 'wb') as dest:
+        for seq_id in seq_ids:
+            source = sequences_db._fasta_source(seq_id)
+            if source is not None:
+                last = utils.write_fasta_record(src, source.offset, dest)
+            else:
+                raw = sequences_db.seq_index.get_raw(seq_id)
+                dest.write(raw)
+                last = raw[-1:]
+            if last != b'\n':
+                dest.write(b'\n')
+
+
+def _balance(weights, chunk):
+    """
+    Bin-pack the sequences in *chunk* chunks of the same weight:
+    each sequence, from the heaviest to the lightest, goes in the lightest chunk.
+
+    :param weights: the weight of each sequence in the input order
+    :type weights: list of tuple (str seq_id, float weight)
+    :param int chunk: the number of chunks
+    :return: the sequence ids of each chunk, in the input order
+    :rtype: list of list of str
+    """
+    chunks = [[] for _ in range(min(chunk, len(weights)))]
+    loads = [(0, chunk_no) for chunk_no in range(len(chunks))]
+    heaviest_first = sorted(range(len(weights)), key=lambda rank: (-weights[rank][1], rank))
+    for rank in heaviest_first:
+        load, chunk_no = heapq.heappop(loads)
+        chunks[chunk_no].append(rank)
+        heapq.heappush(loads, (load + weights[rank][1], chunk_no))
+    return [[weights[rank][0] for rank in sorted(ranks)] for ranks in chunks]
+
+
+def split(replicon_path, chunk=None, outdir='.', balance=None, config=None, report=None):
     """
     Split the replicon_file in *chunk* chunks and write them in files.
     the name of the chunk is the input filename with suffix '_chunk_i'
@@ -53,68 +117,83 @@ def split(replicon_path, chunk=None, outdir='.'):
     There also a system that prevent to over write an existing file by appending (number)
     to the file name for instance ESCO001.B.00018.P002_(1).fst
 
+    The records are copied from the input file, as is, without parsing them.
+    The input file can be compressed with gzip or bgzip (see :class:`integron_finder.utils.FastaIterator`),
+    the chunks are not compressed.
+
     :param str replicon_path: The path to the replicon file.
     :param int chunk: The number of chunk desire (chunk > 0).
     :param str outdir: The path of a directory where to write chunk files.
                        The directory must exists.
+    :param str balance: How to fill the chunks. None: the same number of consecutive sequences in each chunk,
+                        'bp': the same total length, 'cost': the same estimated runtime of integron_finder
+                        (see :func:`integron_finder.scripts.finder.estimate_replicon_cost`).
+    :param config: The configuration of integron_finder used to estimate the runtime of the chunks,
+                   by default the runtime of the default search.
+    :type config: a :class:`integron_finder.config.Config` object.
+    :param str report: The path of a file where to write the number of sequences,
+                       the total length and the estimated cost of each chunk (tsv), None to not write it.
     :return: The name of all chunks created.
     :rtype: List of strings.
     """
-    def grouper(sequences_db, chunk_size):
-        """
-
-        :param sequences_db: The sequences to group
-        :type sequences_db: A :class:`integron_finder.utils.FastaIterator` object.
-        :param int chunk_size: The number of sequence by Chunk file.
-        :return: a chunk of sequences.
-        :rtype: An iterator of tuples.
-        """
-        args = [iter(sequences_db)] * chunk_size
-        return zip_longest(*args)
-
-    with utils.FastaIterator(replicon_path) as sequences_db:
+    from integron_finder.scripts.finder import estimate_replicon_cost
+    if config is None:
+        config = Config(argparse.Namespace(local_max=False, func_annot=False, path_func_annot=None))
+    with utils.FastaIterator(replicon_path, tmp_dir=outdir) as sequences_db:
         sequences_db_len = len(sequences_db)
         if not chunk:
             chunk_size = 1
         else:
             chunk_size = math.ceil(sequences_db_len / chunk)
 
-        chunks = grouper(sequences_db, chunk_size)
+        # if replicon contains illegal characters
+        # or replicon is too short < 50 bp
+        # then replicon is skipped
+        seq_lens = []
+        for rep_no, seq_id in enumerate(sequences_db.seq_index, 1):
+            seq_len = sequences_db.checked_seq_len(seq_id)
+            if seq_len is not None:
+                seq_lens.append((seq_id, seq_len))
+            elif balance and chunk:
+                _log.warning("Skipping replicon {}/{}".format(rep_no, sequences_db_len))
+            else:
+                _log.warning("Skipping replicon {}/{} in chunk {}".format(rep_no,
+                                                                        sequences_db_len,
+                                                                        (rep_no - 1) // chunk_size + 1))
+        costs = [(seq_id, estimate_replicon_cost(seq_len, config)) for seq_id, seq_len in seq_lens]
+
+        if balance and chunk:
+            chunks = _balance(costs if balance == 'cost' else seq_lens, chunk)
+        else:
+            rank = {seq_id: rep_no for rep_no, seq_id in enumerate(sequences_db.seq_index)}
+            chunks = [[] for _ in range(math.ceil(sequences_db_len / chunk_size))]
+            for seq_id, _ in seq_lens:
+                chunks[rank[seq_id] // chunk_size].append(seq_id)
+
+        seq_lens = dict(seq_lens)
+        costs = dict(costs)
         all_chunk_name = []
-        for chunk_no, chunk_in in enumerate(chunks, 1):
-            # if replicon contains illegal characters
-            # or replicon is too short < 50 bp
-            # then replicon is None
-            chunk_out = []
-            for rep_no, replicon in enumerate(chunk_in, 1):
-                if replicon is not None:
-                    replicon_name = replicon.id
-                    chunk_out.append(replicon)
-                else:
-                    rep_no_in_db = (chunk_no - 1) * chunk_size + rep_no
-                    if rep_no_in_db <= sequences_db_len:
-                        _log.warning("Skipping replicon {}/{} in chunk {}".format(rep_no_in_db,
-                                                                                  sequences_db_len,
-                                                                                  chunk_no))
-            if chunk_out:
-                if chunk_size == 1:
-                    chunk_name = "{}.fst".format(replicon_name)
-                else:
-                    replicon_name = utils.get_name_from_path(replicon_path)
-                    chunk_name = "{}_chunk_{}.fst".format(replicon_name, chunk_no)
-                chunk_name = os.path.join(outdir, chunk_name)
-                i = 0
-                while os.path.exists(chunk_name):
-                    root, ext = os.path.splitext(chunk_name)
-                    i += 1
-                    match = re.search("_chunk_\d+$", root)
-                    if match:
-                        root = root[:match.start()]
-                    chunk_name = "{}_chunk_{}{}".format(root, i, ext)
-
-                _log.info("writing chunk '{}'".format(chunk_name))
-                SeqIO.write(chunk_out, chunk_name, "fasta")
-                all_chunk_name.append(chunk_name)
+        chunks_report = []
+        for chunk_no, seq_ids in enumerate(chunks, 1):
+            if not seq_ids:
+                continue
+            if chunk_size == 1:
+                chunk_name = "{}.fst".format(seq_ids[0])
+            else:
+                replicon_name = utils.get_name_from_path(replicon_path)
+                chunk_name = "{}_chunk_{}.fst".format(replicon_name, chunk_no)
+            chunk_name = _chunk_name(chunk_name, outdir)
+            chunk_len = sum(seq_lens[seq_id] for seq_id in seq_ids)
+            _log.info("writing chunk '{}': {} replicons, {} bp".format(chunk_name, len(seq_ids), chunk_len))
+            _write_chunk(sequences_db, seq_ids, chunk_name)
+            all_chunk_name.append(chunk_name)
+            chunks_report.append((chunk_name, len(seq_ids), chunk_len, sum(costs[seq_id] for seq_id in seq_ids)))
+
+    if report:
+        with open(report, 'w') as report_file:
+            report_file.write("chunk\treplicons\tbp\tcost\n")
+            for chunk_name, seq_nb, chunk_len, cost in chunks_report:
+                report_file.write("{}\t{}\t{}\t{:.3f}\n".format(os.path.basename(chunk_name), seq_nb, chunk_len, cost))
     return all_chunk_name
 
 
@@ -129,7 +208,8 @@ def parse_args(args):
     """
     parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument('replicon',
-                        help='Path to the replicon file (in fasta format), eg : path/to/file.fst or file.fst')
+                        help='Path to the replicon file (in fasta format), eg : path/to/file.fst or file.fst. '
+                             'The file can be compressed with gzip or bgzip.')
 
     parser.add_argument('--chunk',
                         type=int,
@@ -139,6 +219,23 @@ def parse_args(args):
                              'The n may vary in some chunks because some replicon can be skip '
                              'if they contains illegal characters or are too short (<50bp)')
 
+    parser.add_argument('--balance',
+                        choices=['bp', 'cost'],
+                        help='Fill the chunks with replicons of the same total length (bp) '
+                             'or of the same estimated runtime of integron_finder (cost), '
+                             'instead of the same number of replicons. Requires --chunk.')
+    parser.add_argument('--local-max',
+                        action='store_true',
+                        default=False,
+                        help='Estimate the runtime with the integron_finder option --local-max.')
+    parser.add_argument('--func-annot',
+                        action='store_true',
+                        default=False,
+                        help='Estimate the runtime with the integron_finder option --func-annot.')
+    parser.add_argument('--report',
+                        help='The path of a file where to write the number of replicons, '
+                             'the total length and the estimated runtime of each chunk (tsv).')
+
     parser.add_argument('-o', '--outdir',
                         default='.',
                         help='The path to the directory where to write the chunks.\n'
@@ -187,7 +284,11 @@ def main(args=None, log_level=None):
         # used by unit tests to mute or unmute logs
         logger_set_level(log_level)
 
-    chunk_names = split(parsed_args.replicon, chunk=parsed_args.chunk, outdir=parsed_args.outdir)
+    config = Config(argparse.Namespace(local_max=parsed_args.local_max,
+                                       func_annot=parsed_args.func_annot,
+                                       path_func_annot=None))
+    chunk_names = split(parsed_args.replicon, chunk=parsed_args.chunk, outdir=parsed_args.outdir,
+                        balance=parsed_args.balance, config=config, report=parsed_args.report)
     print(' '.join(chunk_names))
 
 
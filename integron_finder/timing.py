@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Instrumentation of the stages of the analysis of a replicon.
+
+For each stage (prodigal, hmmsearch, cmsearch, parsing of their outputs, ...) the number of calls,
+the wall time, the cpu time of integron_finder and of the external tools (children processes)
+and the maximum resident set size are recorded with :func:`resource.getrusage`.
+The stages are recorded in the :class:`StageRecorder` activated with :func:`recording`,
+so the functions which are instrumented with :func:`stage` or :func:`timed`
+do nothing more when no recorder is active.
+
+The stages can be nested (for instance 'cmsearch_local_max' is a part of 'local_max'),
+the time of a stage includes the time of the stages it contains.
+"""
+
+import sys
+import time
+import functools
+import contextlib
+import resource
+
+import colorlog
+
+_log = colorlog.getLogger(__name__)
+
+"""The columns of the timing report"""
+TIMING_COLUMNS = ['ID_replicon', 'stage', 'calls', 'wall_time', 'cpu_time', 'children_cpu_time',
+                  'max_rss', 'children_max_rss']
+
+# ru_maxrss is in kilobytes on linux and in bytes on macOS
+_RSS_TO_MB = 1 / (1024 * 1024) if sys.platform == 'darwin' else 1 / 1024
+
+# the recorder of the replicon being analysed (one replicon at a time by process)
+_recorder = None
+
+
+def _usage():
+    """
+    :return: the wall time, the cpu time and the max rss of this process and of its children
+    :rtype: tuple (float wall_time, float cpu_time, float children_cpu_time, float max_rss, float children_max_rss)
+    """
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (time.perf_counter(),
+            self_usage.ru_utime + self_usage.ru_stime,
+            children_usage.ru_utime + children_usage.ru_stime,
+            self_usage.ru_maxrss * _RSS_TO_MB,
+            children_usage.ru_maxrss * _RSS_TO_MB)
+
+
+class StageRecorder:
+    """
+    The resources used by each stage of the analysis of one replicon.
+    The times (in seconds) are summed over the calls of a stage.
+    The max rss (in Mb) are the high-water marks at the end of the stage,
+    of integron_finder and of the largest external tool run so far, so the stage
+    which raises them can be spotted.
+    """
+
+    def __init__(self, replicon_id):
+        """
+        :param str replicon_id: the id of the replicon analysed
+        """
+        self.replicon_id = replicon_id
+        # stage name -> [calls, wall_time, cpu_time, children_cpu_time, max_rss, children_max_rss]
+        # in the order of the first call of each stage
+        self._stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Record the resources used by the code in the with block
+
+        :param str name: the name of the stage
+        """
+        record = self._stages.setdefault(name, [0, 0., 0., 0., 0., 0.])
+        start = _usage()
+        try:
+            yield
+        finally:
+            end = _usage()
+            record[0] += 1
+            for i in range(3):
+                record[i + 1] += end[i] - start[i]
+            record[4] = max(record[4], end[3])
+            record[5] = max(record[5], end[4])
+
+    def __getitem__(self, name):
+        """
+        :param str name: the name of a stage
+        :return: the resources used by the stage
+        :rtype: dict
+        :raise KeyError: if the stage has not been recorded
+        """
+        return dict(zip(TIMING_COLUMNS[2:], self._stages[name]))
+
+    def __contains__(self, name):
+        return name in self._stages
+
+    def rows(self):
+        """
+        :return: one row by stage, with the columns :data:`TIMING_COLUMNS`, in the order of the first calls.
+        :rtype: list of tuple
+        """
+        return [(self.replicon_id, name, *record) for name, record in self._stages.items()]
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """
+    Activate *recorder* in the with block, the whole block is recorded as the stage 'total'.
+
+    :param recorder: the recorder of the replicon analysed, None to not record anything
+    :type recorder: :class:`StageRecorder` object
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = recorder
+    try:
+        if recorder is None:
+            yield
+        else:
+            with recorder.stage('total'):
+                yield
+    finally:
+        _recorder = previous
+
+
+def stage(name):
+    """
+    Record the code of a with block in the active recorder, if any
+
+    .. code-block:: python
+
+        with timing.stage('cmsearch'):
+            call(cmsearch_cmd)
+
+    :param str name: the name of the stage
+    :return: a context manager
+    """
+    if _recorder is None:
+        return contextlib.nullcontext()
+    return _recorder.stage(name)
+
+
+def timed(name):
+    """
+    Decorator to record each call of a function as the stage *name* in the active recorder, if any
+
+    :param str name: the name of the stage
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimingWriter:
+    """
+    Append the stages of each replicon to a tabulated file (see :data:`TIMING_COLUMNS`).
+    """
+
+    def __init__(self, path=None, header=None):
+        """
+        :param str path: the path of the timing report, None to not write it.
+        :param str header: the comment line on the top of the file.
+        """
+        self._file = open(path, 'w') if path else None
+        if self._file is not None:
+            if header:
+                self._file.write("# {}\n".format(header))
+            self._file.write("\t".join(TIMING_COLUMNS) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, recorder):
+        """
+        :param recorder: the stages of one replicon, None if they have not been recorded
+        :type recorder: :class:`StageRecorder` object
+        """
+        if self._file is None or recorder is None:
+            return
+        for replicon_id, name, calls, *usage in recorder.rows():
+            self._file.write("{}\t{}\t{}\t{}\n".format(replicon_id, name, calls,
+                                                       "\t".join("{:.3f}".format(u) for u in usage)))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -27,10 +27,18 @@
 ####################################################################################
 
 import os
+import io
+import bisect
+import gzip
+import shutil
+import struct
+import tempfile
+from collections import namedtuple
 
 import colorlog
-from Bio import Seq
-from Bio import SeqIO
+
+# Biopython is imported in the functions which need it,
+# so the command line can be parsed without loading it.
 
 _log = colorlog.getLogger(__name__)
 
@@ -49,6 +57,7 @@ def make_multi_fasta_reader(alphabet):
         :return: The sequence parsed.
         :rtype: :class:`Bio.SeqRecord.SeqRecord` object.
         """
+        from Bio import SeqIO
         name = get_name_from_path(path)
         if alphabet:
             seq_it = SeqIO.parse(path, "fasta", alphabet=alphabet)
@@ -61,11 +70,243 @@ def make_multi_fasta_reader(alphabet):
     return fasta_iterator
 
 
-try:
-    Seq.IUPAC
-    read_multi_prot_fasta = make_multi_fasta_reader(Seq.IUPAC.extended_protein)
-except AttributeError:
-    read_multi_prot_fasta = make_multi_fasta_reader(None)
+def read_multi_prot_fasta(path):
+    """
+    :param path: The path to the protein fasta file.
+    :return: generator to iterate on the sequences in the same order as in fasta file
+    """
+    from Bio import Seq
+    try:
+        alphabet = Seq.IUPAC.extended_protein
+    except AttributeError:
+        # the Bio.Alphabet has been removed from Biopython. from v1.78
+        alphabet = None
+    return make_multi_fasta_reader(alphabet)(path)
+
+
+# the IUPAC ambiguous dna letters in both cases
+# and the same letters with the blanks removed by the Bio.SeqIO fasta parser (not the tabs),
+# which can be found in a raw fasta record
+_DNA_ALPHABET = b'GATCRYWSMKHBVDNgatcrywsmkhbvdn'
+_FASTA_BLANKS = b'\n\r '
+_RAW_DNA_ALPHABET = _DNA_ALPHABET + _FASTA_BLANKS
+
+
+def _only_letters_of(data, alphabet, start=0, block_size=1 << 20):
+    """
+    Check the letters of a sequence, block by block, so the sequence is never copied entirely.
+
+    :param bytes data: the sequence
+    :param bytes alphabet: the allowed letters
+    :param int start: the position of the first letter to check in data
+    :param int block_size: the number of letters checked at once
+    :return: True if all letters of data after start belong to alphabet, False otherwise.
+    """
+    for block_start in range(start, len(data), block_size):
+        # translate removes the allowed letters, what remains is invalid
+        if data[block_start:block_start + block_size].translate(None, alphabet):
+            return False
+    return True
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def fasta_compression(path):
+    """
+    :param str path: the path of a fasta file
+    :return: 'bgzf' if the file is compressed with bgzip (blocked gzip, which allows random access),
+             'gzip' if it is compressed with gzip, None otherwise.
+    :rtype: str
+    """
+    with open(path, 'rb') as fasta:
+        header = fasta.read(16)
+    if header[:2] != _GZIP_MAGIC:
+        return None
+    # the bgzf blocks are gzip members with the extra subfield 'BC'
+    flags = header[3] if len(header) > 3 else 0
+    if flags & 4 and header[12:14] == b'BC':
+        return 'bgzf'
+    return 'gzip'
+
+
+def open_fasta(path):
+    """
+    Open a fasta file in binary mode for random access, the offsets of a bgzip compressed file
+    are the virtual offsets of :mod:`Bio.bgzf`.
+
+    :param str path: the path of a plain or bgzip compressed fasta file
+    :return: the opened file
+    """
+    if fasta_compression(path) == 'bgzf':
+        from Bio import bgzf
+        return bgzf.BgzfReader(path, 'rb')
+    return open(path, 'rb')
+
+
+class FaidxIndex:
+    """
+    Random access to the records of a bgzip compressed fasta file from its samtools faidx indexes,
+    the '.fai' (the location of the sequences) and the '.gzi' (the location of the bgzf blocks),
+    so the file is not read to index it.
+    It provides the part of the :func:`Bio.SeqIO.index` API used by :class:`FastaIterator`.
+
+    .. note::
+
+        the records must follow each other without blank lines, as required by samtools faidx.
+    """
+
+    def __init__(self, path, fai_path=None, gzi_path=None):
+        """
+        :param str path: the path of the fasta file compressed with bgzip
+        :param str fai_path: the path of the '.fai' index, by default path + '.fai'
+        :param str gzi_path: the path of the '.gzi' index, by default path + '.gzi'
+        """
+        from Bio import bgzf
+        self._make_virtual_offset = bgzf.make_virtual_offset
+        fai_path = fai_path or path + '.fai'
+        gzi_path = gzi_path or path + '.gzi'
+        # the offsets of the blocks in the compressed file and in the uncompressed data
+        self._blocks_coffset = [0]
+        self._blocks_uoffset = [0]
+        with open(gzi_path, 'rb') as gzi:
+            blocks_nb, = struct.unpack('<Q', gzi.read(8))
+            for coffset, uoffset in struct.iter_unpack('<QQ', gzi.read(16 * blocks_nb)):
+                self._blocks_coffset.append(coffset)
+                self._blocks_uoffset.append(uoffset)
+        # the start (header) and the end of each record in the uncompressed data
+        self._records = {}
+        record_start = 0
+        with open(fai_path) as fai:
+            for line in fai:
+                fields = line.split('\t')
+                seq_id = fields[0]
+                length, seq_offset, line_bases, line_width = (int(f) for f in fields[1:5])
+                full_lines, last_line = divmod(length, line_bases)
+                record_end = seq_offset + full_lines * line_width
+                if last_line:
+                    record_end += last_line + line_width - line_bases
+                self._records[seq_id] = (record_start, record_end)
+                record_start = record_end
+        self._offsets = {seq_id: self._virtual_offset(start) for seq_id, (start, _) in self._records.items()}
+        self._handle = bgzf.BgzfReader(path, 'rb')
+
+    def _virtual_offset(self, uoffset):
+        """
+        :param int uoffset: an offset in the uncompressed data
+        :return: the corresponding virtual offset (see :mod:`Bio.bgzf`)
+        """
+        block = bisect.bisect_right(self._blocks_uoffset, uoffset) - 1
+        return self._make_virtual_offset(self._blocks_coffset[block], uoffset - self._blocks_uoffset[block])
+
+    def get_raw(self, seq_id):
+        """
+        :param str seq_id: the id of a sequence
+        :return: the record of the sequence, as is
+        :rtype: bytes
+        :raise KeyError: if there is no sequence with this id in the file.
+        """
+        start, end = self._records[seq_id]
+        self._handle.seek(self._offsets[seq_id])
+        return self._handle.read(end - start)
+
+    def __getitem__(self, seq_id):
+        """
+        :param str seq_id: the id of a sequence
+        :return: the sequence
+        :rtype: :class:`Bio.SeqRecord` object
+        :raise KeyError: if there is no sequence with this id in the file.
+        """
+        from Bio import SeqIO
+        return SeqIO.read(io.StringIO(self.get_raw(seq_id).decode()), 'fasta')
+
+    def keys(self):
+        return self._records.keys()
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, seq_id):
+        return seq_id in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def close(self):
+        self._handle.close()
+
+
+"""Location of a sequence in a fasta file: path offset alone"""
+FastaSource = namedtuple('FastaSource', ('path', 'offset', 'alone'))
+
+
+def copy_fasta_record(src_path, offset, dest_path, chunk_size=1 << 20):
+    """
+    Copy a record of a fasta file, as is, without parsing it.
+
+    :param str src_path: the path of the fasta file (plain or bgzip compressed) containing the record
+    :param int offset: the offset of the record ('>' of the header line) in the file (see :func:`open_fasta`)
+    :param str dest_path: the path of the file to write
+    :param int chunk_size: the number of bytes read at once
+    """
+    with open_fasta(src_path) as src, open(dest_path, 'wb') as dest:
+        write_fasta_record(src, offset, dest, chunk_size=chunk_size)
+
+
+def write_fasta_record(src, offset, dest, chunk_size=1 << 20):
+    """
+    Write a record of a fasta file in an opened file, as is, without parsing it.
+
+    :param src: the fasta file containing the record, opened in binary mode
+    :param int offset: the offset of the record ('>' of the header line) in the file
+    :param dest: the file to write in, opened in binary mode
+    :param int chunk_size: the number of bytes read at once
+    :return: the last byte written (the record may not end by a new line)
+    :rtype: bytes
+    """
+    src.seek(offset)
+    written = src.readline()
+    dest.write(written)
+    written = written[-1:]
+    # the record ends at the next header line
+    last = b'\n'
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        end = (last + chunk).find(b'\n>')
+        if end != -1:
+            dest.write(chunk[:end])
+            if end:
+                written = chunk[end - 1:end]
+            break
+        dest.write(chunk)
+        last = written = chunk[-1:]
+    return written
+
+
+def replicon_file(replicon, out_dir):
+    """
+    Give a fasta file containing only the replicon, for the external tools (cmsearch, prodigal).
+    If the replicon has been read with :class:`FastaIterator` the input file is used directly
+    when the replicon is alone in it, otherwise the record is copied from the input file.
+    The replicon is written with Biopython only if its origin is unknown.
+
+    :param replicon: the replicon
+    :type replicon: a :class:`Bio.SeqRecord` object
+    :param str out_dir: the directory where the fasta file is written if needed
+    :return: the path of the fasta file
+    :rtype: str
+    """
+    source = getattr(replicon, 'fasta_source', None)
+    if source is not None and source.alone:
+        return source.path
+    replicon_path = os.path.join(out_dir, replicon.id + '.fst')
+    if source is not None:
+        copy_fasta_record(source.path, source.offset, replicon_path)
+    else:
+        from Bio import SeqIO
+        SeqIO.write(replicon, replicon_path, "fasta")
+    return replicon_path
 
 
 class FastaIterator:
@@ -78,26 +319,47 @@ class FastaIterator:
 
     """
 
-    def __init__(self, path, replicon_name=None, dist_threshold=4000, alphabet=None):
+    def __init__(self, path, replicon_name=None, dist_threshold=4000, alphabet=None, tmp_dir=None):
         #def __init__(self, path, alphabet=Seq.IUPAC.ambiguous_dna, replicon_name=None, dist_threshold=4000):
         """
 
         :param str path: The path to the file containing the sequences.
+                         The file can be compressed with gzip or bgzip.
+                         A bgzip compressed file is read in place, with its samtools faidx indexes
+                         (path.fai and path.gzi) if they exist.
+                         A gzip compressed file is decompressed once in a temporary file.
         :param alphabet: The authorized alphabet
         :type alphabet: Bio.SeqIUPAC member
         :param str replicon_name: The name of the replicon, if this specify all sequence.name will have this value
         :param int dist_threshold: The minimum length for a replicon to be considered as circular.
                                    Under this threshold even the provided topology is 'circular'
                                    the computation will be done with a 'linear' topology.
+        :param str tmp_dir: The directory where to decompress a gzip compressed file, by default the system one.
         """
+        from Bio import Seq, SeqIO
         try:
             self.alphabet = Seq.IUPAC.ambiguous_dna
         except AttributeError as err:
             self.alphabet = None
-        if self.alphabet:
-            self.seq_index = SeqIO.index(path, "fasta",  alphabet=self.alphabet)
+        self.path = os.path.abspath(path)
+        self.compression = fasta_compression(self.path)
+        self._tmp_dir = None
+        if self.compression == 'gzip':
+            # a gzip file cannot be read at random, it is decompressed once
+            self._tmp_dir = tempfile.mkdtemp(prefix='tmp_', dir=tmp_dir)
+            plain_path = os.path.join(self._tmp_dir, get_name_from_path(self.path) + '.fst')
+            _log.debug("decompress {} in {}".format(self.path, plain_path))
+            with gzip.open(self.path, 'rb') as compressed, open(plain_path, 'wb') as plain:
+                shutil.copyfileobj(compressed, plain, 1 << 20)
+            self.path = plain_path
+        if (self.compression == 'bgzf' and
+                os.path.exists(self.path + '.fai') and os.path.exists(self.path + '.gzi')):
+            self.seq_index = FaidxIndex(self.path)
+        elif self.alphabet:
+            self.seq_index = SeqIO.index(self.path, "fasta",  alphabet=self.alphabet)
         else:
-            self.seq_index = SeqIO.index(path, "fasta")
+            # a bgzip compressed file is indexed in place by Biopython
+            self.seq_index = SeqIO.index(self.path, "fasta")
         self.seq_gen = (self.seq_index[id_] for id_ in self.seq_index.keys())
         self._topologies = None
         self.replicon_name = replicon_name
@@ -121,12 +383,14 @@ class FastaIterator:
         :type seq: :class:`Bio.Seq.Seq` instance
         :return: True if sequence letters are a subset of the alphabet, False otherwise.
         """
-        seq_letters = set(str(seq).upper())
         # the Bio.Alphabet has been removed from Biopython. from v1.78
         # I hard coded the IUPAC.ambiguous_dna
         # for compatibilty reasons
-        alphabet = set('GATCRYWSMKHBVDN')
-        return seq_letters.issubset(alphabet)
+        # The letters are checked on the bytes stored in the Seq, without str(seq).upper() copies
+        data = getattr(seq, '_data', None)
+        if not isinstance(data, bytes):
+            data = bytes(seq)
+        return _only_letters_of(data, _DNA_ALPHABET)
 
     def __next__(self):
         """
@@ -138,6 +402,86 @@ class FastaIterator:
         except StopIteration as err:
             self.close()
             raise err from None
+        return self._prepare_seq(seq)
+
+    def __getitem__(self, seq_id):
+        """
+        :param str seq_id: the id of the sequence to get
+        :return: The sequence corresponding to seq_id.
+        :rtype: a :class:`Bio.SeqRecord` object or None if the sequence is not compliant with the alphabet.
+        :raise KeyError: if there is no sequence with this id in the file.
+        """
+        return self._prepare_seq(self.seq_index[seq_id])
+
+    def seq_len(self, seq_id):
+        """
+        Compute the length of a sequence from the raw record stored in the index,
+        without parsing it.
+
+        :param str seq_id: the id of the sequence
+        :return: the number of residues of the sequence corresponding to seq_id.
+        :rtype: int
+        :raise KeyError: if there is no sequence with this id in the file.
+        """
+        raw = self.seq_index.get_raw(seq_id)
+        header_end = raw.find(b'\n')
+        if header_end == -1:
+            return 0
+        seq_len = len(raw) - header_end - 1
+        for blank in _FASTA_BLANKS:
+            seq_len -= raw.count(blank, header_end + 1)
+        return seq_len
+
+    def checked_seq_len(self, seq_id):
+        """
+        Check a sequence from the raw record stored in the index, without parsing it,
+        with the same rules as the sequences returned by the iterator.
+
+        :param str seq_id: the id of the sequence
+        :return: the number of residues of the sequence corresponding to seq_id
+                 or None if the sequence is skipped (invalid characters or too short).
+        :rtype: int
+        :raise KeyError: if there is no sequence with this id in the file.
+        """
+        raw = self.seq_index.get_raw(seq_id)
+        header_end = raw.find(b'\n')
+        if header_end == -1:
+            header_end = len(raw) - 1
+        if not _only_letters_of(raw, _RAW_DNA_ALPHABET, start=header_end + 1):
+            _log.warning("sequence {} contains invalid characters, the sequence is skipped.".format(seq_id))
+            return None
+        seq_len = len(raw) - header_end - 1
+        for blank in _FASTA_BLANKS:
+            seq_len -= raw.count(blank, header_end + 1)
+        if seq_len < 50:
+            _log.warning("sequence {} is too short ({} bp), the sequence is skipped (must be > 50bp).".format(seq_id,
+                                                                                                              seq_len))
+            return None
+        return seq_len
+
+    def _fasta_source(self, seq_id):
+        """
+        :param str seq_id: the id of a sequence
+        :return: the location of the sequence in the input file
+                 or None if the offset of the sequence is not available.
+        :rtype: :class:`FastaSource` object
+        """
+        # _offsets is not part of the public Bio.SeqIO index API
+        offsets = getattr(self.seq_index, '_offsets', None)
+        if offsets is None or seq_id not in offsets:
+            return None
+        # the external tools need a plain fasta file
+        return FastaSource(self.path, offsets[seq_id], len(self) == 1 and self.compression != 'bgzf')
+
+    def _prepare_seq(self, seq):
+        """
+        Check the sequence and inject the topology and the location of the sequence in the input file
+
+        :param seq: the sequence to prepare
+        :type seq: a :class:`Bio.SeqRecord` object
+        :return: The sequence with the attribute topology.
+        :rtype: a :class:`Bio.SeqRecord` object or None if the sequence is not compliant with the alphabet.
+        """
         if not self._check_seq_alphabet_compliance(seq.seq):
             _log.warning("sequence {} contains invalid characters, the sequence is skipped.".format(seq.id))
             return None
@@ -158,6 +502,7 @@ class FastaIterator:
 
         if self.alphabet is None:
             seq.annotations["molecule_type"] = 'DNA'
+        seq.fasta_source = self._fasta_source(seq.id)
         return seq
 
     def __iter__(self):
@@ -176,6 +521,9 @@ class FastaIterator:
 
     def close(self):
         self.seq_index.close()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
 
 
 def model_len(path):
@@ -204,8 +552,14 @@ def get_name_from_path(path):
     :param path: The path to extract name for instance the fasta file to the replicon
     :return: the name of replicon for instance
              if path = /path/to/replicon.fasta name = replicon
+             if path = /path/to/replicon.fasta.gz name = replicon
     """
-    return os.path.splitext(os.path.split(path)[1])[0]
+    name = os.path.split(path)[1]
+    for ext in ('.gz', '.bgz'):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+            break
+    return os.path.splitext(name)[0]
 
 
 def log_level(verbose, quiet):
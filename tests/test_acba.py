@@ -71,7 +71,7 @@ class TestAcba(IntegronTest):
             shutil.rmtree(self.out_dir)
         os.makedirs(self.out_dir)
         integrase.call = self.mute_call(_prodigal_call)
-        self.find_executable_ori = finder.distutils.spawn.find_executable
+        self.find_executable_ori = finder.find_executable
         self.resfams_dir = os.path.normpath(
             os.path.join(os.path.dirname(__file__), "..", "data", "Functional_annotation")
         )
@@ -80,7 +80,7 @@ class TestAcba(IntegronTest):
         if os.path.exists(self.out_dir) and os.path.isdir(self.out_dir):
             shutil.rmtree(self.out_dir)
         integrase.call = _prodigal_call
-        finder.distutils.spawn.find_executable = self.find_executable_ori
+        finder.find_executable = self.find_executable_ori
 
 
     def test_acba_simple_linear(self):
@@ -169,6 +169,29 @@ class TestAcba(IntegronTest):
         iso_summary.set_index(['ID_replicon'], inplace=True)
         pdt.assert_frame_equal(summary_2nd_contig, iso_summary)
 
+    def test_acba_workers_eq_sequential(self):
+        """
+        test if we find the same results, in the same order, if replicons are analysed by several workers
+        """
+        replicon_filename = 'ACBA.0917.00019'
+        replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', replicon_filename + '.fna'))
+        result_dirs = []
+        for workers in (1, 2):
+            out_dir = os.path.join(self.out_dir, 'workers_{}'.format(workers))
+            cmd = "integron_finder --outdir {out_dir} --workers {workers} --cpu 2 {replicon}".format(
+                out_dir=out_dir,
+                workers=workers,
+                replicon=replicon_path)
+            with self.catch_io(out=True, err=True):
+                main(cmd.split()[1:], loglevel='WARNING')
+            result_dirs.append(os.path.join(out_dir, 'Results_Integron_Finder_{}'.format(replicon_filename)))
+
+        seq_result_dir, par_result_dir = result_dirs
+        for ext in ('.integrons', '.summary'):
+            self.assertIntegronResultEqual(os.path.join(seq_result_dir, replicon_filename + ext),
+                                           os.path.join(par_result_dir, replicon_filename + ext))
+
+
     def test_acba_simple_gembase(self):
         """
         ACBA.0917.00019 contains 2 contigs 0001 and 0002.
@@ -427,7 +450,7 @@ class TestAcba(IntegronTest):
     def test_acba_no_hmmer(self):
         replicon_filename = 'acba.007.p01.13'
         decorator = hide_executable('hmmsearch')
-        finder.distutils.spawn.find_executable = decorator(finder.distutils.spawn.find_executable)
+        finder.find_executable = decorator(finder.find_executable)
         command = "integron_finder --outdir {out_dir} {replicon}".format(out_dir=self.out_dir,
                                                                          replicon=self.find_data(
                                                                              os.path.join('Replicons',
@@ -450,7 +473,7 @@ class TestAcba(IntegronTest):
     def test_acba_no_prodigal(self):
         replicon_filename = 'acba.007.p01.13'
         decorator = hide_executable('prodigal')
-        finder.distutils.spawn.find_executable = decorator(finder.distutils.spawn.find_executable)
+        finder.find_executable = decorator(finder.find_executable)
         command = "integron_finder --outdir {out_dir} {replicon}".format(out_dir=self.out_dir,
                                                                          replicon=self.find_data(
                                                                              os.path.join('Replicons',
@@ -473,7 +496,7 @@ class TestAcba(IntegronTest):
     def test_acba_no_cmsearch(self):
         replicon_filename = 'acba.007.p01.13'
         decorator = hide_executable('cmsearch')
-        finder.distutils.spawn.find_executable = decorator(finder.distutils.spawn.find_executable)
+        finder.find_executable = decorator(finder.find_executable)
         command = "integron_finder --outdir {out_dir} {replicon}".format(out_dir=self.out_dir,
                                                                          replicon=self.find_data(
                                                                              os.path.join('Replicons',
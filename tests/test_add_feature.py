@@ -556,3 +556,47 @@ class TestAddFeature(IntegronTest):
         self.assertEqual(self.seq.id, start_id)
         # Check that sequence name has been shortened
         self.assertEqual(self.seq.name, "h" + seq_name)
+
+
+    def test_translation_lookup(self):
+        """
+        Test that the translations are got by protein id, without scanning the protein db
+        and that the integrons keep the order of the report.
+        """
+        class NoIterDB:
+            def __init__(self, prot_db):
+                self.prot_db = prot_db
+
+            def __getitem__(self, prot_id):
+                return self.prot_db[prot_id]
+
+            def __iter__(self):
+                raise AssertionError("the protein db must not be scanned")
+
+        infos = {"ID_replicon": [self.replicon_id] * 3,
+                 "ID_integron": ["integron_02", "integron_01", "integron_02"],
+                 "element": ["ACBA.007.P01_13_20", "ACBA.007.P01_13_1", "ACBA.007.P01_13_21"],
+                 "pos_beg": [17375, 55, 17886],
+                 "pos_end": [17722, 1014, 18665],
+                 "strand": [-1, 1, -1],
+                 "evalue": [np.nan, 1.9e-25, np.nan],
+                 "type_elt": ["protein"] * 3,
+                 "annotation": ["protein", "intI", "protein"],
+                 "model": ["NA", "intersection_tyr_intI", "NA"],
+                 "type": ["CALIN", "In0", "CALIN"],
+                 "default": ["Yes"] * 3,
+                 "distance_2attC": [np.nan] * 3
+                 }
+        df = pd.DataFrame(infos)
+        add_feature(self.seq, df, NoIterDB(self.prot_db), self.dist_threshold)
+
+        self.assertListEqual([(f.type, f.qualifiers.get("integron_id", f.qualifiers.get("protein_id")))
+                              for f in self.seq.features],
+                             [("integron", "integron_02"),
+                              ("CDS", "ACBA.007.P01_13_20"),
+                              ("CDS", "ACBA.007.P01_13_21"),
+                              ("integron", "integron_01"),
+                              ("integrase", "ACBA.007.P01_13_1")])
+        for feature in self.seq.features[1:3] + self.seq.features[4:]:
+            self.assertEqual(feature.qualifiers["translation"],
+                             self.prot_db[feature.qualifiers["protein_id"]].seq)
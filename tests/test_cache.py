@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import shutil
+import tempfile
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder import cache
+
+
+class TestCache(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.src = os.path.join(self.tmp_dir, 'src.res')
+        with open(self.src, 'w') as f:
+            f.write('x' * 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+    def test_file_digest(self):
+        other = os.path.join(self.tmp_dir, 'other.res')
+        shutil.copyfile(self.src, other)
+        self.assertEqual(cache.file_digest(self.src), cache.file_digest(other))
+        with open(other, 'a') as f:
+            f.write('y')
+        self.assertNotEqual(cache.file_digest(self.src), cache.file_digest(other))
+
+
+    def test_tool_version(self):
+        # the tool cannot be run, the version fallback on the path
+        self.assertEqual(cache.tool_version('nimport_naoik'), 'nimport_naoik')
+
+
+    def test_key(self):
+        self.assertEqual(cache.ResultCache.key('cmsearch', '1.1.2', 10),
+                         cache.ResultCache.key('cmsearch', '1.1.2', 10))
+        self.assertNotEqual(cache.ResultCache.key('cmsearch', '1.1.2', 10),
+                            cache.ResultCache.key('cmsearch', '1.1.2', 1))
+        self.assertNotEqual(cache.ResultCache.key('ab', 'c'),
+                            cache.ResultCache.key('a', 'bc'))
+
+
+    def test_get_put(self):
+        res_cache = cache.ResultCache(self.cache_dir)
+        self.assertTrue(os.path.isdir(self.cache_dir))
+        key = res_cache.key('foo')
+        dest = os.path.join(self.tmp_dir, 'dest.res')
+        self.assertFalse(res_cache.get(key, {'res': dest}))
+        self.assertFalse(os.path.exists(dest))
+
+        res_cache.put(key, {'res': self.src})
+        self.assertTrue(res_cache.get(key, {'res': dest}))
+        self.assertFileEqual(self.src, dest)
+        # a partial request miss
+        self.assertFalse(res_cache.get(key, {'res': dest, 'nimport_naoik': dest}))
+
+
+    def test_evict(self):
+        # 2 Kb max
+        res_cache = cache.ResultCache(self.cache_dir, max_size=2 / 1024)
+        keys = [res_cache.key(i) for i in range(3)]
+        dest = os.path.join(self.tmp_dir, 'dest.res')
+        for i, key in enumerate(keys):
+            res_cache.put(key, {'res': self.src})
+            entry = res_cache._entry_path(key)
+            os.utime(entry, (i, i))
+        # the first entry is the least recently used
+        res_cache.evict()
+        self.assertFalse(res_cache.get(keys[0], {'res': dest}))
+        self.assertTrue(res_cache.get(keys[1], {'res': dest}))
+        self.assertTrue(res_cache.get(keys[2], {'res': dest}))
+
+
+    def test_evict_scans(self):
+        res_cache = cache.ResultCache(self.cache_dir, max_size=4 / 1024)
+        scans = []
+        evict = res_cache.evict
+        res_cache.evict = lambda: scans.append(1) or evict()
+        for i in range(4):
+            res_cache.put(res_cache.key(i), {'res': self.src})
+        # the cache is scanned once, then its size is kept up to date
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(res_cache._size, 4 * 1024)
+        res_cache.put(res_cache.key(4), {'res': self.src})
+        # the cache is too big
+        self.assertEqual(len(scans), 2)
+        self.assertEqual(res_cache._size, 4 * 1024)
+
+
+    def test_evict_banks(self):
+        res_cache = cache.ResultCache(self.cache_dir, max_size=2 / 1024)
+        bank = os.path.join(res_cache.banks_dir, 'ab', 'abcd')
+        os.makedirs(bank)
+        shutil.copyfile(self.src, os.path.join(bank, 'func_annot.hmm'))
+        os.utime(bank, (0, 0))
+        keys = [res_cache.key(i) for i in range(3)]
+        for key in keys:
+            res_cache.put(key, {'res': self.src})
+        res_cache.evict()
+        # the banks are not evicted, even if they are the least recently used
+        self.assertTrue(os.path.exists(os.path.join(bank, 'func_annot.hmm')))
+        dest = os.path.join(self.tmp_dir, 'dest.res')
+        self.assertFalse(res_cache.get(keys[0], {'res': dest}))
+        self.assertTrue(res_cache.get(keys[2], {'res': dest}))
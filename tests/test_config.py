@@ -28,6 +28,8 @@
 
 import argparse
 import os
+import pickle
+import tempfile
 
 try:
     from tests import IntegronTest
@@ -186,3 +188,57 @@ class TestConfig(IntegronTest):
             self.args.quiet = q
             cf = config.Config(self.args)
             self.assertEqual(cf.log_level, l)
+
+
+    def test_cpu(self):
+        self.args.cpu = 4
+        cf = config.Config(self.args)
+        self.assertEqual(cf.cpu, 4)
+        self.args.workers = 2
+        self.assertEqual(cf.cpu, 2)
+        self.args.workers = 8
+        self.assertEqual(cf.cpu, 1)
+
+
+    def test_workers(self):
+        cf = config.Config(self.args)
+        self.assertEqual(cf.workers, 1)
+        self.args.workers = 0
+        self.assertEqual(cf.workers, 1)
+        self.args.workers = 3
+        self.assertEqual(cf.workers, 3)
+
+
+    def test_combined_integrase_search(self):
+        cf = config.Config(self.args)
+        self.assertFalse(cf.combined_integrase_search)
+        self.args.combined_integrase_search = True
+        self.assertTrue(cf.combined_integrase_search)
+
+
+    def test_local_max_batch(self):
+        cf = config.Config(self.args)
+        self.assertTrue(cf.local_max_batch)
+        self.args.no_local_max_batch = True
+        self.assertFalse(cf.local_max_batch)
+
+
+    def test_cache(self):
+        cf = config.Config(self.args)
+        self.assertIsNone(cf.cache)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.args.cache_dir = cache_dir
+            self.args.cache_size = 10
+            cf = config.Config(self.args)
+            self.assertEqual(cf.cache.cache_dir, cache_dir)
+            self.assertEqual(cf.cache.max_size, 10 * 1024 * 1024)
+            self.assertIs(cf.cache, cf.cache)
+
+
+    def test_pickle(self):
+        self.args.replicon = 'foo'
+        self.args.cpu = 2
+        cf = config.Config(self.args)
+        cf_unpickled = pickle.loads(pickle.dumps(cf))
+        self.assertEqual(cf_unpickled.input_seq_path, cf.input_seq_path)
+        self.assertEqual(cf_unpickled.cpu, cf.cpu)
@@ -68,14 +68,14 @@ class TestEmptyProt(IntegronTest):
             shutil.rmtree(self.out_dir)
         os.makedirs(self.out_dir)
         integrase.call = self.mute_call(_prodigal_call)
-        self.find_executable_ori = finder.distutils.spawn.find_executable
+        self.find_executable_ori = finder.find_executable
 
     def tearDown(self):
         if os.path.exists(self.out_dir) and os.path.isdir(self.out_dir):
             shutil.rmtree(self.out_dir)
             #pass
         integrase.call = _prodigal_call
-        finder.distutils.spawn.find_executable = self.find_executable_ori
+        finder.find_executable = self.find_executable_ori
 
 
     def test_contig_with_empty_prot(self):
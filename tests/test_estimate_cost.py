@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder.scripts.finder import parse_args, estimate_replicon_cost
+
+
+class TestEstimateCost(IntegronTest):
+
+    def test_length(self):
+        cfg = parse_args(['replicon'])
+        self.assertLess(estimate_replicon_cost(1000, cfg), estimate_replicon_cost(1000000, cfg))
+        self.assertGreater(estimate_replicon_cost(0, cfg), 0)
+
+    def test_options(self):
+        seq_len = 5000000
+        cost_default = estimate_replicon_cost(seq_len, parse_args(['replicon']))
+        cost_local_max = estimate_replicon_cost(seq_len, parse_args(['--local-max', 'replicon']))
+        cost_func_annot = estimate_replicon_cost(seq_len, parse_args(['--func-annot', 'replicon']))
+        cost_all = estimate_replicon_cost(seq_len, parse_args(['--local-max', '--func-annot', 'replicon']))
+        self.assertLess(cost_default, cost_local_max)
+        self.assertLess(cost_default, cost_func_annot)
+        self.assertLess(cost_local_max, cost_all)
+        self.assertLess(cost_func_annot, cost_all)
@@ -43,6 +43,7 @@ from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
 from integron_finder.config import Config
 from integron_finder import integrase
+from integron_finder.hmm import domtblout_path
 from integron_finder import EmptyFileError
 
 _call_ori = integrase.call
@@ -309,3 +310,147 @@ class TestFindIntegrase(IntegronTest):
         with self.assertRaises(RuntimeError) as ctx:
             integrase.find_integrase(replicon.id, prot_file, self.tmp_dir, cfg)
         self.assertTrue(str(ctx.exception).endswith('failed return code = 1'))
+
+
+    def test_find_integrase_cache(self):
+        self.args.gembase = True
+        self.args.hmmsearch = 'fake_hmmsearch'
+        self.args.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        cfg = Config(self.args)
+        cfg._prefix_data = os.path.join(os.path.dirname(__file__), 'data')
+
+        replicon_id = 'ACBA.007.P01_13'
+        prot_file = os.path.join(self.tmp_dir, replicon_id + ".prt")
+        shutil.copyfile(self.find_data(os.path.join('Proteins', replicon_id + ".prt")), prot_file)
+
+        cmds = []
+
+        def fake_call(cmd):
+            cmds.append(cmd)
+            for opt in ('--tblout', '--domtblout', '-o'):
+                with open(cmd[cmd.index(opt) + 1], 'w') as out:
+                    out.write(opt)
+            return 0
+
+        integrase.call = fake_call
+        out_dirs = [os.path.join(self.tmp_dir, 'run_{}'.format(i)) for i in range(2)]
+        for out_dir in out_dirs:
+            os.makedirs(out_dir)
+            integrase.find_integrase(replicon_id, prot_file, out_dir, cfg)
+        # the second run get the results from the cache
+        self.assertEqual(len(cmds), 2)
+        for suffix in ('_intI.res', '_intI_table.res', '_intI_domtbl.res',
+                       '_phage_int.res', '_phage_int_table.res', '_phage_int_domtbl.res'):
+            self.assertFileEqual(os.path.join(out_dirs[0], replicon_id + suffix),
+                                 os.path.join(out_dirs[1], replicon_id + suffix))
+
+
+    domtbl_header = """\
+#                                                                            --- full sequence --- -------------- this domain -------------   hmm coord   ali coord   env coord
+# target name        accession   tlen query name           accession   qlen   E-value  score  bias   #  of  c-Evalue  i-Evalue  score  bias  from    to  from    to  from    to  acc description of target
+#------------------- ---------- ----- -------------------- ---------- ----- --------- ------ ----- --- --- --------- --------- ------ ----- ----- ----- ----- ----- ----- ----- ---- ---------------------
+"""
+    domtbl_intI = """\
+ACBA.007.P01_13_1    -            319 intI_Cterm           -             59   1.1e-25   79.7   3.3   1   1   8.4e-27   1.9e-25   78.9   3.3     2    58   198   254   197   255 0.96 # 55 # 1014 # 1 # ;gc_cont=0.585
+"""
+    domtbl_phage = """\
+ACBA.007.P01_13_1    -            319 Phage_integrase      PF00589.16   173   4.4e-39  124.7   0.0   1   2      0.18       4.2   -2.2   0.0     3    26    56    83    54    88 0.66 # 55 # 1014 # 1 # ;gc_cont=0.585
+ACBA.007.P01_13_1    -            319 Phage_integrase      PF00589.16   173   4.4e-39  124.7   0.0   2   2   5.4e-40   1.2e-38  123.2   0.0     2   121   116   267   115   279 0.97 # 55 # 1014 # 1 # ;gc_cont=0.585
+"""
+    domtbl_footer = """\
+#
+# Program:         hmmsearch
+# [ok]
+"""
+
+    def _combined_results(self, replicon_id, hmm_out, hmm_tblout):
+        """
+        build the results of one hmmsearch with the integrase and phage integrase profiles
+        from the results of the hmmsearch with each profile
+        """
+        res_dir = self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13',
+                                              'tmp_{}'.format(replicon_id)))
+        with open(os.path.join(res_dir, replicon_id + '_intI.res')) as f:
+            intI = f.readlines()
+        with open(os.path.join(res_dir, replicon_id + '_phage_int.res')) as f:
+            phage = f.readlines()
+        query_start = [i for i, l in enumerate(phage) if l.startswith('Query:')][0]
+        with open(hmm_out, 'w') as f:
+            f.writelines(intI[:-1] + phage[query_start:])
+        with open(os.path.join(res_dir, replicon_id + '_intI_table.res')) as f:
+            intI = f.readlines()
+        with open(os.path.join(res_dir, replicon_id + '_phage_int_table.res')) as f:
+            phage = [l for l in f if not l.startswith('#')]
+        with open(hmm_tblout, 'w') as f:
+            f.writelines(intI[:4] + phage + intI[4:])
+        with open(domtblout_path(hmm_out), 'w') as f:
+            f.write(self.domtbl_header + self.domtbl_intI + self.domtbl_phage + self.domtbl_footer)
+
+
+    def test_split_hmm_results(self):
+        replicon_id = 'ACBA.007.P01_13'
+        res_dir = self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13',
+                                              'tmp_{}'.format(replicon_id)))
+        hmm_out = os.path.join(self.tmp_dir, 'combined.res')
+        hmm_tblout = os.path.join(self.tmp_dir, 'combined_table.res')
+        self._combined_results(replicon_id, hmm_out, hmm_tblout)
+        outputs = [(['intI_Cterm'],
+                    os.path.join(self.tmp_dir, 'intI.res'), os.path.join(self.tmp_dir, 'intI_table.res')),
+                   (['Phage_integrase'],
+                    os.path.join(self.tmp_dir, 'phage.res'), os.path.join(self.tmp_dir, 'phage_table.res'))]
+        integrase.split_hmm_results(hmm_out, hmm_tblout, outputs)
+
+        self.assertFileEqual(os.path.join(res_dir, replicon_id + '_intI.res'), outputs[0][1])
+        self.assertFileEqual(os.path.join(res_dir, replicon_id + '_intI_table.res'), outputs[0][2])
+        # the header is the header of the combined search
+        with open(os.path.join(res_dir, replicon_id + '_phage_int.res')) as f:
+            expected = [l for l in f if not l.startswith('#')]
+        with open(outputs[1][1]) as f:
+            received = [l for l in f if not l.startswith('#')]
+        self.assertListEqual(expected, received)
+        with open(os.path.join(res_dir, replicon_id + '_phage_int_table.res')) as f:
+            expected = [l for l in f if not l.startswith('#')]
+        with open(outputs[1][2]) as f:
+            received = [l for l in f if not l.startswith('#')]
+        self.assertListEqual(expected, received)
+        with open(domtblout_path(outputs[0][1])) as f:
+            self.assertEqual(f.read(), self.domtbl_header + self.domtbl_intI + self.domtbl_footer)
+        with open(domtblout_path(outputs[1][1])) as f:
+            self.assertEqual(f.read(), self.domtbl_header + self.domtbl_phage + self.domtbl_footer)
+
+
+    def test_hmm_names(self):
+        cfg = Config(self.args)
+        self.assertListEqual(integrase.hmm_names(cfg.model_integrase), ['intI_Cterm'])
+        self.assertListEqual(integrase.hmm_names(cfg.model_phage_int), ['Phage_integrase'])
+
+
+    def test_find_integrase_combined(self):
+        self.args.gembase = True
+        self.args.hmmsearch = 'fake_hmmsearch'
+        self.args.combined_integrase_search = True
+        cfg = Config(self.args)
+        cfg._prefix_data = os.path.join(os.path.dirname(__file__), 'data')
+
+        replicon_id = 'ACBA.007.P01_13'
+        prot_file = os.path.join(self.tmp_dir, replicon_id + ".prt")
+        shutil.copyfile(self.find_data(os.path.join('Proteins', replicon_id + ".prt")), prot_file)
+
+        cmds = []
+
+        def fake_call(cmd):
+            cmds.append(cmd)
+            self._combined_results(replicon_id, cmd[cmd.index('-o') + 1], cmd[cmd.index('--tblout') + 1])
+            return 0
+
+        integrase.call = fake_call
+        integrase.find_integrase(replicon_id, prot_file, self.tmp_dir, cfg)
+        self.assertEqual(len(cmds), 1)
+        self.assertListEqual(integrase.hmm_names(cmds[0][-2]), ['intI_Cterm', 'Phage_integrase'])
+        res_dir = self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13',
+                                              'tmp_{}'.format(replicon_id)))
+        for suffix in ('_intI.res', '_intI_table.res'):
+            self.assertFileEqual(os.path.join(res_dir, replicon_id + suffix),
+                                 os.path.join(self.tmp_dir, replicon_id + suffix))
+        for suffix in ('_phage_int.res', '_phage_int_table.res', '_intI_domtbl.res', '_phage_int_domtbl.res'):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, replicon_id + suffix)))
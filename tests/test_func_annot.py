@@ -114,6 +114,9 @@ class TestFuncAnnot(IntegronTest):
                                                                                  "_Resfams_fa.res",
                                                                                  "_intI.res",
                                                                                  "_phage_int.res",
+                                                                                 "_Resfams_fa_domtbl.res",
+                                                                                 "_intI_domtbl.res",
+                                                                                 "_phage_int_domtbl.res",
                                                                                  "_subseqprot.tmp")]
         self.exp_files = [os.path.join(self.tmp_dir, file) for file in self.exp_files]
 
@@ -225,7 +228,9 @@ class TestFuncAnnot(IntegronTest):
         exp_files = ["{}{}".format(self.replicon.id, suffix) for suffix in ("_intI_table.res",
                                                                             "_phage_int_table.res",
                                                                             "_intI.res",
-                                                                            "_phage_int.res")]
+                                                                            "_phage_int.res",
+                                                                            "_intI_domtbl.res",
+                                                                            "_phage_int_domtbl.res")]
         exp_files = [os.path.join(self.tmp_dir, file) for file in exp_files]
         self.assertEqual(set(exp_files), set(files_created))
 
@@ -264,7 +269,9 @@ class TestFuncAnnot(IntegronTest):
         exp_files = ["{}{}".format(self.replicon.id, suffix) for suffix in ("_intI_table.res",
                                                                             "_phage_int_table.res",
                                                                             "_intI.res",
-                                                                            "_phage_int.res")]
+                                                                            "_phage_int.res",
+                                                                            "_intI_domtbl.res",
+                                                                            "_phage_int_domtbl.res")]
         exp_files = [os.path.join(self.tmp_dir, file) for file in exp_files]
         self.assertEqual(set(exp_files), set(files_created))
         # check proteins after annotation
@@ -451,3 +458,110 @@ class TestFuncAnnot(IntegronTest):
         with self.assertRaises(RuntimeError) as ctx:
             func_annot(integrons, self.replicon, self.prot_db, self.hmm_files, self.cfg, self.tmp_dir)
         self.assertTrue(re.search("failed : \[Errno 2\] No such file or directory: 'nimportnaoik'", str(ctx.exception)))
+
+
+class TestFuncAnnotPooled(IntegronTest):
+    """
+    Test that func_annot dispatch the hits of one hmmsearch per hmm file to the integrons.
+    hmmsearch is replaced by a function which writes fictive outputs.
+    """
+
+    def setUp(self):
+        replicon_name = "acba.007.p01.13"
+        replicon_path = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
+        with FastaIterator(replicon_path) as sequences_db:
+            sequences_db.topologies = Topology('lin')
+            self.replicon = next(sequences_db)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        args = argparse.Namespace()
+        args.gembase = False
+        args.annot_parser_name = None
+        args.hmmsearch = 'hmmsearch'
+        args.prodigal = 'prodigal'
+        args.cpu = 1
+        args.out_dir = self.tmp_dir
+        self.cfg = Config(args)
+        self.cfg._prefix_data = os.path.join(os.path.dirname(__file__), 'data')
+        prot_file = self.find_data(os.path.join('Proteins', self.replicon.id + ".prt"))
+        self.prot_db = ProdigalDB(self.replicon, self.cfg, prot_file=prot_file)
+        self.hmm_cmds = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        annotation.call = _annot_call_ori
+
+    def fake_hmmsearch(self, hits):
+        """
+        :param hits: the domains found for each hmm file
+                     {hmm: [(prot_id, query_name, query_acc, i_evalue, hmmfrom, hmmto), ...]}
+        :return: a function to replace annotation.call
+        """
+        def call(cmd):
+            self.hmm_cmds.append(cmd)
+            hmm = cmd[-2]
+            tbl = cmd[cmd.index('--tblout') + 1]
+            domtbl = cmd[cmd.index('--domtblout') + 1]
+            with open(tbl, 'w') as tbl_file, open(domtbl, 'w') as domtbl_file:
+                tbl_file.write("# target name accession query name accession ...\n")
+                domtbl_file.write("# target name accession tlen query name accession qlen ...\n")
+                for prot_id, query, acc, i_evalue, hmmfrom, hmmto in hits.get(hmm, []):
+                    tbl_file.write("{} - {} {} {:.2g} 100.0 0.1 {:.2g} 99.0 0.1 1.0 1 0 0 1 1 1 1 -\n".format(
+                        prot_id, query, acc, i_evalue, i_evalue))
+                    domtbl_file.write("{} - 200 {} {} 100 {:.2g} 100.0 0.1 1 1 {:.2g} {:.2g} 99.0 0.1 "
+                                      "{} {} 1 190 1 195 0.99 -\n".format(prot_id, query, acc, i_evalue,
+                                                                         i_evalue, i_evalue, hmmfrom, hmmto))
+            open(cmd[cmd.index('-o') + 1], 'w').close()
+            return 0
+        return call
+
+    def test_one_search_per_hmm(self):
+        integron1 = Integron(self.replicon, self.cfg)
+        integron1.add_attC(17825, 17884, -1, 7e-9, "attc_4")
+        integron1.add_attC(19080, 19149, -1, 7e-4, "attc_4")
+        integron1.add_attC(19618, 19726, -1, 7e-7, "attc_4")
+        integron1.add_proteins(self.prot_db)
+        integron2 = Integron(self.replicon, self.cfg)
+        integron2.add_attC(7400, 7650, -1, 7e-9, "attc_4")
+        integron2.add_attC(8600, 8650, -1, 7e-4, "attc_4")
+        integron2.add_proteins(self.prot_db)
+        integron3 = Integron(self.replicon, self.cfg)
+        integron3.add_integrase(56, 1014, "ACBA.007.P01_13_1", 1, 1.9e-25, "intersection_tyr_intI")
+        integrons = [integron1, integron2, integron3]
+
+        hits = {'bank_1.hmm': [("ACBA.007.P01_13_20", "emrE", "RF0066", 2e-31, 1, 90),
+                               ("ACBA.007.P01_13_21", "emrE", "RF0066", 3e-5, 1, 90),
+                               ("ACBA.007.P01_13_13", "ABC_efflux", "RF0007", 2.4e-86, 1, 90),
+                               ("ACBA.007.P01_13_12", "APH3", "RF0033", 1.6e-5, 1, 45)],
+                'bank_2.hmm': [("ACBA.007.P01_13_21", "ANT3", "RF0027", 7.4e-168, 1, 90)]}
+        annotation.call = self.fake_hmmsearch(hits)
+        func_annot(integrons, self.replicon, self.prot_db, list(hits), self.cfg, self.tmp_dir)
+
+        # one hmmsearch per hmm file for all the integrons
+        self.assertEqual(len(self.hmm_cmds), 2)
+        for cmd in self.hmm_cmds:
+            self.assertEqual(cmd[cmd.index('-Z') + 1], str(len(list(self.prot_db))))
+            self.assertEqual(cmd[cmd.index('--domZ') + 1], '1')
+        # all the proteins of the integrons are searched, in the protein db order
+        with FastaIterator(os.path.join(self.tmp_dir, self.replicon.id + "_subseqprot.tmp")) as prots:
+            searched = [rec.id for rec in prots.seq_index.values()]
+        self.assertListEqual(sorted(searched),
+                             sorted(list(integron1.proteins.index) + list(integron2.proteins.index)))
+
+        # emrE hits 2 proteins of integron1: the i-evalue are rescaled (domZ = 2)
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_20", "evalue"], 4e-31)
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_20", "annotation"], "emrE")
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_21", "evalue"], 7.4e-168)
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_21", "model"], "RF0027")
+        self.assertEqual(integron2.proteins.loc["ACBA.007.P01_13_13", "evalue"], 2.4e-86)
+        self.assertEqual(integron2.proteins.loc["ACBA.007.P01_13_13", "annotation"], "ABC_efflux")
+        # coverage under 0.5
+        self.assertEqual(integron2.proteins.loc["ACBA.007.P01_13_12", "annotation"], "protein")
+
+        # the evalue threshold is applied on the rescaled i-evalue
+        annotation.call = self.fake_hmmsearch({'bank_1.hmm': hits['bank_1.hmm']})
+        integron1.add_proteins(self.prot_db)
+        func_annot([integron1], self.replicon, self.prot_db, ['bank_1.hmm'], self.cfg, self.tmp_dir,
+                   evalue=5e-5)
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_20", "evalue"], 4e-31)
+        self.assertEqual(integron1.proteins.loc["ACBA.007.P01_13_21", "annotation"], "protein")
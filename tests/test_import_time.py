@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import sys
+import subprocess
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+
+def import_times(code):
+    """
+    Execute *code* in a new python interpreter with '-X importtime'
+
+    :param str code: the python code to execute
+    :return: the (self, cumulative) import time in micro seconds of each module imported by *code*
+    :rtype: dict {str module name: (int self, int cumulative)}
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))] +
+                                        ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, env=env, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+        except ValueError:
+            # the header line
+            continue
+    return times
+
+
+class TestImportTime(IntegronTest):
+
+    # heavy dependencies which must be loaded only when a replicon is analysed
+    heavy_modules = ('pandas', 'matplotlib', 'Bio', 'numpy')
+
+    def test_parse_args_is_light(self):
+        times = import_times("from integron_finder.scripts.finder import parse_args; parse_args(['replicon'])")
+        imported = [mod for mod in self.heavy_modules if mod in times]
+        self.assertListEqual(imported, [])
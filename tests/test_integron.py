@@ -28,6 +28,7 @@
 
 import os
 import argparse
+import random
 
 import pandas as pd
 import pandas.testing as pdt
@@ -44,7 +45,7 @@ except ImportError as err:
 from integron_finder.config import Config
 from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
-from integron_finder.integron import Integron
+from integron_finder.integron import Integron, _AttcArrayAssigner
 from integron_finder.prot_db import ProdigalDB
 
 class TestIntegron(IntegronTest):
@@ -377,6 +378,75 @@ class TestIntegron(IntegronTest):
         pdt.assert_frame_equal(exp_attI, integron.attI)
 
 
+    def test_attc_array_assigner(self):
+        attc_left = np.array([1000, 5000, 5000, 19500])
+        attc_right = np.array([2000, 6000, 6000, 19900])
+
+        # linear: nearest on both side, the array on the right of the integrase is preferred
+        assigner = _AttcArrayAssigner(attc_left, attc_right, 20000, False)
+        self.assertEqual(len(assigner), 4)
+        self.assertTupleEqual(assigner.closest(3000, 4000), (1000, 1))
+        self.assertTupleEqual(assigner.closest(3000, 3500), (1000, 0))
+        # 2 arrays at the same distance, the lowest index is chosen
+        assigner.remove(1)
+        self.assertTupleEqual(assigner.closest(3000, 4000), (1000, 2))
+        assigner.remove(2)
+        self.assertTupleEqual(assigner.closest(3000, 4000), (1000, 0))
+        self.assertTupleEqual(assigner.closest(100, 200), (800, 0))
+        self.assertEqual(len(assigner), 2)
+        self.assertListEqual(assigner.remaining(), [0, 3])
+
+        # circular: the distances are computed across the origin
+        assigner = _AttcArrayAssigner(attc_left, attc_right, 20000, True)
+        self.assertTupleEqual(assigner.closest(100, 200), (200, 3))
+        self.assertTupleEqual(assigner.closest(300, 400), (400, 3))
+        assigner.remove(3)
+        self.assertTupleEqual(assigner.closest(100, 200), (800, 0))
+        assigner.remove(0)
+        self.assertTupleEqual(assigner.closest(100, 200), (4800, 1))
+        self.assertTupleEqual(assigner.closest(7000, 8000), (1000, 1))
+
+
+    def test_motif_hits_shared(self):
+        replicon_name = 'saen.040.p01.10'
+        replicon_path = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
+        topologies = Topology('lin')
+        with FastaIterator(replicon_path) as sequences_db:
+            sequences_db.topologies = topologies
+            replicon = next(sequences_db)
+
+        integron_1 = Integron(replicon, self.cfg)
+        integron_1.add_integrase(109469, 110482, 'SAEN.040.P01_10_135', 1, 1.6e-24, 'intersection_tyr_intI')
+        integron_1.add_promoter()
+        hits = replicon.motif_hits
+
+        # the replicon is scanned once for all integrons
+        integron_2 = Integron(replicon, self.cfg)
+        integron_2.add_integrase(109469, 110482, 'SAEN.040.P01_10_135', 1, 1.6e-24, 'intersection_tyr_intI')
+        integron_2.add_attI()
+        integron_2.add_promoter()
+        self.assertIs(replicon.motif_hits, hits)
+        pdt.assert_frame_equal(integron_1.promoter, integron_2.promoter)
+        self.assertListEqual(integron_2.attI.index.tolist(), ['attI1'])
+
+
+    def test_add_promoter_linear_origin(self):
+        # a Pc in the window around a CALIN near the beginning of a linear replicon,
+        # the window is clipped to the replicon (it was not searched when it began before 0)
+        rand = random.Random(1)
+        pc = "TTGACATAAGCCTGTTCGGTTCGTAAACTGTAATCGCA"
+        seq = 'G' * 10 + pc + ''.join(rand.choice('ACGT') for _ in range(5000))
+        replicon = SeqRecord(Seq.Seq(seq), id='linear_replicon')
+        replicon.topology = 'lin'
+        integron = Integron(replicon, self.cfg)
+        integron.add_attC(100, 180, 1, 1e-3, 'attc_4')
+        integron.add_attC(300, 380, 1, 1e-3, 'attc_4')
+        integron.add_promoter()
+        self.assertListEqual(integron.promoter.pos_beg.tolist(), [10])
+        self.assertListEqual(integron.promoter.pos_end.tolist(), [10 + len(pc)])
+        self.assertListEqual(integron.promoter.annotation.tolist(), ['Pc_1'])
+
+
     def test_add_proteins(self):
         replicon_name = 'pssu.001.c01.13'
         replicon_path = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
@@ -529,3 +599,37 @@ class TestIntegron(IntegronTest):
                                1e-2,
                                "intersection_tyr_intI")
         self.assertTrue(just_one_attC.has_attC())
+
+
+    def test_add_attc_several(self):
+        replicon_name = "acba.007.p01.13"
+        replicon_path = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
+        topologies = Topology('lin')
+        with FastaIterator(replicon_path) as sequences_db:
+            sequences_db.topologies = topologies
+            replicon = next(sequences_db)
+
+        integron = Integron(replicon, self.cfg)
+        pos = [(10, 100), (300, 390), (20000, 20090), (15, 80)]
+        for pos_beg, pos_end in pos:
+            integron.add_attC(pos_beg, pos_end, -1, 1e-5, "attc_4")
+        self.assertEqual(integron.type(), "CALIN")
+        exp = pd.DataFrame({"pos_beg": [p[0] for p in pos],
+                            "pos_end": [p[1] for p in pos],
+                            "strand": [-1] * 4,
+                            "evalue": [1e-5] * 4,
+                            "type_elt": ["attC"] * 4,
+                            "model": ["attc_4"] * 4,
+                            "distance_2attC": [np.nan, 200, 19610, (15 - 20090) % len(replicon)],
+                            "annotation": ["attC"] * 4},
+                           columns=self.columns,
+                           index=["attc_001", "attc_002", "attc_003", "attc_004"])
+        exp = exp.astype(dtype=self.dtype)
+        pdt.assert_frame_equal(exp, integron.attC)
+
+        # the DataFrame modified in place keep the modifications
+        integron.attC.loc["attc_002", "evalue"] = 1e-10
+        self.assertEqual(integron.attC.loc["attc_002", "evalue"], 1e-10)
+        integron.add_attC(100, 190, -1, 1e-5, "attc_4")
+        self.assertEqual(integron.attC.loc["attc_002", "evalue"], 1e-10)
+        self.assertListEqual(list(integron.attC.index), ["attc_00{}".format(i) for i in range(1, 6)])
@@ -31,8 +31,12 @@ import tempfile
 import shutil
 import re
 
+import argparse
+
+import numpy as np
 import pandas as pd
 import pandas.testing as pdt
+from Bio import SeqIO
 
 # # display warning only for non installed integron_finder
 # from Bio import BiopythonExperimentalWarning
@@ -47,6 +51,9 @@ except ImportError as err:
 
 from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
+from integron_finder.config import Config
+from integron_finder.integron import Integron
+from integron_finder.attc import find_attc_max
 from integron_finder import infernal
 
 _call_ori = infernal.call
@@ -273,3 +280,161 @@ class TestLocalMax(IntegronTest):
                                    out_dir=self.out_dir, cpu_nb=self.cpu_nb
                                    )
         self.assertTrue(str(ctx.exception).endswith("failed returncode = {}".format(infernal.call(None))))
+
+
+def fake_cmsearch(replicon, sites, cmds):
+    """
+    Mimic cmsearch --tblout output, report an attC hit of 80bp
+    at each site (position on the replicon, strand) included in the searched sequences.
+    The searched sequences must be windows of the replicon.
+    """
+    rep_seq = str(replicon.seq)
+    circ_seq = rep_seq + rep_seq
+    footer = ['#\n'] + ['# {}\n'.format(i) for i in range(8)] + ['# [ok]\n']
+
+    def fake_call(cmd, stdout=None):
+        strands = '+-'
+        if '--toponly' in cmd:
+            strands = '+'
+        elif '--bottomonly' in cmd:
+            strands = '-'
+        rows = []
+        records = list(SeqIO.parse(cmd[-1], 'fasta'))
+        # the command and the number of searched windows
+        cmds.append((cmd, len(records)))
+        for record in records:
+            win_seq = str(record.seq)
+            win_beg = circ_seq.find(win_seq)
+            desc = record.description[len(record.id):].strip()
+            for site, strand in sites:
+                pos = (site - win_beg) % len(rep_seq)
+                if strand in strands and pos + 80 <= len(win_seq):
+                    seq_from, seq_to = (pos + 1, pos + 80) if strand == '+' else (pos + 80, pos + 1)
+                    rows.append((record.id, seq_from, seq_to, strand, desc))
+        width = max([20] + [len(row[0]) for row in rows])
+        with open(cmd[cmd.index('--tblout') + 1], 'w') as tblout:
+            tblout.write('#' + 'target name'.ljust(width - 1) + ' accession query name           accession mdl '
+                         'mdl from   mdl to seq from   seq to strand trunc pass   gc  bias  score   E-value inc '
+                         'description of target\n')
+            tblout.write('#' + '-' * (width - 1) + ' --------- -------------------- --------- --- -------- '
+                         '-------- -------- -------- ------ ----- ---- ---- ----- ------ --------- --- '
+                         '---------------------\n')
+            for name, seq_from, seq_to, strand, desc in rows:
+                tblout.write('{} -         attC_4               -          cm        1       47 {:>8} {:>8} '
+                             '     {}    no    1 0.55   0.0   16.7     0.016 !   {}\n'.format(name.ljust(width),
+                                                                                            seq_from, seq_to,
+                                                                                            strand, desc))
+            tblout.writelines(footer)
+        open(cmd[cmd.index('-A') + 1], 'w').close()
+        return 0
+    return fake_call
+
+
+class TestLocalMaxBatch(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.model_attc_path = self.find_data(os.path.join('Models', 'attc_4.cm'))
+        replicon_path = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        topologies = Topology('circ')
+        with FastaIterator(replicon_path) as sequences_db:
+            sequences_db.topologies = topologies
+            self.replicon = next(sequences_db)
+        self.sites = [(1500, '+'), (2300, '+'), (3100, '+'), (3900, '+'),
+                      (12000, '-'), (12700, '-'), (13400, '-'), (20100, '+')]
+        self.cmds = []
+        infernal.call = fake_cmsearch(self.replicon, self.sites, self.cmds)
+
+    def tearDown(self):
+        infernal.call = _call_ori
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+
+
+    def test_local_max_batch(self):
+        windows = [(1000, 5000, 'top'), (10000, 14000, 'bottom'), (20000, 1000, 'both'),
+                   (5000, 9000, 'top'), (1000, 5000, 'top'), (1000, 5000, 'bottom')]
+        serial_dir = os.path.join(self.tmp_dir, 'serial')
+        batch_dir = os.path.join(self.tmp_dir, 'batch')
+        os.makedirs(serial_dir)
+        os.makedirs(batch_dir)
+        expected = [infernal.local_max(self.replicon, win_beg, win_end, self.model_attc_path,
+                                       strand_search=strand, out_dir=serial_dir)
+                    for win_beg, win_end, strand in windows[:-1]]
+        # the last window overwrite the tabulated output of the same window on top strand
+        expected_last = infernal.local_max(self.replicon, *windows[-1][:2], self.model_attc_path,
+                                           strand_search=windows[-1][2], out_dir=os.path.join(self.tmp_dir))
+        expected.append(expected_last)
+        self.cmds.clear()
+        received = infernal.local_max_batch(self.replicon, windows[:-1], self.model_attc_path, out_dir=batch_dir)
+        received.extend(infernal.local_max_batch(self.replicon, windows[-1:], self.model_attc_path,
+                                                 out_dir=self.tmp_dir))
+        # one cmsearch by strand
+        self.assertEqual(len(self.cmds), 4)
+        self.assertEqual(len(expected[0]), 4)
+        self.assertEqual(len(expected[1]), 3)
+        for exp, rec in zip(expected, received):
+            pdt.assert_frame_equal(exp, rec)
+
+        for win_beg, win_end, _ in windows[:-2]:
+            tblout_name = '{}_{}_{}_subseq_attc_table.res'.format(self.replicon.id, win_beg, win_end)
+            self.assertFileEqual(os.path.join(serial_dir, tblout_name), os.path.join(batch_dir, tblout_name))
+
+
+    def test_find_attc_max_batch(self):
+        args = argparse.Namespace()
+        args.attc_model = 'attc_4.cm'
+        args.local_max = True
+        args.eagle_eyes = False
+        cfg = Config(args)
+        cfg._prefix_data = os.path.join(os.path.dirname(__file__), 'data')
+        columns = ['pos_beg', 'pos_end', 'strand', 'evalue', 'type_elt', 'model', 'distance_2attC', 'annotation']
+        dtype = {"pos_beg": 'int', "pos_end": 'int', "strand": 'int', "evalue": 'float', "type_elt": 'str',
+                 "annotation": 'str', "model": 'str', "distance_2attC": 'float'}
+
+        def integrase(pos_beg, pos_end):
+            return pd.DataFrame({'pos_beg': pos_beg, 'pos_end': pos_end, 'strand': -1, 'evalue': 1e-21,
+                                 'type_elt': 'protein', 'annotation': 'intI', 'model': 'intersection_tyr_intI',
+                                 'distance_2attC': np.nan},
+                                index=['intI_{}'.format(pos_beg)], columns=columns).astype(dtype=dtype)
+
+        def attC(pos_begs, strand):
+            return pd.DataFrame({'pos_beg': pos_begs, 'pos_end': [p + 79 for p in pos_begs],
+                                 'strand': strand, 'evalue': 1e-3, 'type_elt': 'attC', 'annotation': 'attC',
+                                 'model': 'attc_4', 'distance_2attC': np.nan},
+                                index=['attc_{}'.format(p) for p in pos_begs],
+                                columns=columns).astype(dtype=dtype)
+
+        complete = Integron(self.replicon, cfg)
+        complete.integrase = integrase(55, 1014)
+        complete.attC = attC([1501, 2301], 1)
+        in0 = Integron(self.replicon, cfg)
+        in0.integrase = integrase(18000, 19000)
+        in0_2 = Integron(self.replicon, cfg)
+        in0_2.integrase = integrase(9000, 9500)
+        # this CALIN overlap an attC found around the In0
+        calin = Integron(self.replicon, cfg)
+        calin.attC = attC([12001, 12701], -1)
+        integrons = [complete, in0, in0_2, calin]
+
+        results = {}
+        for batch in (False, True):
+            out_dir = os.path.join(self.tmp_dir, str(batch))
+            os.makedirs(out_dir)
+            self.cmds.clear()
+            results[batch] = find_attc_max(integrons, self.replicon, 4000, cfg.model_attc_path, 200, 40,
+                                           circular=True, out_dir=out_dir, batch=batch)
+            results[batch, 'cmds'] = list(self.cmds)
+        pdt.assert_frame_equal(results[False], results[True])
+        self.assertSetEqual(set(results[True].pos_beg), {1501, 2301, 3101, 3901, 12001, 12701, 13401, 20101})
+        self.assertTrue(all(win_nb == 1 for _, win_nb in results[False, 'cmds']))
+        # the windows of the different integrons are searched together
+        self.assertGreater(max(win_nb for _, win_nb in results[True, 'cmds']), 1)
+        # the CALIN is not searched, as in the serial mode
+        self.assertEqual(sum(win_nb for _, win_nb in results[True, 'cmds']),
+                         sum(win_nb for _, win_nb in results[False, 'cmds']))
@@ -29,6 +29,9 @@
 import tempfile
 import os
 import shutil
+import gzip
+import unittest
+import importlib.util
 
 import pandas as pd
 import pandas.testing as pdt
@@ -119,6 +122,67 @@ class TestMerge(IntegronTest):
             self.assertTrue(os.path.exists(os.path.join(self.out_dir, '{}_1.pdf'.format(_id))))
 
 
+class TestMergeColumnar(IntegronTest):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.replicons = ('acba.007.p01.13', 'lian.001.c02.10', 'pssu.001.c01.13')
+        self.res_dirs = []
+        for rep in self.replicons:
+            res_dir = os.path.join(self.out_dir, 'Result_{}'.format(rep))
+            os.makedirs(res_dir)
+            self.res_dirs.append(res_dir)
+            res_file = self.find_data("{}_local_max_lin.integrons".format(rep))
+            shutil.copyfile(res_file, os.path.join(res_dir, "{}.integrons".format(rep)))
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow not installed")
+    def test_merge_columnar(self):
+        from integron_finder import results
+        ext = results.COLUMNAR_FORMATS['parquet']
+        outfile = os.path.join(self.out_dir, 'merged' + ext)
+        self.assertIsNone(merge.merge_columnar(outfile, ext, *self.res_dirs))
+        for rep, res_dir in zip(self.replicons, self.res_dirs):
+            report = results.merge_results(os.path.join(res_dir, "{}.integrons".format(rep)))
+            results.write_columnar_report(report, os.path.join(res_dir, rep + ext), 'parquet')
+        self.assertEqual(merge.merge_columnar(outfile, ext, *self.res_dirs), outfile)
+        self.assertListEqual(sorted(os.listdir(outfile)), ['input_file={}'.format(rep) for rep in self.replicons])
+
+        agg_results = results.read_columnar_report(outfile)
+        expected_results = pd.read_csv(self.find_data('acba_lian_pssu_merged.integrons'), sep="\t", comment="#")
+        self.assertEqual(len(agg_results), len(expected_results))
+
+
+class TestMergeCompressed(IntegronTest):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.replicons = ('acba.007.p01.13', 'lian.001.c02.10', 'pssu.001.c01.13')
+        self.res_dirs = []
+        for rep in self.replicons:
+            res_dir = os.path.join(self.out_dir, 'Result_{}'.format(rep))
+            os.makedirs(res_dir)
+            self.res_dirs.append(res_dir)
+            res_file = self.find_data("{}_local_max_lin.integrons".format(rep))
+            with open(res_file, 'rb') as plain, gzip.open(os.path.join(res_dir, "{}.integrons.gz".format(rep)),
+                                                          'wb') as compressed:
+                shutil.copyfileobj(plain, compressed)
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def test_merge_integrons(self):
+        outfile = os.path.join(self.out_dir, 'merged.integrons')
+        merged_file = merge.merge_integrons(outfile, *self.res_dirs)
+        self.assertEqual(merged_file, outfile)
+        agg_results = pd.read_csv(outfile, sep="\t", comment="#")
+        expected_results = pd.read_csv(self.find_data('acba_lian_pssu_merged.integrons'), sep="\t", comment="#")
+        self.assertEqual(len(agg_results), len(expected_results))
+        self.assertSetEqual(set(agg_results.ID_replicon), set(expected_results.ID_replicon))
+
+
 class TestParseArgs(IntegronTest):
 
     def test_parse_one_result(self):
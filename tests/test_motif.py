@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import random
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from Bio.Seq import reverse_complement
+from integron_finder.motif import Motif, MotifMatcher
+
+
+class TestMotif(IntegronTest):
+
+    def setUp(self):
+        self.motifs = [Motif('m1', ['ACGTACGTAC', 'ACGTACGTAC', 'TTTTGGGGCC']),
+                       Motif('m2', ['GATTACAGATTACAGATTACA'])]
+        self.matcher = MotifMatcher(self.motifs)
+
+    def brute_force(self, seq, circular):
+        """the positions of all instances, as Bio.motifs.Instances.search on each strand"""
+        size = len(seq)
+        text = seq + seq[:self.matcher.max_length - 1] if circular else seq
+        hits = {}
+        for motif_idx, motif in enumerate(self.motifs):
+            for strand in (1, -1):
+                instances = motif.instances if strand == 1 else [reverse_complement(i) for i in motif.instances]
+                pos = [p for p in range(size) if any(text[p:p + motif.length] == i for i in instances)]
+                if pos:
+                    hits[(motif_idx, strand)] = pos
+        return hits
+
+    def test_motif(self):
+        motif = Motif('foo', ['AAC', 'AAG'])
+        self.assertEqual(motif.length, 3)
+        with self.assertRaises(ValueError):
+            Motif('foo', ['AAC', 'AAGT'])
+        with self.assertRaises(ValueError):
+            MotifMatcher([Motif('foo', ['AANAAAAAAA'])])
+
+    def test_scan(self):
+        rnd = random.Random(42)
+        insts = [i for m in self.motifs for i in m.instances]
+        for circular in (False, True):
+            for _ in range(20):
+                seq = [rnd.choice('ACGT') for _ in range(2000)]
+                for _ in range(15):
+                    inst = rnd.choice(insts)
+                    if rnd.random() < 0.5:
+                        inst = reverse_complement(inst)
+                    pos = rnd.randrange(0, len(seq) - len(inst))
+                    seq[pos:pos + len(inst)] = inst
+                # an instance across the origin, found only on circular replicons
+                seq[-4:] = 'GATT'
+                seq[:17] = 'ACAGATTACAGATTACA'
+                seq = ''.join(seq)
+                hits = self.matcher.scan(seq, circular=circular)
+                expected = self.brute_force(seq, circular)
+                received = {key: hits._hits[key].tolist() for key in hits._hits}
+                self.assertDictEqual(received, expected)
+                self.assertEqual(len(seq) - 4 in received.get((1, 1), []), circular)
+
+    def test_scan_case_and_ambiguous(self):
+        seq = 'CC' + 'ACGTACGTAC' + 'CC' + 'acgtacgtac' + 'CC' + 'ACGTANGTAC' + 'CC'
+        hits = self.matcher.scan(seq)
+        self.assertListEqual(hits.search(0, 1, 0, len(seq)), [2])
+        self.assertListEqual(hits.search(1, 1, 0, len(seq)), [])
+
+    def test_search(self):
+        seq = 'A' * 5 + 'ACGTACGTAC' + 'A' * 30 + 'GTACGTACGT' + 'A' * 5
+        size = len(seq)
+        hits = self.matcher.scan(seq)
+        self.assertListEqual(hits.search(0, 1, 0, size), [5])
+        self.assertListEqual(hits.search(0, -1, 0, size), [45])
+        # the hit must be entirely in the window
+        self.assertListEqual(hits.search(0, 1, 5, 15), [5])
+        self.assertListEqual(hits.search(0, 1, 5, 14), [])
+        self.assertListEqual(hits.search(0, 1, 6, 20), [])
+        # linear replicon the window is clipped
+        self.assertListEqual(hits.search(0, 1, -20, 20), [5])
+        self.assertListEqual(hits.search(0, -1, 40, 80), [45])
+
+        # circular replicon the positions are in the frame of the window
+        hits = self.matcher.scan(seq, circular=True)
+        self.assertListEqual(hits.search(0, 1, -20, 20), [5])
+        self.assertListEqual(hits.search(0, -1, -20, 20), [45 - size])
+        self.assertListEqual(hits.search(0, 1, 40, size + 20), [size + 5])
+        self.assertListEqual(hits.search(0, -1, 40, size + 20), [45])
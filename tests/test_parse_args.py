@@ -27,7 +27,7 @@
 ####################################################################################
 
 import os
-import distutils
+import shutil
 import sys
 
 try:
@@ -81,6 +81,27 @@ class TestParseArgs(IntegronTest):
         cfg = parse_args(['--cpu', str(cpu), 'replicon'])
         self.assertEqual(cfg.cpu, cpu)
 
+    def test_workers(self):
+        cfg = parse_args(['replicon'])
+        self.assertEqual(cfg.workers, 1)
+        cfg = parse_args(['--workers', '4', '--cpu', '8', 'replicon'])
+        self.assertEqual(cfg.workers, 4)
+        self.assertEqual(cfg.cpu, 2)
+
+    def test_combined_integrase_search(self):
+        cfg = parse_args(['replicon'])
+        self.assertFalse(cfg.combined_integrase_search)
+        cfg = parse_args(['--combined-integrase-search', 'replicon'])
+        self.assertTrue(cfg.combined_integrase_search)
+
+    def test_cache(self):
+        cfg = parse_args(['replicon'])
+        self.assertIsNone(cfg.cache_dir)
+        self.assertEqual(cfg.cache_size, 5000)
+        cfg = parse_args(['--cache-dir', 'foo', '--cache-size', '100', 'replicon'])
+        self.assertEqual(cfg.cache_dir, 'foo')
+        self.assertEqual(cfg.cache_size, 100)
+
     def test_distance_threshold(self):
         cfg = parse_args(['replicon'])
         self.assertEqual(cfg.distance_threshold, 4000)
@@ -103,14 +124,14 @@ class TestParseArgs(IntegronTest):
 
     def test_cmsearch(self):
         cfg = parse_args(['replicon'])
-        self.assertEqual(cfg.cmsearch, distutils.spawn.find_executable("cmsearch"))
+        self.assertEqual(cfg.cmsearch, shutil.which("cmsearch"))
         cmsearch = 'foo'
         cfg = parse_args(['--cmsearch', cmsearch, 'replicon'])
         self.assertEqual(cfg.cmsearch, cmsearch)
 
     def test_hmmsearch(self):
         cfg = parse_args(['replicon'])
-        self.assertEqual(cfg.hmmsearch, distutils.spawn.find_executable("hmmsearch"))
+        self.assertEqual(cfg.hmmsearch, shutil.which("hmmsearch"))
         hmmsearch = 'foo'
         cfg = parse_args(['--hmmsearch', hmmsearch, 'replicon'])
         self.assertEqual(cfg.hmmsearch, hmmsearch)
@@ -118,7 +139,7 @@ class TestParseArgs(IntegronTest):
     def test_prodigal(self):
         cfg = parse_args(['replicon'])
         prodigal = 'foo'
-        self.assertEqual(cfg.prodigal, distutils.spawn.find_executable('prodigal'))
+        self.assertEqual(cfg.prodigal, shutil.which('prodigal'))
         cfg = parse_args(['--prodigal', prodigal, 'replicon'])
         self.assertEqual(cfg.prodigal, prodigal)
 
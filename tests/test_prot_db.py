@@ -44,7 +44,7 @@ except ImportError as err:
 from integron_finder import IntegronError
 from integron_finder.config import Config
 from integron_finder.utils import read_multi_prot_fasta
-from integron_finder.prot_db import GembaseDB, ProdigalDB, SeqDesc
+from integron_finder.prot_db import GembaseDB, ProdigalDB, SeqDesc, LstInfoIndex
 
 
 class TestGemBase(IntegronTest):
@@ -202,6 +202,24 @@ class TestGemBase(IntegronTest):
         self.assertListEqual(last_row, recieved_last_row)
 
 
+    def test_lst_index(self):
+        lst_path = self.find_data(os.path.join('Gembase', 'LSTINFO', 'ACBA.0917.00019.lst'))
+        lst_index = LstInfoIndex(GembaseDB._read_draft_lst(lst_path))
+        self.assertEqual(len(lst_index.contig_info('ACBA.0917.00019.0001')), 3870)
+        self.assertEqual(len(lst_index.contig_info('ACBA.0917.00019.0002')), 9)
+        self.assertTrue(lst_index.contig_info('ACBA.0917.00019.0007').empty)
+        desc_1 = lst_index.contig_descriptions('ACBA.0917.00019.0001')
+        self.assertEqual(desc_1['ACBA.0917.00019.0001_00001'],
+                         SeqDesc('ACBA.0917.00019.b0001_00001', -1, 266, 1480))
+        desc_2 = lst_index.contig_descriptions('ACBA.0917.00019.0002')
+        self.assertEqual(len(desc_2), 9)
+        self.assertNotIn('ACBA.0917.00019.0001_00001', desc_2)
+        # all contigs of a genome share the same parsing of the LSTINFO file
+        replicon_id = 'ACBA.0917.00019.0002'
+        self.assertIs(GembaseDB.gembase_draft_parser(lst_path, replicon_id),
+                      GembaseDB.gembase_draft_parser(lst_path, replicon_id))
+
+
     def test_make_protfile(self):
         file_name = (('ACBA.0917.00019', '.fna', 3870), ('ESCO001.C.00001.C001', '.fst', 3870))
         for seq_name, ext, seq_nb in file_name:
@@ -535,3 +553,28 @@ class TestProdigalDB(IntegronTest):
                         'ACBA.007.P01_13_1':  SeqDesc('ACBA.007.P01_13_1', 1, 55, 1014)}
         for seq_id, desc in descriptions.items():
             self.assertEqual(desc, db.get_description(seq_id))
+
+
+    def test_proteins_in_window(self):
+        replicon_id = 'ACBA.007.P01_13'
+        replicon_path = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        self.args.replicon = replicon_path
+        cfg = Config(self.args)
+        seq_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(seq_db)
+        replicon.path = replicon_path
+        prot_file = self.find_data(os.path.join('Proteins', replicon_id + '.prt'))
+        db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+
+        size = len(replicon)
+        all_desc = [db.get_description(prot_id) for prot_id in db]
+        # some windows crossing the origin of the replicon
+        windows = [(-200, 1500), (size - 1500, size + 200), (19000, 2000), (55, 1014), (5000, 5000)]
+        windows += [(start, start + length) for start in range(-2000, size + 2000, 1537)
+                    for length in (0, 1, 200, 3000, size - 1)]
+        for window_start, window_end in windows:
+            s_int = (window_end - window_start) % size
+            expected = [desc for desc in all_desc
+                        if (window_end - desc.stop) % size < s_int or (desc.start - window_start) % size < s_int]
+            self.assertListEqual(db.proteins_in_window(window_start, window_end), expected)
+        self.assertEqual(db.proteins_in_window(-200, 1500)[0], SeqDesc('ACBA.007.P01_13_1', 1, 55, 1014))
@@ -28,6 +28,8 @@
 
 import os
 import argparse
+import tempfile
+import shutil
 
 import pandas as pd
 import pandas.testing as pdt
@@ -39,7 +41,7 @@ except ImportError as err:
     raise ImportError(msg)
 
 from integron_finder.config import Config
-from integron_finder.hmm import read_hmm
+from integron_finder.hmm import read_hmm, domtblout_path
 from integron_finder.prot_db import GembaseDB, ProdigalDB
 from integron_finder.utils import read_multi_prot_fasta
 
@@ -343,3 +345,89 @@ class TestReadHMM(IntegronTest):
         exp = exp[["Accession_number", "query_name", "ID_query", "ID_prot",
                    "strand", "pos_beg", "pos_end", "evalue"]]
         pdt.assert_frame_equal(df, exp)
+
+
+    def test_read_multi_queries(self):
+        """
+        Test reading hmm results of several queries each with several hits: all hits are kept.
+        """
+        replicon_id = 'ACBA.0917.00019'
+        contig_id = 'ACBA.0917.00019.0001'
+        result_dir_expected = self.find_data("Results_Integron_Finder_{}.gembase".format(replicon_id))
+        replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', replicon_id + '.fna'))
+        prot_file = os.path.join(result_dir_expected, "tmp_{}".format(contig_id), contig_id + '.prt')
+
+        args = argparse.Namespace()
+        args.gembase = True
+        args.replicon = replicon_path
+        cfg = Config(args)
+
+        sequences_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(sequences_db)
+        prot_db = GembaseDB(replicon, cfg, prot_file=prot_file)
+
+        with open(self.find_data(os.path.join('fictive_results', "{}_intI_multi.res".format(contig_id)))) as f:
+            lines = f.readlines()
+        query_start = [i for i, l in enumerate(lines) if l.startswith('Query:')][0]
+        query_end = [i for i, l in enumerate(lines) if l.startswith('//')][0]
+        query_2 = [l.replace('Phage_integrase', 'Phage_integrase_2') for l in lines[query_start:query_end + 1]]
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            infile = os.path.join(tmp_dir, 'multi_queries.res')
+            with open(infile, 'w') as f:
+                f.writelines(lines[:query_end + 1] + query_2 + lines[query_end + 1:])
+            df = read_hmm(contig_id, prot_db, infile, cfg)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertListEqual(list(df.index), [0, 1, 2, 3])
+        self.assertListEqual(list(df.query_name), ["Phage_integrase"] * 2 + ["Phage_integrase_2"] * 2)
+        self.assertListEqual(list(df.ID_prot), ["ACBA.0917.00019.i0001_00298", "ACBA.0917.00019.i0001_00338"] * 2)
+        self.assertListEqual(list(df.evalue), [5.5e-66, 3.4e-51] * 2)
+
+
+    def test_read_hmm_domtblout(self):
+        """
+        Test that the domain tabulated output, when present, give the same results as the hmmsearch output
+        """
+        rep_name = "acba.007.p01.13"
+        replicon_id = 'ACBA.007.P01_13'
+
+        replicon_path = self.find_data(os.path.join('Replicons', rep_name + '.fst'))
+        prot_file = self.find_data(os.path.join('Proteins', replicon_id + '.prt'))
+
+        args = argparse.Namespace()
+        args.gembase = False
+        args.replicon = replicon_path
+        cfg = Config(args)
+
+        sequences_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+
+        res_dir = self.find_data(os.path.join("Results_Integron_Finder_{}".format(rep_name),
+                                              "tmp_{}".format(replicon_id)))
+        domtbl = """\
+#                                                                            --- full sequence --- -------------- this domain -------------   hmm coord   ali coord   env coord
+# target name        accession   tlen query name           accession   qlen   E-value  score  bias   #  of  c-Evalue  i-Evalue  score  bias  from    to  from    to  from    to  acc description of target
+#------------------- ---------- ----- -------------------- ---------- ----- --------- ------ ----- --- --- --------- --------- ------ ----- ----- ----- ----- ----- ----- ----- ---- ---------------------
+ACBA.007.P01_13_1    -            319 Phage_integrase      PF00589.16   173   4.4e-39  124.7   0.0   1   2      0.18       4.2   -2.2   0.0     3    26    56    83    54    88 0.66 # 55 # 1014 # 1 # ;gc_cont=0.585
+ACBA.007.P01_13_1    -            319 Phage_integrase      PF00589.16   173   4.4e-39  124.7   0.0   2   2   5.4e-40   1.2e-38  123.2   0.0     2   121   116   267   115   279 0.97 # 55 # 1014 # 1 # ;gc_cont=0.585
+#
+# Program:         hmmsearch
+# [ok]
+"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            infile = os.path.join(tmp_dir, "{}_phage_int.res".format(replicon_id))
+            shutil.copyfile(os.path.join(res_dir, "{}_phage_int.res".format(replicon_id)), infile)
+            exp = read_hmm(rep_name, prot_db, infile, cfg)
+            with open(domtblout_path(infile), 'w') as f:
+                f.write(domtbl)
+            # make sure the domain table is parsed
+            os.unlink(infile)
+            df = read_hmm(rep_name, prot_db, infile, cfg)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(len(exp), 1)
+        self.assertEqual(exp.evalue[0], 1.2e-38)
+        pdt.assert_frame_equal(df, exp)
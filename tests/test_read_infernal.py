@@ -28,6 +28,7 @@
 
 
 import os
+import tempfile
 import pandas as pd
 import pandas.testing as pdt
 
@@ -293,3 +294,29 @@ class TestReadInfernal(IntegronTest):
         expect = expect.astype(self.dtype)
         pdt.assert_frame_equal(df, expect)
 
+
+    def test_both_strands_descriptions(self):
+        """
+        Test hits on both strands, partial matches and descriptions with different number of words.
+        """
+        header = self.find_data(os.path.join("fictive_results", "{}_attc_table-empty.res".format(self.replicon_id)))
+        with open(header) as header_file:
+            lines = header_file.readlines()
+        hits = ["{}      -         attC_4               -          cm        3       45    100    170      +    no    1 "
+                "0.55   0.0   16.7     0.016 !   -\n",
+                "{}      -         attC_4               -          cm        2       47    400    330      -    no    1 "
+                "0.55   0.0   16.7     1e-05 !   a description with several words\n",
+                "{}      -         attC_4               -          cm        1       40    260    200      -    no    1 "
+                "0.55   0.0   16.7     0.5 ?   plasmid\n"
+                ]
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.res') as tblout:
+            tblout.writelines(lines[:2] + [hit.format(self.replicon_id) for hit in hits] + lines[2:])
+            tblout.flush()
+            df = infernal.read_infernal(tblout.name, self.replicon_id, self.length_cm)
+        expect = pd.DataFrame([[self.replicon_id, "attC_4", 3, 45, 98, 172, "+", 0.016],
+                               [self.replicon_id, "attC_4", 1, 40, 193, 260, "-", 0.5],
+                               [self.replicon_id, "attC_4", 2, 47, 330, 401, "-", 1e-5]],
+                              columns=["Accession_number", "cm_attC", "cm_debut",
+                                       "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+        expect = expect.astype(self.dtype)
+        pdt.assert_frame_equal(df, expect)
@@ -30,6 +30,8 @@ import os
 import tempfile
 import shutil
 import argparse
+import unittest
+import importlib.util
 
 import numpy as np
 import pandas as pd
@@ -297,3 +299,87 @@ class TestResults(IntegronTest):
         filtered = results.filter_calin(lian_df, 4)
         exp = lian_df[lian_df.ID_integron != 'integron_03']
         pdt.assert_frame_equal(exp, filtered)
+
+
+    def test_typed_report(self):
+        report = results.merge_results(
+            self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13.annot', 'acba.007.p01.13.integrons')))
+        typed = results.typed_report(report)
+        self.assertListEqual(list(typed.columns), list(report.columns))
+        for col in ('ID_replicon', 'type_elt', 'annotation', 'model'):
+            self.assertEqual(typed[col].dtype.name, 'category')
+            self.assertListEqual(list(typed[col].astype(object).where(typed[col].notna(), None)),
+                                 list(report[col].where(report[col].notna(), None)))
+        for col in ('pos_beg', 'pos_end', 'strand'):
+            self.assertEqual(typed[col].dtype, np.int64)
+        pdt.assert_series_equal(typed.evalue, report.evalue.astype(float).reset_index(drop=True))
+
+        # the schema does not depend on the content
+        empty = results.typed_report(results.merge_results())
+        self.assertListEqual([dtype.name for dtype in empty.dtypes], [dtype.name for dtype in typed.dtypes])
+
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow not installed")
+    def test_columnar_report(self):
+        reports = {name: results.merge_results(self.find_data(name + '_local_max_lin.integrons'))
+                   for name in ('acba.007.p01.13', 'lian.001.c02.10')}
+        for fmt, ext in results.COLUMNAR_FORMATS.items():
+            dataset = os.path.join(self.tmp_dir, 'merged' + ext)
+            for name, report in reports.items():
+                path = os.path.join(self.tmp_dir, name + ext)
+                results.write_columnar_report(report, path, fmt)
+                pdt.assert_frame_equal(results.read_columnar_report(path), results.typed_report(report))
+                results.add_partition(dataset, path)
+
+            merged = results.read_columnar_report(dataset)
+            self.assertEqual(len(merged), sum(len(r) for r in reports.values()))
+            self.assertSetEqual(set(merged.input_file), set(reports))
+            # filters are pushed down on the partitions and the columns
+            lian = results.read_columnar_report(dataset, input_files=['lian.001.c02.10'])
+            self.assertEqual(len(lian), len(reports['lian.001.c02.10']))
+            acba = results.read_columnar_report(dataset, replicons=['ACBA.007.P01_13'])
+            self.assertEqual(len(acba), len(reports['acba.007.p01.13']))
+
+
+
+    def test_results_writer(self):
+        reports = [results.merge_results(self.find_data(name + '_local_max_lin.integrons'))
+                   for name in ('acba.007.p01.13', 'lian.001.c02.10')]
+        summaries = [results.summary(report) for report in reports]
+        integron_path = os.path.join(self.tmp_dir, 'streamed.integrons')
+        summary_path = os.path.join(self.tmp_dir, 'streamed.summary')
+        with results.ResultsWriter(integron_path=integron_path, summary_path=summary_path,
+                                   header="cmd: integron_finder foo") as writer:
+            writer.add(reports[0], summaries[0])
+            # a replicon without integron and a skipped replicon
+            writer.add(None, summaries[0].iloc[0:0])
+            writer.add(None, None)
+            writer.add(reports[1], summaries[1])
+
+        with open(integron_path) as integron_file:
+            self.assertEqual(integron_file.readline(), "# cmd: integron_finder foo\n")
+        pdt.assert_frame_equal(results.merge_results(integron_path), pd.concat(reports, ignore_index=True))
+        with open(summary_path) as summary_file:
+            self.assertEqual(summary_file.readline(), "# cmd: integron_finder foo\n")
+        pdt.assert_frame_equal(results.merge_results(summary_path), pd.concat(summaries))
+
+        with results.ResultsWriter(integron_path=integron_path, summary_path=summary_path,
+                                   header="cmd: integron_finder foo") as writer:
+            writer.add(None, None)
+        with open(integron_path) as integron_file:
+            self.assertEqual(integron_file.read(), "# cmd: integron_finder foo\n# No Integron found\n")
+        with open(summary_path) as summary_file:
+            self.assertEqual(summary_file.read(), "# cmd: integron_finder foo\nID_replicon\tCALIN\tcomplete\tIn0\n")
+
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow not installed")
+    def test_results_writer_columnar(self):
+        reports = [results.merge_results(self.find_data(name + '_local_max_lin.integrons'))
+                   for name in ('acba.007.p01.13', 'lian.001.c02.10')]
+        for fmt, ext in results.COLUMNAR_FORMATS.items():
+            path = os.path.join(self.tmp_dir, 'streamed' + ext)
+            with results.ResultsWriter(columnar_path=path, columnar_format=fmt) as writer:
+                for report in reports:
+                    writer.add(report, None)
+            pdt.assert_frame_equal(results.read_columnar_report(path),
+                                   results.typed_report(pd.concat(reports)))
@@ -29,6 +29,7 @@
 import os
 import tempfile
 import shutil
+import argparse
 
 try:
     from tests import IntegronTest
@@ -37,7 +38,8 @@ except ImportError as err:
     raise ImportError(msg)
 
 from integron_finder import logger_set_level
-from integron_finder.hmm import scan_hmm_bank
+from integron_finder.config import Config
+from integron_finder.hmm import scan_hmm_bank, compile_hmm_bank, HmmBank
 
 
 class TestScanHmmBank(IntegronTest):
@@ -147,3 +149,91 @@ class TestScanHmmBank(IntegronTest):
         out_stderr = ["the hmm {} will be used for functional annotation".format(path)
                       for path in exp_files]
         self.assertEqual(set(catch_msg.split("\n")), set(out_stderr))
+
+
+class TestHmmBank(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.hmm_files = [self.find_data(os.path.join('Models', 'integron_integrase.hmm')),
+                          self.find_data(os.path.join('Models', 'phage-int.hmm'))]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def fake_hmmpress(self):
+        hmmpress = os.path.join(self.tmp_dir, 'hmmpress')
+        with open(hmmpress, 'w') as script:
+            script.write("#!/bin/sh\nfor ext in h3m h3i h3f h3p; do touch $1.$ext; done\n")
+        os.chmod(hmmpress, 0o755)
+        return hmmpress
+
+    def test_compile_hmm_bank(self):
+        bank_dir = os.path.join(self.tmp_dir, 'banks')
+        with self.catch_log():
+            bank = compile_hmm_bank(self.hmm_files, bank_dir)
+        self.assertEqual(os.path.basename(bank.path), 'func_annot.hmm')
+        self.assertEqual(bank.profiles_nb, 2)
+        self.assertFalse(bank.pressed)
+        expected = ''
+        for path in self.hmm_files:
+            with open(path) as hmm_file:
+                expected += hmm_file.read()
+        with open(bank.path) as bank_file:
+            self.assertEqual(bank_file.read(), expected)
+
+        # the bank is compiled once
+        os.unlink(bank.path)
+        with self.catch_log():
+            bank_2 = compile_hmm_bank(self.hmm_files, bank_dir)
+        self.assertEqual(bank_2.path, bank.path)
+        self.assertFalse(os.path.exists(bank_2.path))
+
+        # one hmm file, the bank has the same name
+        with self.catch_log():
+            bank = compile_hmm_bank(self.hmm_files[1:], bank_dir)
+        self.assertEqual(os.path.basename(bank.path), 'phage-int.hmm')
+        self.assertEqual(bank.profiles_nb, 1)
+
+        with self.catch_log():
+            bank = compile_hmm_bank(self.hmm_files, bank_dir, hmmpress=self.fake_hmmpress())
+        self.assertTrue(bank.pressed)
+        self.assertNotEqual(bank.path, bank_2.path)
+
+    def test_compile_hmm_bank_press_failed(self):
+        bank_dir = os.path.join(self.tmp_dir, 'banks')
+        hmmpress = os.path.join(self.tmp_dir, 'hmmpress')
+        with open(hmmpress, 'w') as script:
+            script.write("#!/bin/sh\ntouch $1.h3m\nexit 1\n")
+        os.chmod(hmmpress, 0o755)
+        with self.catch_log():
+            bank = compile_hmm_bank(self.hmm_files, bank_dir, hmmpress=hmmpress)
+        self.assertFalse(bank.pressed)
+        self.assertEqual(bank.profiles_nb, 2)
+        self.assertTrue(os.path.exists(bank.path))
+        # the unpressed bank is not stored under its key
+        self.assertTrue(os.path.basename(os.path.dirname(bank.path)).startswith('.tmp_'))
+        with self.catch_log():
+            bank_2 = compile_hmm_bank(self.hmm_files, bank_dir, hmmpress=self.fake_hmmpress())
+        self.assertTrue(bank_2.pressed)
+        self.assertNotEqual(bank_2.path, bank.path)
+
+    def test_program(self):
+        args = argparse.Namespace(hmmsearch=os.path.join(self.tmp_dir, 'hmmsearch'))
+        hmmscan = os.path.join(self.tmp_dir, 'hmmscan')
+        open(hmmscan, 'w').close()
+        os.chmod(hmmscan, 0o755)
+        cfg = Config(args)
+        self.assertEqual(cfg.hmmscan, hmmscan)
+
+        bank = HmmBank('foo.hmm', profiles_nb=1000, pressed=True)
+        self.assertEqual(bank.program(2, cfg), 'hmmscan')
+        self.assertEqual(bank.program(20, cfg), 'hmmsearch')
+        args.func_annot_program = 'hmmsearch'
+        self.assertEqual(bank.program(2, cfg), 'hmmsearch')
+        args.func_annot_program = 'hmmscan'
+        self.assertEqual(bank.program(20, cfg), 'hmmscan')
+        # hmmscan needs a pressed bank
+        bank = HmmBank('foo.hmm')
+        with self.catch_log():
+            self.assertEqual(bank.program(2, cfg), 'hmmsearch')
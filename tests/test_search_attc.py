@@ -28,6 +28,7 @@
 
 import os
 
+import numpy as np
 import pandas as pd
 import pandas.testing as pdt
 
@@ -687,3 +688,48 @@ class TestSearchAttc(IntegronTest):
         pdt.assert_frame_equal(attc_res2, attc_array[0])
         pdt.assert_frame_equal(attc_res, attc_array[1])
         pdt.assert_frame_equal(attc_res3, attc_array[2])
+
+
+    def test_attc_array_bounds(self):
+        # 3 arrays
+        pos_beg = np.array([100, 200, 5000, 5100, 12000])
+        order, starts = attc._attc_array_bounds(pos_beg, self.dist_threshold, 20000)
+        self.assertListEqual(order.tolist(), [0, 1, 2, 3, 4])
+        self.assertListEqual(starts.tolist(), [0, 2, 4])
+        # the last array continues across the origin in the first one
+        order, starts = attc._attc_array_bounds(pos_beg, self.dist_threshold, 14000)
+        self.assertListEqual(order.tolist(), [4, 0, 1, 2, 3])
+        self.assertListEqual(starts.tolist(), [0, 3])
+        # only one array, nothing to merge
+        order, starts = attc._attc_array_bounds(np.array([100, 200]), self.dist_threshold, 300)
+        self.assertListEqual(order.tolist(), [0, 1])
+        self.assertListEqual(starts.tolist(), [0])
+        # no hits
+        order, starts = attc._attc_array_bounds(np.array([], dtype=int), self.dist_threshold, 300)
+        self.assertEqual(len(order), 0)
+        self.assertEqual(len(starts), 0)
+
+
+    def test_attc_arrays(self):
+        attc_df = pd.DataFrame({"Accession_number": self.replicon_id,
+                                "cm_attC": "attC_4",
+                                "cm_debut": 1,
+                                "cm_fin": 47,
+                                "pos_beg": [1000, 2000, 3000, 9000, 19000],
+                                "pos_end": [1100, 2100, 3100, 9100, 19100],
+                                "sens": ["+", "-", "+", "+", "+"],
+                                "evalue": [1e-9, 1e-4, 1e-5, 1e-6, 1e-7]},
+                               columns=["Accession_number", "cm_attC", "cm_debut", "cm_fin",
+                                        "pos_beg", "pos_end", "sens", "evalue"])
+        arrays = attc.attc_arrays(attc_df, True, self.dist_threshold, self.replicon_size)
+        # '+': [19000, 1000, 3000] across the origin, [9000]; '-': [2000]
+        self.assertEqual(len(arrays), 3)
+        self.assertListEqual(arrays.hits.pos_beg.tolist(), [19000, 1000, 3000, 9000, 2000])
+        self.assertListEqual(arrays.starts.tolist(), [0, 3, 4])
+        self.assertListEqual(arrays.ends.tolist(), [3, 4, 5])
+        frames = arrays.frames()
+        self.assertListEqual([f.pos_beg.tolist() for f in frames], [[19000, 1000, 3000], [9000], [2000]])
+        for frame, attc_array in zip(frames, attc.search_attc(attc_df, True, self.dist_threshold,
+                                                              self.replicon_size)):
+            self.assertListEqual(frame.index.tolist(), list(range(len(frame))))
+            pdt.assert_frame_equal(frame, attc_array)
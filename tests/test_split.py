@@ -104,6 +104,45 @@ class TestSplit(IntegronTest):
                     self.assertEqual(s.description, ref_seq.description)
                     self.assertEqual(s.seq, ref_seq.seq)
 
+    def test_split_balance(self):
+        replicon_path = os.path.join(self.out_dir, 'replicons.fst')
+        # the file does not end by a new line
+        with open(replicon_path, 'wb') as replicons:
+            for name in ('acba.007.p01.13', 'pssu.001.c01.13', 'saen.040.p01.10', 'lian.001.c02.10',
+                         'ESCO001.B.00018.P002'):
+                with open(self.find_data(os.path.join('Replicons', name + '.fst')), 'rb') as replicon:
+                    replicons.write(replicon.read())
+            replicons.write(b'>too_short\nACGT')
+        seq_index = SeqIO.index(replicon_path, "fasta")
+        report = os.path.join(self.out_dir, 'chunks.tsv')
+        with self.catch_log():
+            chunk_names = split.split(replicon_path, outdir=self.out_dir, chunk=2, balance='bp', report=report)
+        self.assertListEqual(chunk_names, [os.path.join(self.out_dir, "replicons_chunk_{}.fst".format(i))
+                                           for i in (1, 2)])
+        expected_chunks = [['PSSU.001.C01_13'],
+                           ['ACBA.007.P01_13', 'SAEN.040.P01_10', 'LIAN.001.C02_10', 'ESCO001.B.00018.P002']]
+        for chunk_name, seq_ids in zip(chunk_names, expected_chunks):
+            # the records are copied as is
+            with open(chunk_name, 'rb') as chunk_file:
+                self.assertEqual(chunk_file.read(), b''.join(seq_index.get_raw(seq_id) for seq_id in seq_ids))
+        with open(report) as report_file:
+            self.assertListEqual(report_file.read().splitlines(),
+                                 ['chunk\treplicons\tbp\tcost',
+                                  'replicons_chunk_1.fst\t1\t3419049\t3.469',
+                                  'replicons_chunk_2.fst\t4\t1287586\t1.488'])
+
+        # the chunks are balanced with the runtime
+        with self.catch_log():
+            chunk_names = split.split(replicon_path, outdir=self.out_dir, chunk=3, balance='cost')
+        chunk_seq_ids = []
+        for chunk_name in chunk_names:
+            with open(chunk_name) as chunk_file:
+                chunk_seq_ids.append([seq.id for seq in SeqIO.parse(chunk_file, 'fasta')])
+        self.assertListEqual(chunk_seq_ids, [['PSSU.001.C01_13'],
+                                             ['LIAN.001.C02_10'],
+                                             ['ACBA.007.P01_13', 'SAEN.040.P01_10', 'ESCO001.B.00018.P002']])
+        seq_index.close()
+
 
 class TestParseArgs(IntegronTest):
 
@@ -131,6 +170,17 @@ class TestParseArgs(IntegronTest):
         self.assertEqual(parsed_args.verbose, 0)
         self.assertEqual(parsed_args.replicon, 'replicon')
 
+    def test_parse_balance(self):
+        parsed_args = split.parse_args(['replicon'])
+        self.assertIsNone(parsed_args.balance)
+        self.assertIsNone(parsed_args.report)
+        parsed_args = split.parse_args(['--chunk', '10', '--balance', 'cost', '--local-max',
+                                        '--report', 'chunks.tsv', 'replicon'])
+        self.assertEqual(parsed_args.balance, 'cost')
+        self.assertTrue(parsed_args.local_max)
+        self.assertFalse(parsed_args.func_annot)
+        self.assertEqual(parsed_args.report, 'chunks.tsv')
+
     def test_mute(self):
         parsed_args = split.parse_args(['replicon'])
         self.assertFalse(parsed_args.mute)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2021  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import tempfile
+import shutil
+import subprocess
+
+import pandas as pd
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder import timing
+
+
+class TestTiming(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stage_recorder(self):
+        recorder = timing.StageRecorder('replicon_1')
+        for _ in range(2):
+            with recorder.stage('external'):
+                subprocess.call(['sleep', '0.05'])
+        with recorder.stage('python'):
+            sum(range(1000000))
+        self.assertIn('external', recorder)
+        self.assertNotIn('cmsearch', recorder)
+        external = recorder['external']
+        self.assertEqual(external['calls'], 2)
+        self.assertGreaterEqual(external['wall_time'], 0.1)
+        self.assertGreater(external['max_rss'], 0)
+        self.assertGreater(recorder['python']['cpu_time'], 0)
+        self.assertListEqual([row[:3] for row in recorder.rows()],
+                             [('replicon_1', 'external', 2), ('replicon_1', 'python', 1)])
+        self.assertListEqual([len(row) for row in recorder.rows()], [len(timing.TIMING_COLUMNS)] * 2)
+
+    def test_recording(self):
+        @timing.timed('decorated')
+        def decorated():
+            with timing.stage('nested'):
+                return 42
+
+        # no recorder is active, nothing is recorded
+        self.assertEqual(decorated(), 42)
+
+        recorder = timing.StageRecorder('replicon_1')
+        with timing.recording(recorder):
+            self.assertEqual(decorated(), 42)
+            with timing.recording(None):
+                decorated()
+            decorated()
+        self.assertListEqual([row[1:3] for row in recorder.rows()],
+                             [('total', 1), ('decorated', 2), ('nested', 2)])
+        # the time of a stage includes the time of the stages it contains
+        self.assertGreaterEqual(recorder['total']['wall_time'], recorder['decorated']['wall_time'])
+        self.assertGreaterEqual(recorder['decorated']['wall_time'], recorder['nested']['wall_time'])
+
+        # the recorder is deactivated at the end of the with block
+        decorated()
+        self.assertEqual(recorder['decorated']['calls'], 2)
+
+    def test_timing_writer(self):
+        timing_path = os.path.join(self.tmp_dir, 'replicons.timing.tsv')
+        recorders = []
+        for replicon_id in ('replicon_1', 'replicon_2'):
+            recorder = timing.StageRecorder(replicon_id)
+            with timing.recording(recorder):
+                with timing.stage('find_integron'):
+                    pass
+            recorders.append(recorder)
+        with timing.TimingWriter(timing_path, header="cmd: integron_finder --timing foo") as writer:
+            for recorder in recorders:
+                writer.add(recorder)
+            # a skipped replicon
+            writer.add(None)
+        with open(timing_path) as timing_file:
+            self.assertEqual(timing_file.readline(), "# cmd: integron_finder --timing foo\n")
+        report = pd.read_csv(timing_path, sep="\t", comment="#")
+        self.assertListEqual(list(report.columns), timing.TIMING_COLUMNS)
+        self.assertListEqual(list(zip(report.ID_replicon, report.stage)),
+                             [('replicon_1', 'total'), ('replicon_1', 'find_integron'),
+                              ('replicon_2', 'total'), ('replicon_2', 'find_integron')])
+
+        # nothing is written without path
+        with timing.TimingWriter() as writer:
+            writer.add(recorders[0])
@@ -28,6 +28,9 @@
 
 import os
 import tempfile
+import shutil
+import gzip
+import struct
 
 try:
     from tests import IntegronTest
@@ -137,6 +140,177 @@ sequence seq_(4|2) is too short \(32 bp\), the sequence is skipped \(must be > 5
         self.assertListEqual(expected_seq_id, received_seq_id)
 
 
+    def test_FastaIterator_getitem(self):
+        replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', 'ACBA.0917.00019.fna'))
+        topologies = Topology('lin')
+        with utils.FastaIterator(replicon_path) as seq_db:
+            seq_db.topologies = topologies
+            seq = seq_db['ACBA.0917.00019.0002']
+            self.assertEqual(seq.id, 'ACBA.0917.00019.0002')
+            self.assertEqual(seq.topology, 'lin')
+            with self.assertRaises(KeyError):
+                seq_db['nimport_naoik']
+
+        replicon_path = self.find_data(os.path.join('Replicons', 'replicon_too_short.fst'))
+        with utils.FastaIterator(replicon_path) as seq_db:
+            with self.catch_log():
+                self.assertIsNone(seq_db['seq_2'])
+
+
+    def test_FastaIterator_seq_len(self):
+        for replicon_path in (self.find_data(os.path.join('Gembase', 'Replicons', 'ACBA.0917.00019.fna')),
+                              self.find_data(os.path.join('Replicons', 'replicon_too_short.fst'))):
+            with utils.FastaIterator(replicon_path) as seq_db:
+                for seq_id in seq_db.seq_index:
+                    self.assertEqual(seq_db.seq_len(seq_id), len(seq_db.seq_index[seq_id]))
+
+
+    def test_check_seq_alphabet_compliance(self):
+        from Bio.Seq import Seq
+        replicon_path = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        with utils.FastaIterator(replicon_path) as seq_db:
+            for seq, compliant in (('ACGTRYKMSWBDHVN', True), ('acgtrykmswbdhvn', True), ('', True),
+                                   ('ACGU', False), ('AC GT', False), ('ACGT-', False), ('ACGT' * 1000 + 'X', False)):
+                self.assertEqual(seq_db._check_seq_alphabet_compliance(Seq(seq)), compliant)
+        # the invalid letters are found across the blocks
+        for block_size in (1, 3, 4, 1 << 20):
+            self.assertTrue(utils._only_letters_of(b'>seq\nACGT\nacgt\n', utils._RAW_DNA_ALPHABET,
+                                                   start=5, block_size=block_size))
+            self.assertFalse(utils._only_letters_of(b'>seq\nACGT\nacgX\n', utils._RAW_DNA_ALPHABET,
+                                                    start=5, block_size=block_size))
+
+
+    def test_FastaIterator_checked_seq_len(self):
+        for name in ('replicon_too_short', 'replicon_bad_char', 'replicon_ambiguous_char'):
+            replicon_path = self.find_data(os.path.join('Replicons', name + '.fst'))
+            with utils.FastaIterator(replicon_path) as seq_db:
+                with self.catch_log():
+                    for seq_id in seq_db.seq_index:
+                        seq = seq_db[seq_id]
+                        self.assertEqual(seq_db.checked_seq_len(seq_id), None if seq is None else len(seq))
+
+        # the blanks inside the records are handled as the fasta parser does, the tabs are invalid characters
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            replicon_path = os.path.join(tmp_dir, 'blanks.fst')
+            with open(replicon_path, 'w') as fasta:
+                fasta.write(">spaces\r\n" + "ACGT ACGT\r\n" * 10)
+                fasta.write(">tab\n" + "ACGT\tACGT\n" * 10)
+            with utils.FastaIterator(replicon_path) as seq_db:
+                with self.catch_log():
+                    self.assertEqual(seq_db.checked_seq_len('spaces'), 80)
+                    self.assertEqual(len(seq_db['spaces']), 80)
+                    self.assertIsNone(seq_db.checked_seq_len('tab'))
+                    self.assertIsNone(seq_db['tab'])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+    def test_replicon_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            # the replicon is alone in the input file, the file is used as is
+            replicon_path = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+            with utils.FastaIterator(replicon_path) as seq_db:
+                replicon = next(seq_db)
+            self.assertEqual(utils.replicon_file(replicon, tmp_dir), replicon_path)
+            self.assertListEqual(os.listdir(tmp_dir), [])
+
+            # several replicons in the input file, the record is copied as is
+            replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', 'ACBA.0917.00019.fna'))
+            with utils.FastaIterator(replicon_path) as seq_db:
+                for seq_id in seq_db.seq_index:
+                    replicon = seq_db[seq_id]
+                    path = utils.replicon_file(replicon, tmp_dir)
+                    self.assertEqual(path, os.path.join(tmp_dir, seq_id + '.fst'))
+                    with open(path, 'rb') as rep_file:
+                        self.assertEqual(rep_file.read(), seq_db.seq_index.get_raw(seq_id))
+                    # the end of record is found across the chunks
+                    for chunk_size in (1, 61, 4096):
+                        utils.copy_fasta_record(replicon_path, replicon.fasta_source.offset, path,
+                                                chunk_size=chunk_size)
+                        with open(path, 'rb') as rep_file:
+                            self.assertEqual(rep_file.read(), seq_db.seq_index.get_raw(seq_id))
+
+            # the origin of the replicon is unknown
+            del replicon.fasta_source
+            path = utils.replicon_file(replicon, tmp_dir)
+            with utils.FastaIterator(path) as seq_db:
+                self.assertEqual(str(next(seq_db).seq), str(replicon.seq))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+    def _compressed_copies(self, replicon_path, tmp_dir):
+        """
+        :return: the path of the replicon file compressed with gzip and with bgzip,
+                 the last one with the samtools faidx indexes (.fai, .gzi)
+        """
+        from Bio import bgzf
+        gz_path = os.path.join(tmp_dir, 'replicons.fst.gz')
+        with open(replicon_path, 'rb') as plain, gzip.open(gz_path, 'wb', compresslevel=1) as gz:
+            shutil.copyfileobj(plain, gz)
+        bgz_path = os.path.join(tmp_dir, 'replicons.fst.bgz')
+        # the records span several blocks of 64 kb
+        with open(replicon_path, 'rb') as plain, bgzf.BgzfWriter(bgz_path, 'wb', compresslevel=1) as bgz:
+            bgz.write(plain.read())
+        with open(bgz_path, 'rb') as bgz, open(bgz_path + '.gzi', 'wb') as gzi:
+            blocks = [(start, data_start) for start, _, data_start, data_len in bgzf.BgzfBlocks(bgz) if data_len][1:]
+            gzi.write(struct.pack('<Q', len(blocks)))
+            for block in blocks:
+                gzi.write(struct.pack('<QQ', *block))
+        with utils.FastaIterator(replicon_path) as seq_db, open(bgz_path + '.fai', 'w') as fai:
+            for seq_id in seq_db.seq_index:
+                offset = seq_db.seq_index._offsets[seq_id]
+                raw = seq_db.seq_index.get_raw(seq_id)
+                lines = raw.split(b'\n')
+                fai.write("{}\t{}\t{}\t{}\t{}\n".format(seq_id, seq_db.seq_len(seq_id),
+                                                       offset + len(lines[0]) + 1,
+                                                       len(lines[1]), len(lines[1]) + 1))
+        return gz_path, bgz_path
+
+
+    def test_FastaIterator_compressed(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', 'ACBA.0917.00019.fna'))
+            gz_path, bgz_path = self._compressed_copies(replicon_path, tmp_dir)
+            self.assertIsNone(utils.fasta_compression(replicon_path))
+            self.assertEqual(utils.fasta_compression(gz_path), 'gzip')
+            self.assertEqual(utils.fasta_compression(bgz_path), 'bgzf')
+            self.assertEqual(utils.get_name_from_path(gz_path), 'replicons')
+
+            with utils.FastaIterator(replicon_path) as seq_db:
+                expected = {seq_id: (seq_db.seq_index.get_raw(seq_id), str(seq_db[seq_id].seq))
+                            for seq_id in seq_db.seq_index}
+            unindexed_path = os.path.join(tmp_dir, 'unindexed.fst.bgz')
+            shutil.copy(bgz_path, unindexed_path)
+            for path in (gz_path, bgz_path, unindexed_path):
+                with utils.FastaIterator(path, tmp_dir=tmp_dir) as seq_db:
+                    self.assertListEqual(list(seq_db.seq_index), list(expected))
+                    if path == bgz_path:
+                        self.assertIsInstance(seq_db.seq_index, utils.FaidxIndex)
+                    # random access
+                    for seq_id in reversed(list(expected)):
+                        raw, seq = expected[seq_id]
+                        self.assertEqual(seq_db.seq_index.get_raw(seq_id), raw)
+                        replicon = seq_db[seq_id]
+                        self.assertEqual(str(replicon.seq), seq)
+                        self.assertEqual(seq_db.checked_seq_len(seq_id), len(seq))
+                        # the replicon is given to the external tools in a plain fasta file
+                        rep_path = utils.replicon_file(replicon, tmp_dir)
+                        self.assertIsNone(utils.fasta_compression(rep_path))
+                        with open(rep_path, 'rb') as rep_file:
+                            self.assertEqual(rep_file.read(), raw)
+            # the gzip file is decompressed in a temporary directory removed at the end
+            self.assertSetEqual(set(os.listdir(tmp_dir)),
+                                {os.path.basename(p) for p in (gz_path, bgz_path, bgz_path + '.fai', bgz_path + '.gzi',
+                                                               unindexed_path)} |
+                                {seq_id + '.fst' for seq_id in expected})
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
     def test_model_len(self):
         model_path = self.find_data(os.path.join('Models', 'attc_4.cm'))
         self.assertEqual(utils.model_len(model_path), 47)